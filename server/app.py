@@ -1,6 +1,5 @@
 import os
 from app import create_app
-from app.services.database import db
 
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.user import User
@@ -12,18 +11,15 @@ from app.models.story import Story
 from app.models.beneficiary import Beneficiary
 from app.models.inventory import Inventory
 from app.models.reminder import Reminder
+from app.models.donation_stat import DonationStat
+from app.models.user_analytics import (
+    SignupStat, DonorSummary, DonorMonth, CharityDonor, CohortRetention, AnalyticsCounter
+)
 
 # Create the Flask application instance
 app = create_app()
 
-# Initialize database tables (only in production)
-if os.getenv('FLASK_ENV') == 'production':
-    with app.app_context():
-        try:
-            db.create_all()
-            app.logger.info("Database tables created successfully")
-        except Exception as e:
-            app.logger.error(f"Error creating tables: {e}")
+# Database tables are created by `flask release`, not at import time
 
 # Health check route (already defined in app/__init__.py, but adding here for redundancy)
 @app.route('/health')
@@ -1,7 +1,6 @@
 from flask import Flask, Blueprint
 from app.services.database import db
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
 from flask_restx import Api, Namespace
 
 from app.routes.user_routes import user_ns
@@ -13,23 +12,48 @@ from app.routes.inventory_routes import inventory_ns
 from app.routes.payment_routes import payment_ns
 from app.routes.admin_routes import admin_ns
 from app.routes.health_routes import health_ns
+from app.routes.search_routes import search_ns
 from app.routes.auth_routes import auth_ns
-from config.config import Config
+from app.middlewares import admission, auth_middleware
+from app.services import (
+    approved_charities, fast_json, login_throttle, passwords, payment_events, pool_metrics, rate_limit,
+    response_cache, sql_metrics
+)
+from config.config import get_config
+from config import init_db
+import os
 
-migrate = Migrate()
-
-def create_app():
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class or get_config())
+    admission.init_app(app)
+    if app.config['TRUSTED_PROXY_COUNT']:
+        # Take the client address from X-Forwarded-For as set by our own proxies
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_COUNT'], x_proto=1)
 
+    pool_metrics.init_app(app)
     db.init_app(app)
+    sql_metrics.init_app(app)
     JWTManager(app)
-    migrate.init_app(app, db)
+    auth_middleware.init_app(app)
+    approved_charities.init_app(app)
+    passwords.init_app(app)
+    login_throttle.init_app(app)
+    rate_limit.init_app(app)
+    response_cache.init_app(app)
+    payment_events.init_app(app)
+    if not app.config['FAST_START'] or os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        # Flask-Migrate pulls in alembic and is only used by the `flask db` commands
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    init_db.init_app(app)
 
     # Create a Blueprint for the API
     api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
     api = Api(api_bp, title='Tuinue Wasichana API', version='1.0',
               description='API documentation for the Tuinue Wasichana platform')
+    fast_json.init_app(app, api)
 
     # Register namespaces
     # Example: api.add_namespace(user_ns, path='/users')
@@ -47,6 +71,7 @@ def create_app():
     api.add_namespace(payment_ns, path='/payments')
     api.add_namespace(admin_ns, path='/admin')
     api.add_namespace(health_ns, path='/health')
+    api.add_namespace(search_ns, path='/search')
 
     # Register the API blueprint
     app.register_blueprint(api_bp)
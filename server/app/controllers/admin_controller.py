@@ -3,41 +3,54 @@ from app.models.charity import Charity
 from app.models.charity_application import CharityApplication
 from app.models.user import User
 from app.models.donation import Donation
+from app.models.donation_stat import DonationStat
 from app.services.database import db
+from app.services import approved_charities, response_cache
+from sqlalchemy.orm import joinedload, raiseload
 from datetime import datetime
 
 class AdminController:
     @staticmethod
     def get_dashboard_stats():
         """Get admin dashboard statistics"""
-        total_users = User.query.count()
-        total_charities = Charity.query.count()
-        approved_charities = Charity.query.filter_by(status='approved').count()
-        pending_applications = CharityApplication.query.filter_by(status='pending').count()
-        total_donations = Donation.query.filter_by(status='complete').count()
-        
-        # Calculate total donation amount
-        total_amount = db.session.query(db.func.sum(Donation.amount)).filter_by(status='complete').scalar() or 0
+        def count(model, *criteria):
+            return db.session.query(db.func.count(model.id)).filter(*criteria).scalar_subquery()
+
+        # Donation totals come from the donation_stats rollup, the rest are small
+        # indexed counts, all fetched in a single round-trip
+        stats = db.session.query(
+            count(User),
+            count(Charity),
+            count(Charity, Charity.status == 'approved'),
+            count(CharityApplication, CharityApplication.status == 'pending'),
+            db.session.query(DonationStat.donation_count).filter_by(
+                scope='global', scope_key='').scalar_subquery(),
+            db.session.query(DonationStat.total_amount).filter_by(
+                scope='global', scope_key='').scalar_subquery(),
+        ).one()
+        total_users, total_charities, approved_charities, pending_applications, total_donations, total_amount = stats
         
-        return jsonify({
+        return {
             'total_users': total_users,
             'total_charities': total_charities,
             'approved_charities': approved_charities,
             'pending_applications': pending_applications,
-            'total_donations': total_donations,
-            'total_donation_amount': str(total_amount)
-        })
+            'total_donations': total_donations or 0,
+            'total_donation_amount': str(total_amount or 0)
+        }
 
     @staticmethod
     def get_recent_activities():
         """Get recent system activities"""
-        # Recent donations
-        recent_donations = Donation.query.filter_by(status='complete').order_by(
+        # Recent donations, with the charity of each joined into the same SELECT
+        recent_donations = Donation.query.filter_by(status='complete').options(
+            joinedload(Donation.charity).load_only(Charity.name), raiseload('*')
+        ).order_by(
             Donation.timestamp.desc()
         ).limit(10).all()
         
         # Recent charity applications
-        recent_applications = CharityApplication.query.order_by(
+        recent_applications = CharityApplication.query.options(raiseload('*')).order_by(
             CharityApplication.submitted_at.desc()
         ).limit(10).all()
         
@@ -46,7 +59,8 @@ class AdminController:
         for donation in recent_donations:
             activities.append({
                 'type': 'donation',
-                'message': f'New donation of {donation.amount} to charity ID {donation.charity_id}',
+                'message': f'New donation of {donation.amount} to {donation.charity.name}',
+                'charity_id': donation.charity_id,
                 'timestamp': donation.timestamp.isoformat(),
                 'amount': str(donation.amount)
             })
@@ -62,7 +76,7 @@ class AdminController:
         # Sort by timestamp
         activities.sort(key=lambda x: x['timestamp'], reverse=True)
         
-        return jsonify(activities[:20])  # Return top 20 recent activities
+        return activities[:20]  # Return top 20 recent activities
 
     @staticmethod
     def approve_charity(charity_id):
@@ -76,6 +90,8 @@ class AdminController:
         
         charity.status = 'approved'
         db.session.commit()
+        approved_charities.invalidate()
+        response_cache.invalidate('charities', f'charity:{charity_id}')
         
         return jsonify({
             'message': 'Charity approved successfully',
@@ -94,6 +110,8 @@ class AdminController:
         
         charity.status = 'rejected'
         db.session.commit()
+        approved_charities.invalidate()
+        response_cache.invalidate('charities', f'charity:{charity_id}')
         
         return jsonify({
             'message': 'Charity rejected successfully',
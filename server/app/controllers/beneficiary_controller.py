@@ -2,12 +2,15 @@ from flask import jsonify
 from app.models.beneficiary import Beneficiary
 from app.models.charity import Charity
 from app.services.database import db
+from app.services.pagination import paginated_response
+from app.services.delta_sync import Sync
 
 class BeneficiaryController:
     @staticmethod
     def get_all_beneficiaries(charity_id):
-        beneficiaries = Beneficiary.query.filter_by(charity_id=charity_id).all()
-        return jsonify([b.to_dict() for b in beneficiaries])
+        return paginated_response(
+            Beneficiary.query.filter_by(charity_id=charity_id), (Beneficiary.id,), serialize=Beneficiary.serializer,
+            sync=Sync(Beneficiary, scope={'charity_id': charity_id}))
 
     @staticmethod
     def get_beneficiary_by_id(beneficiary_id):
@@ -1,15 +1,15 @@
 from flask import jsonify
 from app.models.charity import Charity
 from app.services.database import db
+from app.services import approved_charities, response_cache
 
 class CharityController:
     @staticmethod
     def get_all_charities(status=None):
+        query = Charity.query
         if status:
-            charities = Charity.query.filter_by(status=status).all()
-        else:
-            charities = Charity.query.all()
-        return jsonify([charity.to_dict() for charity in charities])
+            query = query.filter_by(status=status)
+        return [Charity.serializer(row) for row in Charity.serializer.select(query)]
 
     @staticmethod
     def get_charity_by_id(charity_id):
@@ -26,4 +26,6 @@ class CharityController:
 
         db.session.delete(charity)
         db.session.commit()
+        approved_charities.invalidate()
+        response_cache.invalidate('charities', f'charity:{charity_id}', 'stories')
         return jsonify({'message': 'Charity deleted successfully'}), 200
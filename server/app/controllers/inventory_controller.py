@@ -3,13 +3,16 @@ from app.models.inventory import Inventory
 from app.models.charity import Charity
 from app.models.beneficiary import Beneficiary
 from app.services.database import db
+from app.services.pagination import paginated_response
+from app.services.delta_sync import Sync
 from datetime import datetime
 
 class InventoryController:
     @staticmethod
     def get_all_inventory(charity_id):
-        inventory_items = Inventory.query.filter_by(charity_id=charity_id).all()
-        return jsonify([item.to_dict() for item in inventory_items])
+        return paginated_response(
+            Inventory.query.filter_by(charity_id=charity_id), (Inventory.id,), serialize=Inventory.serializer,
+            sync=Sync(Inventory, scope={'charity_id': charity_id}))
 
     @staticmethod
     def get_inventory_item_by_id(item_id):
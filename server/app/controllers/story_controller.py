@@ -1,49 +1,57 @@
-from flask import jsonify
 from app.models.story import Story
 from app.models.charity import Charity
 from app.services.database import db
+from app.services.pagination import paginated_response
+from app.services.delta_sync import Sync
+from app.services import response_cache
 
 class StoryController:
     @staticmethod
     def get_all_stories():
-        stories = Story.query.all()
-        return jsonify([story.to_dict() for story in stories])
+        return paginated_response(
+            Story.query,
+            (Story.created_at, Story.id),
+            serialize=Story.serializer,
+            collection='stories',
+            message='Stories retrieved successfully.',
+            sync=Sync(Story)
+        )
 
     @staticmethod
     def get_story_by_id(story_id):
-        story = Story.query.get(story_id)
-        if story:
-            return jsonify(story.to_dict())
-        return jsonify({'message': 'Story not found'}), 404
+        return Story.query.get(story_id)
 
     @staticmethod
     def create_story(charity_id, title, content):
         charity = Charity.query.get(charity_id)
         if not charity:
-            return jsonify({'message': 'Charity not found'}), 404
+            return None
 
         new_story = Story(charity_id=charity_id, title=title, content=content)
         db.session.add(new_story)
         db.session.commit()
-        return jsonify({'message': 'Story created successfully', 'story': new_story.to_dict()}), 201
+        response_cache.invalidate('stories')
+        return new_story
 
     @staticmethod
     def update_story(story_id, title=None, content=None):
         story = Story.query.get(story_id)
         if not story:
-            return jsonify({'message': 'Story not found'}), 404
+            return None
 
         if title: story.title = title
         if content: story.content = content
         db.session.commit()
-        return jsonify({'message': 'Story updated successfully', 'story': story.to_dict()})
+        response_cache.invalidate('stories', f'story:{story_id}')
+        return story
 
     @staticmethod
     def delete_story(story_id):
         story = Story.query.get(story_id)
         if not story:
-            return jsonify({'message': 'Story not found'}), 404
+            return False
 
         db.session.delete(story)
         db.session.commit()
-        return jsonify({'message': 'Story deleted successfully'}), 200
+        response_cache.invalidate('stories', f'story:{story_id}')
+        return True
@@ -0,0 +1,110 @@
+"""
+Admission control for the worker's request threads.
+
+At most ADMISSION_MAX_IN_FLIGHT requests run in the app at once; a request
+arriving while all of them are taken waits up to ADMISSION_QUEUE_TIMEOUT
+seconds for one to finish and is otherwise answered 503 with Retry-After,
+without touching the app or the database. Running GUNICORN_THREADS above the
+budget leaves spare threads whose only job is to turn excess load away
+quickly, so a flood costs its senders fast 503s instead of making every
+client queue behind it until gunicorn's timeout. A single client address may
+hold at most ADMISSION_MAX_PER_CLIENT of the slots and gets 429 beyond that,
+so one abusive client cannot take the whole budget for itself.
+
+The slot is held until the app returns its response, not while a streamed
+body is sent; payment event streams are bounded by PAYMENT_EVENTS_MAX_STREAMS
+instead. Liveness and readiness probes are always admitted.
+"""
+import json
+import threading
+
+# Load balancer probes must see the worker as alive even while it sheds load
+EXEMPT_PREFIXES = ('/health', '/api/v1/health/live', '/api/v1/health/ready')
+
+
+class AdmissionGate:
+    """WSGI middleware admitting at most ``max_in_flight`` concurrent requests"""
+
+    def __init__(self, wsgi_app, max_in_flight, max_per_client=0, queue_timeout=0.5, retry_after=1):
+        self.wsgi_app = wsgi_app
+        self.max_in_flight = max_in_flight
+        self.max_per_client = max_per_client
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self._clients = {}
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(EXEMPT_PREFIXES):
+            return self.wsgi_app(environ, start_response)
+        client = environ.get('REMOTE_ADDR')
+        with self._lock:
+            held = self._clients.get(client, 0)
+            if self.max_per_client and held >= self.max_per_client:
+                self.rejected += 1
+                return self._reject(start_response, '429 Too Many Requests', 'Too many concurrent requests')
+            # Counted before waiting so a client's queued requests count against its share too
+            self._clients[client] = held + 1
+        admitted = self._slots.acquire(timeout=self.queue_timeout)
+        if admitted:
+            with self._lock:
+                self.in_flight += 1
+        try:
+            if not admitted:
+                with self._lock:
+                    self.rejected += 1
+                return self._reject(start_response, '503 Service Unavailable', 'Server is busy, try again shortly')
+            return self.wsgi_app(environ, start_response)
+        finally:
+            with self._lock:
+                if admitted:
+                    self.in_flight -= 1
+                self._clients[client] -= 1
+                if not self._clients[client]:
+                    del self._clients[client]
+            if admitted:
+                self._slots.release()
+
+    def _reject(self, start_response, status, error):
+        body = json.dumps({'success': False, 'error': error}).encode()
+        start_response(status, [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', str(self.retry_after)),
+        ])
+        return [body]
+
+    def render(self):
+        """Prometheus lines for /api/v1/health/metrics"""
+        with self._lock:
+            in_flight, rejected = self.in_flight, self.rejected
+        return '\n'.join([
+            '# HELP admission_in_flight Requests currently admitted to the app.',
+            '# TYPE admission_in_flight gauge',
+            f'admission_in_flight {in_flight}',
+            '# HELP admission_max_in_flight Requests the app admits at once.',
+            '# TYPE admission_max_in_flight gauge',
+            f'admission_max_in_flight {self.max_in_flight}',
+            '# HELP admission_rejected_total Requests turned away for the global or per-client limit.',
+            '# TYPE admission_rejected_total counter',
+            f'admission_rejected_total {rejected}',
+        ]) + '\n'
+
+
+def init_app(app):
+    """Wrap the app's WSGI callable in a gate when ADMISSION_MAX_IN_FLIGHT is set.
+
+    Called before ProxyFix is installed, so the gate sees client addresses.
+    """
+    app.config.setdefault('ADMISSION_MAX_IN_FLIGHT', 0)
+    app.config.setdefault('ADMISSION_MAX_PER_CLIENT', 0)
+    app.config.setdefault('ADMISSION_QUEUE_TIMEOUT', 0.5)
+    app.config.setdefault('ADMISSION_RETRY_AFTER', 1)
+    if app.config['ADMISSION_MAX_IN_FLIGHT'] > 0:
+        gate = AdmissionGate(app.wsgi_app, app.config['ADMISSION_MAX_IN_FLIGHT'], app.config['ADMISSION_MAX_PER_CLIENT'],
+                             app.config['ADMISSION_QUEUE_TIMEOUT'], app.config['ADMISSION_RETRY_AFTER'])
+        app.wsgi_app = gate
+        app.extensions['admission'] = gate
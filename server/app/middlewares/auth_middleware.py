@@ -1,21 +1,69 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask import current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from app.services.database import db
+from app.services.cache import TTLCache
 from app.models.user import User
 
+# Sentinel cached for ids that no longer exist so deleted users don't hit the DB either
+_DELETED = ''
+
+
+def init_app(app):
+    """Attach the per-process principal cache to the app"""
+    app.config.setdefault('AUTH_CACHE_TTL', 60)
+    app.config.setdefault('AUTH_CACHE_SIZE', 4096)
+    app.extensions['principal_cache'] = TTLCache(
+        maxsize=app.config['AUTH_CACHE_SIZE'],
+        ttl=app.config['AUTH_CACHE_TTL']
+    )
+
+
+def _principal_cache():
+    return current_app.extensions['principal_cache']
+
+
+def get_user_role(user_id):
+    """Return the current role of ``user_id`` or None if the user no longer exists.
+
+    Only the ``role`` column is read and the result is cached for AUTH_CACHE_TTL seconds.
+    """
+    user_id = int(user_id)
+    cache = _principal_cache()
+    role = cache.get(user_id)
+    if role is None:
+        role = db.session.query(User.role).filter_by(id=user_id).scalar() or _DELETED
+        cache.set(user_id, role)
+    return role or None
+
+
+def invalidate_user(user_id):
+    """Drop the cached status for ``user_id`` after its role changes or it is deleted"""
+    _principal_cache().pop(int(user_id))
+
+
+def current_user_role():
+    """Role of the user owning the JWT of the current request"""
+    return get_user_role(get_jwt_identity())
+
+
 def roles_required(*roles):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            role = current_user_role()
+
+            if role is None:
+                return {'message': 'User not found'}, 404
 
-            if user is None:
-                return jsonify({'message': 'User not found'}), 404
+            # Tokens carry the role they were issued with; a mismatch means it was revoked
+            claimed_role = get_jwt().get('role', role)
+            if claimed_role != role:
+                return {'message': 'Token is no longer valid, please log in again'}, 401
 
-            if user.role not in roles:
-                return jsonify({'message': 'Access forbidden: Insufficient role'}), 403
+            if role not in roles:
+                return {'message': 'Access forbidden: Insufficient role'}, 403
 
             return fn(*args, **kwargs)
         return decorator
@@ -1,24 +1,24 @@
 from app.services.database import db
+from app.services.serializers import Serializable
+from datetime import datetime
 
-class Beneficiary(db.Model):
+class Beneficiary(Serializable, db.Model):
     __tablename__ = 'beneficiaries'
+    __table_args__ = (
+        db.Index('ix_beneficiaries_charity_id', 'charity_id'),
+        db.Index('ix_beneficiaries_charity_id_updated_at', 'charity_id', 'updated_at'),
+    )
+
+    serialized_fields = ('id', 'charity_id', 'name', 'description', 'inventory_given')
 
     id = db.Column(db.Integer, primary_key=True)
     charity_id = db.Column(db.Integer, db.ForeignKey('charities.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     inventory_given = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     charity = db.relationship('Charity', backref='beneficiaries')
 
     def __repr__(self):
         return f'<Beneficiary {self.name}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'charity_id': self.charity_id,
-            'name': self.name,
-            'description': self.description,
-            'inventory_given': self.inventory_given
-        }
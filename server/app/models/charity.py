@@ -1,8 +1,16 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class Charity(db.Model):
+class Charity(Serializable, db.Model):
     __tablename__ = 'charities'
+    __table_args__ = (
+        db.Index('ix_charities_owner_id', 'owner_id'),
+        db.Index('ix_charities_status_created_at', 'status', 'created_at'),
+        db.Index('ix_charities_updated_at', 'updated_at'),
+    )
+
+    serialized_fields = ('id', 'owner_id', 'name', 'description', 'status', 'created_at')
 
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -10,18 +18,9 @@ class Charity(db.Model):
     description = db.Column(db.Text)
     status = db.Column(db.Enum('pending', 'approved', 'rejected', name='charity_status_enum'), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner = db.relationship('User', backref='charities')
 
     def __repr__(self):
         return f'<Charity {self.name}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'owner_id': self.owner_id,
-            'name': self.name,
-            'description': self.description,
-            'status': self.status,
-            'created_at': self.created_at.isoformat()
-        }
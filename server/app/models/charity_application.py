@@ -1,8 +1,16 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class CharityApplication(db.Model):
+class CharityApplication(Serializable, db.Model):
     __tablename__ = 'charity_applications'
+    __table_args__ = (
+        db.Index('ix_charity_applications_user_id', 'user_id'),
+        db.Index('ix_charity_applications_status', 'status'),
+        db.Index('ix_charity_applications_submitted_at', 'submitted_at'),
+    )
+
+    serialized_fields = ('id', 'user_id', 'organization_name', 'mission', 'status', 'submitted_at', 'reviewed_at')
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -16,14 +24,3 @@ class CharityApplication(db.Model):
 
     def __repr__(self):
         return f'<CharityApplication {self.organization_name}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'organization_name': self.organization_name,
-            'mission': self.mission,
-            'status': self.status,
-            'submitted_at': self.submitted_at.isoformat(),
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None
-        }
@@ -1,32 +1,51 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class Donation(db.Model):
+class Donation(Serializable, db.Model):
     __tablename__ = 'donations'
+    __table_args__ = (
+        # Covers the ranged donor counts of the charity analytics
+        db.Index('ix_donations_charity_id_status_timestamp', 'charity_id', 'status', 'timestamp', 'user_id'),
+        db.Index('ix_donations_charity_id_timestamp', 'charity_id', 'timestamp'),
+        db.Index('ix_donations_user_id_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_donations_status_timestamp', 'status', 'timestamp'),
+        db.Index('ix_donations_user_id_updated_at', 'user_id', 'updated_at'),
+        db.Index('ix_donations_charity_id_updated_at', 'charity_id', 'updated_at'),
+    )
+
+    serialized_fields = ('id', 'user_id', 'charity_id', 'amount', 'recurring', 'status', 'is_anonymous', 'timestamp')
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     charity_id = db.Column(db.Integer, db.ForeignKey('charities.id'), nullable=False)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     recurring = db.Column(db.Boolean, default=False)
-    status = db.Column(db.Enum('pending', 'complete', 'failed', name='donation_status_enum'), default='pending')
+    status = db.Column(db.Enum('pending', 'initiated', 'complete', 'failed', name='donation_status_enum'), default='pending')
     is_anonymous = db.Column(db.Boolean, default=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = db.relationship('User', backref='donations')
     charity = db.relationship('Charity', backref='donations')
 
+    # pending -> initiated (STK push claimed by its job) -> complete/failed
+    STATUS_TRANSITIONS = {
+        'pending': ('initiated', 'complete', 'failed'),
+        'initiated': ('complete', 'failed'),
+    }
+
     def __repr__(self):
         return f'<Donation {self.id} - {self.amount}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'charity_id': self.charity_id,
-            'amount': str(self.amount),
-            'recurring': self.recurring,
-            'status': self.status,
-            'is_anonymous': self.is_anonymous,
-            'timestamp': self.timestamp.isoformat()
-        }
+    @classmethod
+    def transition(cls, donation_id, new_status):
+        """Move a donation to ``new_status`` if its current status allows it.
+
+        Issued as a conditional UPDATE so concurrent writers cannot skip or undo a
+        step; returns True when the row changed.
+        """
+        sources = [s for s, targets in cls.STATUS_TRANSITIONS.items() if new_status in targets]
+        updated = cls.query.filter(cls.id == donation_id, cls.status.in_(sources)).update(
+            {'status': new_status}, synchronize_session=False)
+        return updated == 1
@@ -0,0 +1,31 @@
+from app.services.database import db
+from app.services.serializers import Serializable
+from datetime import datetime
+
+class DonationStat(Serializable, db.Model):
+    """Running totals of completed donations.
+
+    One row per scope: ``global`` (empty key), ``charity`` (charity id),
+    ``day`` (YYYY-MM-DD of the donation timestamp) and the per-charity
+    ``charity_day`` / ``charity_day_rec`` (recurring only) keyed
+    ``<charity_id>:<YYYY-MM-DD>`` and ``charity_donor`` keyed
+    ``<charity_id>:<user_id>``.
+    """
+    __tablename__ = 'donation_stats'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_key', name='uq_donation_stats_scope'),
+        # Index-only donor and repeat-donor counts over a charity's charity_donor rows
+        db.Index('ix_donation_stats_scope_key_count', 'scope', 'scope_key', 'donation_count'),
+    )
+
+    serialized_fields = ('scope', 'scope_key', 'donation_count', 'total_amount', 'updated_at')
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(16), nullable=False)
+    scope_key = db.Column(db.String(32), nullable=False, default='')
+    donation_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DonationStat {self.scope}:{self.scope_key} - {self.donation_count}>'
@@ -1,8 +1,15 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class Inventory(db.Model):
+class Inventory(Serializable, db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.Index('ix_inventory_charity_id', 'charity_id'),
+        db.Index('ix_inventory_charity_id_updated_at', 'charity_id', 'updated_at'),
+    )
+
+    serialized_fields = ('id', 'charity_id', 'item_name', 'quantity', 'distributed_at', 'beneficiary_id')
 
     id = db.Column(db.Integer, primary_key=True)
     charity_id = db.Column(db.Integer, db.ForeignKey('charities.id'), nullable=False)
@@ -10,19 +17,10 @@ class Inventory(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     distributed_at = db.Column(db.DateTime)
     beneficiary_id = db.Column(db.Integer, db.ForeignKey('beneficiaries.id'), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     charity = db.relationship('Charity', backref='inventory_items')
     beneficiary = db.relationship('Beneficiary', backref='received_inventory')
 
     def __repr__(self):
         return f'<Inventory {self.item_name} - {self.quantity}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'charity_id': self.charity_id,
-            'item_name': self.item_name,
-            'quantity': self.quantity,
-            'distributed_at': self.distributed_at.isoformat() if self.distributed_at else None,
-            'beneficiary_id': self.beneficiary_id
-        }
@@ -1,27 +1,25 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class Payment(db.Model):
+class Payment(Serializable, db.Model):
     __tablename__ = 'payments'
+    __table_args__ = (
+        db.Index('ix_payments_transaction_id', 'transaction_id'),
+        db.Index('ix_payments_donation_id', 'donation_id'),
+    )
+
+    serialized_fields = ('id', 'donation_id', 'method', 'transaction_id', 'receipt_number', 'status', 'paid_at')
 
     id = db.Column(db.Integer, primary_key=True)
     donation_id = db.Column(db.Integer, db.ForeignKey('donations.id'), nullable=False)
     method = db.Column(db.Enum('mpesa', name='payment_method_enum'), nullable=False)
-    transaction_id = db.Column(db.String(255), nullable=False)
-    status = db.Column(db.Enum('success', 'failed', name='payment_status_enum'), nullable=False)
+    transaction_id = db.Column(db.String(255), nullable=False)  # CheckoutRequestID for M-Pesa
+    receipt_number = db.Column(db.String(64))
+    status = db.Column(db.Enum('pending', 'success', 'failed', name='payment_status_enum'), nullable=False)
     paid_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     donation = db.relationship('Donation', backref='payments')
 
     def __repr__(self):
         return f'<Payment {self.id} - {self.transaction_id}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'donation_id': self.donation_id,
-            'method': self.method,
-            'transaction_id': self.transaction_id,
-            'status': self.status,
-            'paid_at': self.paid_at.isoformat()
-        }
@@ -1,8 +1,14 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class Reminder(db.Model):
+class Reminder(Serializable, db.Model):
     __tablename__ = 'reminders'
+    __table_args__ = (
+        db.Index('ix_reminders_status_scheduled_time', 'status', 'scheduled_time'),
+    )
+
+    serialized_fields = ('id', 'user_id', 'charity_id', 'amount', 'scheduled_time', 'status')
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -16,13 +22,3 @@ class Reminder(db.Model):
 
     def __repr__(self):
         return f'<Reminder {self.id} for User {self.user_id} - {self.scheduled_time}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'charity_id': self.charity_id,
-            'amount': str(self.amount),
-            'scheduled_time': self.scheduled_time.isoformat(),
-            'status': self.status
-        }
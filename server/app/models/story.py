@@ -1,25 +1,25 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
 
-class Story(db.Model):
+class Story(Serializable, db.Model):
     __tablename__ = 'stories'
+    __table_args__ = (
+        db.Index('ix_stories_created_at', 'created_at'),
+        db.Index('ix_stories_charity_id', 'charity_id'),
+        db.Index('ix_stories_updated_at', 'updated_at'),
+    )
+
+    serialized_fields = ('id', 'charity_id', 'title', 'content', 'created_at')
 
     id = db.Column(db.Integer, primary_key=True)
     charity_id = db.Column(db.Integer, db.ForeignKey('charities.id'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     charity = db.relationship('Charity', backref='stories')
 
     def __repr__(self):
         return f'<Story {self.title}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'charity_id': self.charity_id,
-            'title': self.title,
-            'content': self.content,
-            'created_at': self.created_at.isoformat()
-        }
@@ -0,0 +1,24 @@
+from app.services.database import db
+from datetime import datetime
+
+class Tombstone(db.Model):
+    """A deleted row of a synced table, kept so ``?since=`` deltas can report it.
+
+    ``charity_id`` and ``user_id`` copy the deleted row's columns of the same
+    name (when it has them) so a delta can be limited to one charity's or
+    one donor's rows. Pruned after TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        db.Index('ix_tombstones_table_name_deleted_at', 'table_name', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(32), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    charity_id = db.Column(db.Integer)
+    user_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Tombstone {self.table_name}:{self.row_id}>'
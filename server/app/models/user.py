@@ -1,9 +1,15 @@
 from app.services.database import db
+from app.services.serializers import Serializable
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.passwords import hash_password, verify_password
 
-class User(db.Model):
+class User(Serializable, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_created_at', 'created_at'),
+    )
+
+    serialized_fields = ('id', 'name', 'email', 'role', 'created_at')
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
@@ -17,16 +23,7 @@ class User(db.Model):
         return f'<User {self.email}>'
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'role': self.role,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return verify_password(self.password_hash, password)
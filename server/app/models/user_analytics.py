@@ -0,0 +1,64 @@
+from app.services.database import db
+
+class SignupStat(db.Model):
+    """Signups per day and role, and how many of them went on to donate"""
+    __tablename__ = 'signup_stats'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'role', name='uq_signup_stats_day_role'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.String(10), nullable=False)
+    role = db.Column(db.String(16), nullable=False)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    converted = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SignupStat {self.day} {self.role} - {self.signups}>'
+
+
+class DonorSummary(db.Model):
+    """One row per user with at least one completed donation"""
+    __tablename__ = 'donor_summaries'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    first_month = db.Column(db.String(7), nullable=False)
+    donation_count = db.Column(db.Integer, nullable=False, default=0)
+    last_donation_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<DonorSummary {self.user_id} - {self.donation_count}>'
+
+
+class DonorMonth(db.Model):
+    """Months (YYYY-MM) in which a donor completed at least one donation"""
+    __tablename__ = 'donor_months'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.String(7), primary_key=True)
+
+
+class CharityDonor(db.Model):
+    """Distinct donor/charity pairs"""
+    __tablename__ = 'charity_donors'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    charity_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+
+class CohortRetention(db.Model):
+    """Donors of a first-donation cohort who donated again ``months_since`` months later"""
+    __tablename__ = 'cohort_retention'
+
+    cohort_month = db.Column(db.String(7), primary_key=True)
+    months_since = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    donors = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AnalyticsCounter(db.Model):
+    """Named counters: refresh watermarks, donor totals and donors per charity"""
+    __tablename__ = 'analytics_counters'
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
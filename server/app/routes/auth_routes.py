@@ -2,6 +2,7 @@ from flask import request, jsonify
 from flask_restx import Namespace, Resource, fields
 from app.services.database import db
 from app.models.user import User
+from app.services import login_throttle, passwords, rate_limit
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from datetime import datetime
 
@@ -31,14 +32,24 @@ profile_model = auth_ns.model('Profile', {
 @auth_ns.route('/login')
 class Login(Resource):
     @auth_ns.expect(login_model)
+    @auth_ns.response(429, 'Too many requests')
+    @rate_limit.limited('login')
     def post(self):
         data = request.get_json()
         email = data.get('email')
         password = data.get('password')
         if not all([email, password]):
             return {'success': False, 'error': 'Missing email or password'}, 400
+        if not isinstance(email, str) or not isinstance(password, str):
+            return {'success': False, 'error': 'Email and password must be strings'}, 400
+        retry_after = login_throttle.retry_after(email, request.remote_addr)
+        if retry_after:
+            return ({'success': False, 'error': 'Too many failed login attempts, try again later'},
+                    429, {'Retry-After': str(retry_after)})
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
+            login_throttle.record_success(email, request.remote_addr)
+            passwords.rehash_later(user, password)
             token = create_access_token(identity=str(user.id), additional_claims={'role': user.role})
             user_data = user.to_dict()
             return {
@@ -47,6 +58,7 @@ class Login(Resource):
                 'user': user_data,
                 'message': 'Login successful'
             }, 200
+        login_throttle.record_failure(email, request.remote_addr)
         return {'success': False, 'error': 'Invalid credentials'}, 401
 
 @auth_ns.route('/register')
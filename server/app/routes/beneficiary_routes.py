@@ -28,8 +28,8 @@ beneficiary_response_model = beneficiary_ns.model('BeneficiaryResponse', {
 
 @beneficiary_ns.route('/charities/<int:charity_id>/beneficiaries')
 class BeneficiaryList(Resource):
-    @beneficiary_ns.doc('get_charity_beneficiaries')
-    @beneficiary_ns.marshal_list_with(beneficiary_response_model)
+    @beneficiary_ns.doc('get_charity_beneficiaries', params={'after': 'Pagination cursor', 'limit': 'Page size'})
+    @beneficiary_ns.response(200, 'Success', [beneficiary_response_model])
     @roles_required('charity', 'admin')
     def get(self, charity_id):
         user_id = get_jwt_identity()
@@ -38,7 +38,7 @@ class BeneficiaryList(Resource):
         if user_charity and user_charity.id != charity_id:
             beneficiary_ns.abort(403, message='Unauthorized to view these beneficiaries')
 
-        return BeneficiaryController.get_all_beneficiaries(charity_id).json
+        return BeneficiaryController.get_all_beneficiaries(charity_id)
 
     @beneficiary_ns.doc('create_beneficiary')
     @beneficiary_ns.expect(beneficiary_request_model)
@@ -1,13 +1,18 @@
 from flask import request, jsonify
 from flask_restx import Namespace, Resource, fields
 from app.services.database import db
-from datetime import datetime
+from datetime import datetime, date
 from app.models.charity_application import CharityApplication
 from app.models.charity import Charity
 from app.models.user import User
-from app.middlewares.auth_middleware import roles_required
+from app.models.donation import Donation
+from app.middlewares.auth_middleware import roles_required, invalidate_user
 from flask_jwt_extended import get_jwt_identity
 from app.controllers.charity_controller import CharityController
+from app.services.pagination import paginated_response
+from app.services import approved_charities, response_cache
+from app.services.delta_sync import Sync
+from app.services.charity_analytics_service import CharityAnalyticsService, INTERVALS
 
 charity_ns = Namespace('charities', description='Charity related operations')
 
@@ -39,7 +44,7 @@ charity_application_response_model = charity_ns.model('CharityApplicationRespons
 class CharityApply(Resource):
     @charity_ns.doc('apply_for_charity')
     @charity_ns.expect(charity_application_model)
-    @charity_ns.marshal_with(charity_application_response_model, code=201)
+    @charity_ns.response(201, 'Application submitted', charity_application_response_model)
     @roles_required('donor')
     def post(self):
         user_id = get_jwt_identity()
@@ -76,21 +81,22 @@ class CharityApply(Resource):
 
 @charity_ns.route('/applications')
 class CharityApplicationList(Resource):
-    @charity_ns.doc('get_all_applications')
-    @charity_ns.marshal_list_with(charity_application_response_model)
+    @charity_ns.doc('get_all_applications', params={'after': 'Pagination cursor', 'limit': 'Page size'})
+    @charity_ns.response(200, 'Success', [charity_application_response_model])
     @roles_required('admin')
     def get(self):
-        applications = CharityApplication.query.all()
-        return {
-            'success': True,
-            'applications': [app.to_dict() for app in applications],
-            'message': 'Charity applications retrieved successfully.'
-        }, 200
+        return paginated_response(
+            CharityApplication.query,
+            (CharityApplication.submitted_at, CharityApplication.id),
+            serialize=CharityApplication.serializer,
+            collection='applications',
+            message='Charity applications retrieved successfully.'
+        )
 
 @charity_ns.route('/applications/<int:application_id>/approve')
 class CharityApplicationApprove(Resource):
     @charity_ns.doc('approve_charity_application')
-    @charity_ns.marshal_with(charity_application_response_model)
+    @charity_ns.response(200, 'Success', charity_application_response_model)
     @roles_required('admin')
     def post(self, application_id):
         application = CharityApplication.query.get(application_id)
@@ -113,11 +119,14 @@ class CharityApplicationApprove(Resource):
 
         db.session.add(new_charity)
         db.session.commit()
+        approved_charities.invalidate()
+        response_cache.invalidate('charities')
 
         user = User.query.get(application.user_id)
         if user:
             user.role = 'charity'
             db.session.commit()
+            invalidate_user(user.id)
 
         return {
             'success': True,
@@ -128,7 +137,7 @@ class CharityApplicationApprove(Resource):
 @charity_ns.route('/applications/<int:application_id>/reject')
 class CharityApplicationReject(Resource):
     @charity_ns.doc('reject_charity_application')
-    @charity_ns.marshal_with(charity_application_response_model)
+    @charity_ns.response(200, 'Success', charity_application_response_model)
     @roles_required('admin')
     def post(self, application_id):
         application = CharityApplication.query.get(application_id)
@@ -153,11 +162,11 @@ class CharityApplicationReject(Resource):
 class AdminCharityList(Resource):
     @charity_ns.doc('admin_get_all_charities')
     @charity_ns.param('status', 'Filter by charity status (pending, approved, rejected)')
-    @charity_ns.marshal_list_with(charity_response_model)
+    @charity_ns.response(200, 'Success', [charity_response_model])
     @roles_required('admin')
     def get(self):
         status = request.args.get('status')
-        charities = CharityController.get_all_charities(status).json
+        charities = CharityController.get_all_charities(status)
         return {
             'success': True,
             'charities': charities,
@@ -190,6 +199,8 @@ class AdminCharityApprove(Resource):
         
         charity.status = 'approved'
         db.session.commit()
+        approved_charities.invalidate()
+        response_cache.invalidate('charities', f'charity:{charity_id}')
         
         return {
             'success': True,
@@ -200,21 +211,25 @@ class AdminCharityApprove(Resource):
 # Public endpoints for donors
 @charity_ns.route('/')
 class CharityList(Resource):
-    @charity_ns.doc('get_approved_charities')
-    @charity_ns.marshal_list_with(charity_response_model)
+    @response_cache.cached('charities')
+    @charity_ns.doc('get_approved_charities', params={'after': 'Pagination cursor', 'limit': 'Page size'})
+    @charity_ns.response(200, 'Success', [charity_response_model])
     def get(self):
         """Get all approved charities for donors to view"""
-        charities = Charity.query.filter_by(status='approved').all()
-        return {
-            'success': True,
-            'charities': [charity.to_dict() for charity in charities],
-            'message': 'Charities retrieved successfully.'
-        }, 200
+        return paginated_response(
+            Charity.query.filter_by(status='approved'),
+            (Charity.created_at, Charity.id),
+            serialize=Charity.serializer,
+            collection='charities',
+            message='Charities retrieved successfully.',
+            sync=Sync(Charity, hidden=Charity.status != 'approved')
+        )
 
 @charity_ns.route('/<int:charity_id>')
 class CharityDetail(Resource):
+    @response_cache.cached('charity:{charity_id}')
     @charity_ns.doc('get_charity_details')
-    @charity_ns.marshal_with(charity_response_model)
+    @charity_ns.response(200, 'Success', charity_response_model)
     def get(self, charity_id):
         """Get specific charity details"""
         charity = Charity.query.get(charity_id)
@@ -254,7 +269,7 @@ class CharityDonors(Resource):
 
 @charity_ns.route('/my-charity/donations')
 class CharityDonations(Resource):
-    @charity_ns.doc('get_charity_donations')
+    @charity_ns.doc('get_charity_donations', params={'after': 'Pagination cursor', 'limit': 'Page size'})
     @roles_required('charity')
     def get(self):
         """Get donations received by the current charity"""
@@ -264,6 +279,43 @@ class CharityDonations(Resource):
         if not charity:
             charity_ns.abort(404, message='Charity not found for current user')
         
-        donations = Donation.query.filter_by(charity_id=charity.id).all()
-        return jsonify([donation.to_dict() for donation in donations])
+        return paginated_response(
+            Donation.query.filter_by(charity_id=charity.id),
+            (Donation.timestamp, Donation.id),
+            serialize=Donation.serializer,
+            sync=Sync(Donation, scope={'charity_id': charity.id})
+        )
+
 
+@charity_ns.route('/my-charity/analytics')
+class CharityAnalytics(Resource):
+    @charity_ns.doc('get_charity_analytics', params={
+        'start': 'First day to include (YYYY-MM-DD)',
+        'end': 'Last day to include (YYYY-MM-DD)',
+        'interval': 'Time series bucket: day, week or month'
+    })
+    @roles_required('charity')
+    def get(self):
+        """Get donation totals, donor counts and a time series for the current charity"""
+        user_id = get_jwt_identity()
+        charity = db.session.query(Charity.id).filter_by(owner_id=int(user_id)).first()
+
+        if not charity:
+            charity_ns.abort(404, message='Charity not found for current user')
+
+        interval = request.args.get('interval', 'day')
+        if interval not in INTERVALS:
+            charity_ns.abort(400, message=f"interval must be one of {', '.join(INTERVALS)}")
+        try:
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        except ValueError:
+            charity_ns.abort(400, message='start and end must be dates in YYYY-MM-DD format')
+        if start and end and start > end:
+            charity_ns.abort(400, message='start must not be after end')
+
+        return {
+            'success': True,
+            'analytics': CharityAnalyticsService.get(charity.id, start, end, interval),
+            'message': 'Charity analytics retrieved successfully.'
+        }, 200
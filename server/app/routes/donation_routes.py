@@ -1,4 +1,4 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_restx import Namespace, Resource, fields
 from app.services.database import db
 from app.models.donation import Donation
@@ -7,7 +7,11 @@ from app.models.user import User
 from app.models.charity import Charity
 from app.middlewares.auth_middleware import roles_required
 from flask_jwt_extended import get_jwt_identity, jwt_required
-from datetime import datetime
+from app.services.pagination import paginated_response
+from app.services.delta_sync import Sync
+from app.services.donation_stats_service import DonationStatsService
+from app.services import approved_charities, payment_events, rate_limit
+from datetime import datetime, timezone
 
 # M-Pesa integration stub (replace with actual service)
 def initiate_mpesa_stk_push(phone_number, amount, charity_id):
@@ -19,11 +23,23 @@ donation_ns = Namespace('donations', description='Donation related operations')
 donation_request_model = donation_ns.model('DonationRequest', {
     'charityId': fields.Integer(required=True, description='ID of the charity to donate to'),
     'amount': fields.Float(required=True, description='Amount of donation'),
-    'paymentMethod': fields.String(required=True, description='Payment method (e.g., mpesa, paypal, card)'),
+    'paymentMethod': fields.String(required=True, description='Payment method: ' + ', '.join(Payment.method.type.enums)),
     'phoneNumber': fields.String(description='Phone number for M-Pesa'),
     'is_anonymous': fields.Boolean(description='Donate anonymously?', default=False)
 })
 
+donation_batch_item_model = donation_ns.model('DonationBatchItem', {
+    'charityId': fields.Integer(required=True, description='ID of the charity that received the donation'),
+    'amount': fields.Float(required=True, description='Amount of donation'),
+    'userId': fields.Integer(description='Donor account, defaults to the importing admin'),
+    'timestamp': fields.String(description='ISO 8601 time the donation was collected'),
+    'is_anonymous': fields.Boolean(description='Donate anonymously?', default=False)
+})
+
+donation_batch_model = donation_ns.model('DonationBatch', {
+    'donations': fields.List(fields.Nested(donation_batch_item_model), required=True)
+})
+
 donation_response_model = donation_ns.model('DonationResponse', {
     'id': fields.Integer(readOnly=True),
     'user_id': fields.Integer,
@@ -38,6 +54,8 @@ donation_response_model = donation_ns.model('DonationResponse', {
 @donation_ns.route('/')
 class MakeDonation(Resource):
     @donation_ns.expect(donation_request_model)
+    @donation_ns.response(429, 'Too many requests')
+    @rate_limit.limited('donations')
     @jwt_required()
     def post(self):
         data = request.get_json()
@@ -49,8 +67,9 @@ class MakeDonation(Resource):
         is_anonymous = data.get('is_anonymous', False)
         if not all([charity_id, amount, payment_method]):
             return {'success': False, 'error': 'Missing required donation details'}, 400
-        charity = Charity.query.get(charity_id)
-        if not charity:
+        if payment_method not in Payment.method.type.enums:
+            return {'success': False, 'error': 'Unsupported payment method'}, 400
+        if not approved_charities.is_approved(charity_id):
             return {'success': False, 'error': 'Charity not found'}, 404
         try:
             amount = float(amount)
@@ -58,44 +77,117 @@ class MakeDonation(Resource):
                 return {'success': False, 'error': 'Amount must be positive'}, 400
         except ValueError:
             return {'success': False, 'error': 'Invalid amount'}, 400
+        # Payment is simulated, so the donation is written as complete in one transaction
         new_donation = Donation(
             user_id=int(user_id),
             charity_id=charity_id,
             amount=amount,
             recurring=False,
             is_anonymous=is_anonymous,
-            status='pending'
+            status='complete',
+            timestamp=datetime.utcnow()
         )
-        db.session.add(new_donation)
-        db.session.flush()
-        # Simulate payment
-        new_payment = Payment(
-            donation_id=new_donation.id,
+        db.session.add(Payment(
+            donation=new_donation,
             method=payment_method,
             transaction_id='SIMULATED',
             status='success'
-        )
-        db.session.add(new_payment)
-        db.session.commit()
-        new_donation.status = 'complete'
+        ))
+        db.session.flush()
+        DonationStatsService.record_completed(new_donation)
+        donation_data = new_donation.to_dict()
         db.session.commit()
         return {
             'success': True,
-            'donation': new_donation.to_dict(),
+            'donation': donation_data,
             'message': 'Donation successful.'
         }, 201
 
+def _utc_naive(timestamp):
+    """``timestamp`` as naive UTC, the form every DateTime column stores"""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+@donation_ns.route('/batch')
+class DonationBatch(Resource):
+    @donation_ns.doc('import_donations')
+    @donation_ns.expect(donation_batch_model)
+    @roles_required('admin')
+    def post(self):
+        """Import completed offline donations (e.g. collection drives) in one transaction"""
+        items = (request.get_json(silent=True) or {}).get('donations')
+        max_batch = current_app.config.get('DONATION_BATCH_MAX', 1000)
+        if not isinstance(items, list) or not items:
+            return {'success': False, 'error': 'donations must be a non-empty list'}, 400
+        if len(items) > max_batch:
+            return {'success': False, 'error': f'At most {max_batch} donations per batch'}, 413
+
+        importer_id = int(get_jwt_identity())
+        now = datetime.utcnow()
+        rows, errors = {}, []
+        for index, item in enumerate(items):
+            try:
+                row = {
+                    'user_id': int(item.get('userId') or importer_id),
+                    'charity_id': int(item['charityId']),
+                    'amount': round(float(item['amount']), 2),
+                    'recurring': False,
+                    'is_anonymous': item.get('is_anonymous', False),
+                    'status': 'complete',
+                    'timestamp': _utc_naive(datetime.fromisoformat(item['timestamp'])) if item.get('timestamp') else now
+                }
+            except (KeyError, TypeError, ValueError, AttributeError):
+                errors.append({'index': index, 'error': 'Invalid donation'})
+                continue
+            # The model is not validated, and bool("false") is True
+            if not isinstance(row['is_anonymous'], bool):
+                errors.append({'index': index, 'error': 'is_anonymous must be true or false'})
+            elif row['amount'] <= 0:
+                errors.append({'index': index, 'error': 'Amount must be positive'})
+            elif not approved_charities.is_approved(row['charity_id']):
+                errors.append({'index': index, 'error': 'Charity not found'})
+            else:
+                rows[index] = row
+
+        user_ids = {row['user_id'] for row in rows.values()}
+        known = {r[0] for r in db.session.query(User.id).filter(User.id.in_(user_ids))}
+        errors.extend({'index': index, 'error': 'User not found'}
+                      for index, row in rows.items() if row['user_id'] not in known)
+        if errors:
+            return {'success': False, 'errors': sorted(errors, key=lambda e: e['index'])}, 400
+
+        rows = list(rows.values())
+        try:
+            db.session.bulk_insert_mappings(Donation, rows)
+            DonationStatsService.record_completed_many(
+                [Donation(**row) for row in rows]
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return {
+            'success': True,
+            'created': len(rows),
+            'message': 'Donations imported.'
+        }, 201
+
 @donation_ns.route('/history')
 class DonationHistory(Resource):
     @jwt_required()
     def get(self):
         user_id = get_jwt_identity()
-        donations = Donation.query.filter_by(user_id=int(user_id)).all()
-        return {
-            'success': True,
-            'donations': [d.to_dict() for d in donations],
-            'message': 'Donation history retrieved.'
-        }, 200
+        # The charity name is joined into the same SELECT
+        return paginated_response(
+            Donation.query.join(Donation.charity).filter(Donation.user_id == int(user_id)),
+            (Donation.timestamp, Donation.id),
+            serialize=Donation.serializer.extend(charity_name=Charity.name),
+            collection='donations',
+            message='Donation history retrieved.',
+            sync=Sync(Donation, scope={'user_id': int(user_id)})
+        )
 
 @donation_ns.route('/mpesa/initiate')
 class MpesaInitiate(Resource):
@@ -122,11 +214,15 @@ class MpesaCallback(Resource):
 
 @donation_ns.route('/mpesa/status/<string:transactionId>')
 class MpesaStatus(Resource):
+    @donation_ns.doc(params={'transactionId': 'payment_reference returned when the payment started'})
     def get(self, transactionId):
-        # Simulate status check
+        donation_id = payment_events.resolve(transactionId)
+        current = payment_events.status(donation_id) if donation_id is not None else None
+        if current is None:
+            return {'success': False, 'error': 'Payment not found'}, 404
         return {
             'success': True,
-            'status': 'success',
-            'donation': {},
+            'status': current['status'],
+            'donation': current,
             'message': 'Payment status retrieved.'
         }, 200
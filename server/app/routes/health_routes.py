@@ -1,9 +1,10 @@
-from flask import jsonify
+from flask import current_app, jsonify, request, Response
 from flask_restx import Namespace, Resource
 from app.services.database import db
 from app.models.user import User
+from app.services import pool_metrics, sql_metrics
+import hmac
 import os
-import redis
 from datetime import datetime
 
 health_ns = Namespace('health', description='Health check and monitoring endpoints')
@@ -53,6 +54,7 @@ class DetailedHealthCheck(Resource):
         try:
             redis_url = os.getenv('REDIS_URL')
             if redis_url:
+                import redis
                 r = redis.from_url(redis_url)
                 r.ping()
                 health_status['checks']['redis'] = {
@@ -100,4 +102,20 @@ class LivenessCheck(Resource):
     @health_ns.doc('liveness_check')
     def get(self):
         """Liveness check for container orchestration"""
-        return {'status': 'alive'}, 200
\ No newline at end of file
+        return {'status': 'alive'}, 200
+
+@health_ns.route('/metrics')
+class Metrics(Resource):
+    @health_ns.doc('metrics')
+    def get(self):
+        """Per-route request, SQL, connection pool and admission metrics of this worker in Prometheus text format"""
+        # A static bearer token rather than a JWT: scrapers cannot log in, and
+        # checking a role would need a pooled connection the metrics may show are gone
+        token = current_app.config.get('METRICS_TOKEN')
+        supplied = request.headers.get('Authorization', '')
+        if not token or not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return {'success': False, 'error': 'Unauthorized'}, 401
+        body = sql_metrics.registry().render() + pool_metrics.render(db.engine)
+        if 'admission' in current_app.extensions:
+            body += current_app.extensions['admission'].render()
+        return Response(body, mimetype='text/plain; version=0.0.4')
@@ -30,8 +30,8 @@ inventory_response_model = inventory_ns.model('InventoryResponse', {
 
 @inventory_ns.route('/charities/<int:charity_id>/inventory')
 class InventoryList(Resource):
-    @inventory_ns.doc('get_charity_inventory')
-    @inventory_ns.marshal_list_with(inventory_response_model)
+    @inventory_ns.doc('get_charity_inventory', params={'after': 'Pagination cursor', 'limit': 'Page size'})
+    @inventory_ns.response(200, 'Success', [inventory_response_model])
     @roles_required('charity', 'admin')
     def get(self, charity_id):
         user_id = get_jwt_identity()
@@ -40,7 +40,7 @@ class InventoryList(Resource):
         if user_charity and user_charity.id != charity_id:
             inventory_ns.abort(403, message='Unauthorized to view this inventory')
 
-        return InventoryController.get_all_inventory(charity_id).json
+        return InventoryController.get_all_inventory(charity_id)
 
     @inventory_ns.doc('create_inventory_item')
     @inventory_ns.expect(inventory_request_model)
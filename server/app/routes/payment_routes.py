@@ -1,10 +1,12 @@
-from flask import request, jsonify
+from flask import request, current_app, after_this_request, Response
 from flask_restx import Namespace, Resource, fields
 from app.services.database import db
 from app.models.donation import Donation
-from app.models.payment import Payment
-from app.models.charity import Charity
-from app.services.mpesa_service import MpesaService
+from app.services import approved_charities, payment_events, rate_limit
+from app.services.stk_push_service import StkPushService
+from app.services.payment_callback_service import (
+    PaymentCallbackService, PROCESSED, FAILED, DUPLICATE, NOT_FOUND, MALFORMED
+)
 from app.middlewares.auth_middleware import roles_required
 from flask_jwt_extended import get_jwt_identity
 
@@ -26,6 +28,9 @@ payment_callback_model = payment_ns.model('PaymentCallback', {
 class MpesaPayment(Resource):
     @payment_ns.doc('initiate_mpesa_payment')
     @payment_ns.expect(mpesa_payment_model)
+    @payment_ns.response(202, 'STK push queued')
+    @payment_ns.response(429, 'Too many requests')
+    @rate_limit.limited('payments')
     @roles_required('donor', 'admin')
     def post(self):
         user_id = get_jwt_identity()
@@ -40,9 +45,8 @@ class MpesaPayment(Resource):
         if not all([phone_number, amount, charity_id]):
             payment_ns.abort(400, message='Missing required payment details')
         
-        # Validate charity exists
-        charity = Charity.query.get(charity_id)
-        if not charity:
+        # Validate charity exists and accepts donations
+        if not approved_charities.is_approved(charity_id):
             payment_ns.abort(404, message='Charity not found')
         
         # Validate amount
@@ -63,43 +67,21 @@ class MpesaPayment(Resource):
             status='pending'
         )
         db.session.add(donation)
-        db.session.flush()
+        db.session.commit()
         
-        # Initiate Mpesa payment
-        mpesa_service = MpesaService()
-        account_reference = f"DONATION_{donation.id}"
-        transaction_desc = f"Donation to {charity.name}"
+        # The STK push runs in the background; the client follows the donation status
+        StkPushService.start(donation.id, phone_number)
         
-        result = mpesa_service.initiate_stk_push(
-            phone_number=phone_number,
-            amount=amount,
-            account_reference=account_reference,
-            transaction_desc=transaction_desc
-        )
-        
-        if result['success']:
-            # Create payment record
-            payment = Payment(
-                donation_id=donation.id,
-                method='mpesa',
-                transaction_id=result['checkout_request_id'],
-                status='pending'
-            )
-            db.session.add(payment)
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': result['message'],
-                'donation_id': donation.id,
-                'checkout_request_id': result['checkout_request_id']
-            }), 200
-        else:
-            db.session.rollback()
-            return jsonify({
-                'success': False,
-                'message': result['message']
-            }), 400
+        reference = payment_events.reference_for(donation.id)
+        return {
+            'success': True,
+            'message': 'Payment initiation queued',
+            'donation_id': donation.id,
+            'status': 'pending',
+            'payment_reference': reference,
+            'events_url': f'/api/v1/payments/{reference}/events',
+            'status_url': f'/api/v1/donations/mpesa/status/{reference}'
+        }, 202
 
 @payment_ns.route('/verify')
 class PaymentVerify(Resource):
@@ -107,49 +89,58 @@ class PaymentVerify(Resource):
     @payment_ns.expect(payment_callback_model)
     def post(self):
         """Handle Mpesa payment callback"""
-        data = request.get_json()
-        
         try:
-            callback_data = data.get('Body', {})
-            stk_callback = callback_data.get('stkCallback', {})
-            
-            checkout_request_id = stk_callback.get('CheckoutRequestID')
-            result_code = stk_callback.get('ResultCode')
-            result_desc = stk_callback.get('ResultDesc')
-            
-            # Find the payment record
-            payment = Payment.query.filter_by(transaction_id=checkout_request_id).first()
-            if not payment:
-                return jsonify({'message': 'Payment record not found'}), 404
-            
-            donation = payment.donation
-            
-            if result_code == 0:  # Success
-                # Extract transaction details from callback
-                callback_metadata = stk_callback.get('CallbackMetadata', {}).get('Item', [])
-                mpesa_receipt_number = None
-                
-                for item in callback_metadata:
-                    if item.get('Name') == 'MpesaReceiptNumber':
-                        mpesa_receipt_number = item.get('Value')
-                        break
-                
-                # Update payment and donation status
-                payment.status = 'success'
-                payment.transaction_id = mpesa_receipt_number or checkout_request_id
-                donation.status = 'complete'
-                
-                db.session.commit()
-                
-                return jsonify({'message': 'Payment processed successfully'}), 200
-            else:
-                # Payment failed
-                payment.status = 'failed'
-                donation.status = 'failed'
-                
-                db.session.commit()
-                
-                return jsonify({'message': f'Payment failed: {result_desc}'}), 200
-                
+            result = PaymentCallbackService.ingest(request.get_json(silent=True))
         except Exception as e:
-            return jsonify({'message': f'Callback processing failed: {str(e)}'}), 500
\ No newline at end of file
+            current_app.logger.error(f"Callback processing failed: {str(e)}")
+            return {'message': f'Callback processing failed: {str(e)}'}, 500
+
+        if result.outcome == MALFORMED:
+            return {'message': 'Malformed callback: missing CheckoutRequestID or ResultCode'}, 400
+        if result.outcome == NOT_FOUND:
+            return {'message': 'Payment record not found'}, 404
+
+        if result.outcome != DUPLICATE:
+            app = current_app._get_current_object()
+
+            @after_this_request
+            def settle_after_response(response):
+                def notify():
+                    with app.app_context():
+                        PaymentCallbackService.notify(result)
+                response.call_on_close(notify)
+                return response
+
+        messages = {
+            PROCESSED: 'Payment processed successfully',
+            FAILED: f'Payment failed: {result.callback.result_desc}',
+            DUPLICATE: 'Callback already processed',
+        }
+        return {'ResultCode': 0, 'ResultDesc': 'Accepted', 'message': messages[result.outcome]}, 200
+
+@payment_ns.route('/<string:reference>/events')
+class PaymentEvents(Resource):
+    @payment_ns.doc('payment_status_events', params={'reference': 'payment_reference returned when the payment started'})
+    @payment_ns.response(200, 'text/event-stream of status events')
+    @payment_ns.response(503, 'Too many open streams; poll the status endpoint')
+    def get(self, reference):
+        """Stream the payment status as server-sent events until it is final"""
+        donation_id = payment_events.resolve(reference)
+        if donation_id is None:
+            payment_ns.abort(404, message='Payment not found')
+
+        stream = payment_events.open_stream(donation_id)
+        if stream is None:
+            return {'message': 'Too many open payment streams, poll the status endpoint instead',
+                    'status_url': f'/api/v1/donations/mpesa/status/{reference}'}, 503, {'Retry-After': '5'}
+        if stream.current is None:
+            stream.close()
+            payment_ns.abort(404, message='Payment not found')
+
+        # Not wrapped in stream_with_context: the stream needs no request state, and
+        # the server must call its close() to free the slot even if it never starts
+        return Response(stream, mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            # Keep nginx-style proxies from buffering the stream
+            'X-Accel-Buffering': 'no'
+        })
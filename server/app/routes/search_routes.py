@@ -0,0 +1,50 @@
+from flask import request
+from flask_restx import Namespace, Resource
+from app.services import response_cache, search_service
+from app.services.pagination import decode_cursor, encode_cursor, page_limit
+
+search_ns = Namespace('search', description='Full-text search over stories and charities')
+
+@search_ns.route('/')
+class Search(Resource):
+    @response_cache.cached('stories', 'charities')
+    @search_ns.doc(params={
+        'q': 'Search terms',
+        'type': 'Limit results to story or charity',
+        'after': 'Pagination cursor',
+        'limit': 'Page size'
+    })
+    def get(self):
+        """Ranked stories and approved charities matching q"""
+        q = request.args.get('q', '').strip()
+        if not q:
+            search_ns.abort(400, message='q is required')
+        if len(q) > search_service.MAX_QUERY_LENGTH:
+            search_ns.abort(400, message=f'q must be at most {search_service.MAX_QUERY_LENGTH} characters')
+
+        kind = request.args.get('type')
+        if kind and kind not in search_service.TYPES:
+            search_ns.abort(400, message=f"type must be one of {', '.join(search_service.TYPES)}")
+        types = (kind,) if kind else search_service.TYPES
+
+        limit = page_limit()
+        after = request.args.get('after')
+        if after:
+            after = decode_cursor(after, search_service.KEYS)
+        hits = search_service.search(q, types=types, limit=limit + 1, after=after)
+
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            next_cursor = encode_cursor([hits[-1].rank, hits[-1].type, hits[-1].id])
+        results = [
+            {'type': hit.type, 'score': -hit.rank, hit.type: document}
+            for hit, document in search_service.load(hits)
+        ]
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+        return {
+            'success': True,
+            'results': results,
+            'next_cursor': next_cursor,
+            'message': 'Search results retrieved successfully.'
+        }, 200, headers
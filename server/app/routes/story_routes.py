@@ -4,6 +4,7 @@ from app.controllers.story_controller import StoryController
 from app.middlewares.auth_middleware import roles_required
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from app.models.charity import Charity
+from app.services import response_cache
 
 story_ns = Namespace('stories', description='Story related operations')
 
@@ -22,13 +23,10 @@ story_response_model = story_ns.model('StoryResponse', {
 
 @story_ns.route('/')
 class StoryList(Resource):
+    @response_cache.cached('stories')
+    @story_ns.doc(params={'after': 'Pagination cursor', 'limit': 'Page size'})
     def get(self):
-        stories = StoryController.get_all_stories()
-        return {
-            'success': True,
-            'stories': [s.to_dict() for s in stories],
-            'message': 'Stories retrieved successfully.'
-        }, 200
+        return StoryController.get_all_stories()
 
     @story_ns.expect(story_request_model)
     @jwt_required()
@@ -50,6 +48,7 @@ class StoryList(Resource):
 
 @story_ns.route('/<int:story_id>')
 class Story(Resource):
+    @response_cache.cached('story:{story_id}')
     def get(self, story_id):
         story = StoryController.get_story_by_id(story_id)
         if not story:
@@ -3,7 +3,10 @@ from flask_restx import Namespace, Resource
 from app.services.database import db
 from app.models.user import User
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.middlewares.auth_middleware import roles_required
+from app.services.pagination import paginated_response
+from app.middlewares.auth_middleware import roles_required, current_user_role, invalidate_user
+from app.services.charity_analytics_service import INTERVALS
+from app.services.user_analytics_service import UserAnalyticsService
 
 user_ns = Namespace('users', description='User related operations')
 
@@ -12,12 +15,13 @@ class UserList(Resource):
     @jwt_required()
     @roles_required('admin')
     def get(self):
-        users = User.query.all()
-        return {
-            'success': True,
-            'users': [u.to_dict() for u in users],
-            'message': 'Users retrieved successfully.'
-        }, 200
+        return paginated_response(
+            User.query,
+            (User.created_at, User.id),
+            serialize=User.serializer,
+            collection='users',
+            message='Users retrieved successfully.'
+        )
 
 @user_ns.route('/<int:user_id>')
 class UserDetail(Resource):
@@ -25,7 +29,7 @@ class UserDetail(Resource):
     def get(self, user_id):
         current_user_id = get_jwt_identity()
         user = User.query.get(user_id)
-        if not user or (user.id != int(current_user_id) and not User.query.get(int(current_user_id)).role == 'admin'):
+        if not user or (user.id != int(current_user_id) and current_user_role() != 'admin'):
             return {'success': False, 'error': 'User not found or unauthorized.'}, 404
         return {
             'success': True,
@@ -36,12 +40,13 @@ class UserDetail(Resource):
     def put(self, user_id):
         current_user_id = get_jwt_identity()
         user = User.query.get(user_id)
-        if not user or (user.id != int(current_user_id) and not User.query.get(int(current_user_id)).role == 'admin'):
+        if not user or (user.id != int(current_user_id) and current_user_role() != 'admin'):
             return {'success': False, 'error': 'User not found or unauthorized.'}, 404
         data = request.get_json()
         user.name = data.get('name', user.name)
         user.email = data.get('email', user.email)
         db.session.commit()
+        invalidate_user(user.id)
         return {
             'success': True,
             'user': user.to_dict(),
@@ -55,6 +60,7 @@ class UserDetail(Resource):
             return {'success': False, 'error': 'User not found.'}, 404
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
         return {
             'success': True,
             'message': 'User deleted.'
@@ -62,12 +68,25 @@ class UserDetail(Resource):
 
 @user_ns.route('/analytics')
 class UserAnalytics(Resource):
+    @user_ns.doc('get_user_analytics', params={
+        'interval': 'Signup series bucket: day, week or month',
+        'cohorts': 'Number of most recent monthly retention cohorts (1-60)'
+    })
     @jwt_required()
     @roles_required('admin')
     def get(self):
-        # Stub for analytics
+        """Signups, donor conversion, retention cohorts and top charities by donors"""
+        interval = request.args.get('interval', 'month')
+        if interval not in INTERVALS:
+            return {'success': False, 'error': f"interval must be one of {', '.join(INTERVALS)}"}, 400
+        try:
+            cohorts = int(request.args.get('cohorts', 12))
+        except ValueError:
+            cohorts = 0
+        if not 1 <= cohorts <= 60:
+            return {'success': False, 'error': 'cohorts must be an integer between 1 and 60'}, 400
         return {
             'success': True,
-            'analytics': {},
+            'analytics': UserAnalyticsService.summary(interval, cohorts),
             'message': 'Analytics data.'
         }, 200
@@ -0,0 +1,38 @@
+"""
+Cached set of approved charity ids.
+Donation write paths only need to know that a charity exists and accepts
+donations, so they check membership here instead of loading the Charity row.
+"""
+from flask import current_app
+from app.services.database import db
+from app.services.cache import TTLCache
+from app.models.charity import Charity
+
+_KEY = 'ids'
+
+
+def init_app(app):
+    app.config.setdefault('APPROVED_CHARITY_CACHE_TTL', 300)
+    app.extensions['approved_charities'] = TTLCache(maxsize=1, ttl=app.config['APPROVED_CHARITY_CACHE_TTL'])
+
+
+def approved_charity_ids():
+    """Return a frozenset with the ids of every approved charity"""
+    cache = current_app.extensions['approved_charities']
+    ids = cache.get(_KEY)
+    if ids is None:
+        ids = frozenset(row[0] for row in db.session.query(Charity.id).filter_by(status='approved'))
+        cache.set(_KEY, ids)
+    return ids
+
+
+def is_approved(charity_id):
+    try:
+        return int(charity_id) in approved_charity_ids()
+    except (TypeError, ValueError):
+        return False
+
+
+def invalidate():
+    """Call after a charity is approved, rejected or deleted"""
+    current_app.extensions['approved_charities'].clear()
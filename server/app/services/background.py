@@ -0,0 +1,87 @@
+"""
+Background job dispatch.
+Jobs go to Celery when a broker is available (USE_REDIS=true) and to an
+in-process thread pool otherwise, since the free plan runs without a worker.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future
+from flask import current_app
+from app.services.database import db
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_jobs = {}
+_executor = None
+_executor_lock = threading.Lock()
+_celery = None
+
+
+def job(name):
+    """Register a function as a background job under ``name``.
+
+    Celery tasks wrapping the same function must use the same name.
+    """
+    def register(fn):
+        _jobs[name] = fn
+        return fn
+    return register
+
+
+def _thread_pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('BACKGROUND_WORKERS', 2),
+                    thread_name_prefix='background'
+                )
+    return _executor
+
+
+def _celery_client():
+    global _celery
+    if _celery is None:
+        from celery import Celery
+        _celery = Celery(broker=current_app.config['CELERY_BROKER_URL'],
+                         backend=current_app.config['CELERY_RESULT_BACKEND'])
+    return _celery
+
+
+def _run(app, name, args):
+    with app.app_context():
+        try:
+            return _jobs[name](*args)
+        except Exception as e:
+            logger.error(f"Background job {name} failed: {str(e)}")
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+
+def submit(name, *args, local=False):
+    """Run job ``name`` outside the request.
+
+    BACKGROUND_EXECUTOR selects ``celery``, ``thread`` or ``sync`` (inline, for
+    tests and scripts). ``local=True`` keeps the job in this process even with
+    Celery, for arguments that must not be written to the broker. Returns a
+    future or Celery AsyncResult.
+    """
+    mode = current_app.config.get('BACKGROUND_EXECUTOR', 'thread')
+    if mode == 'celery' and not local:
+        return _celery_client().send_task(name, args=list(args))
+
+    if mode == 'sync':
+        future = Future()
+        try:
+            future.set_result(_jobs[name](*args))
+        except Exception as e:
+            logger.error(f"Background job {name} failed: {str(e)}")
+            db.session.rollback()
+            future.set_exception(e)
+        return future
+
+    app = current_app._get_current_object()
+    return _thread_pool().submit(_run, app, name, args)
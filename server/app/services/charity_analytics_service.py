@@ -0,0 +1,130 @@
+"""
+Donation analytics for the charity dashboard.
+
+Totals, the recurring/one-off split and the time series are summed from the
+per-charity daily rows of the donation_stats rollup with GROUP BY, so their
+cost depends on the number of days requested rather than on the number of
+donations. Donor counts are distinct values and cannot be summed from daily
+rows: all-time counts come from the ``charity_donor`` rollup rows, ranged
+counts from the donations table through ix_donations_charity_id_status_timestamp.
+"""
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.donation_stat import DonationStat
+from app.services.donation_stats_service import CHARITY_DAY, CHARITY_RECURRING_DAY, CHARITY_DONOR
+from sqlalchemy import Date, case, cast, func
+from decimal import Decimal
+from datetime import datetime, time, timedelta
+
+INTERVALS = ('day', 'week', 'month')
+
+
+def period_start(day, interval):
+    """Start of the ``interval`` containing ``day`` (a YYYY-MM-DD string expression)"""
+    if interval == 'day':
+        return day
+    if interval == 'month':
+        return func.substr(day, 1, 7).concat('-01')
+    if db.engine.dialect.name == 'sqlite':
+        # Forward to Sunday (or stay on it), then back to that week's Monday
+        return func.date(day, 'weekday 0', '-6 days')
+    return func.to_char(func.date_trunc('week', cast(day, Date)), 'YYYY-MM-DD')
+
+
+class CharityAnalyticsService:
+    """Aggregates a charity's completed donations"""
+
+    @staticmethod
+    def get(charity_id, start=None, end=None, interval='day'):
+        """Return totals and a time series for ``charity_id``.
+
+        ``start`` and ``end`` are inclusive dates; either may be None for an
+        open range.
+        """
+        prefix = f'{charity_id}:'
+        low = prefix + (start.isoformat() if start else '')
+        high = prefix + (end.isoformat() if end else '9999-12-31')
+        period = period_start(func.substr(DonationStat.scope_key, len(prefix) + 1), interval).label('period')
+
+        rows = db.session.query(
+            period,
+            DonationStat.scope,
+            func.sum(DonationStat.donation_count),
+            func.sum(DonationStat.total_amount)
+        ).filter(
+            DonationStat.scope.in_([CHARITY_DAY, CHARITY_RECURRING_DAY]),
+            DonationStat.scope_key.between(low, high)
+        ).group_by(period, DonationStat.scope).order_by(period).all()
+
+        series = {}
+        for bucket, scope, count, amount in rows:
+            point = series.setdefault(bucket, {
+                'period': bucket,
+                'donation_count': 0,
+                'total_amount': Decimal('0'),
+                'recurring_count': 0,
+                'recurring_amount': Decimal('0'),
+            })
+            if scope == CHARITY_DAY:
+                point['donation_count'] = int(count)
+                point['total_amount'] = Decimal(str(amount))
+            else:
+                point['recurring_count'] = int(count)
+                point['recurring_amount'] = Decimal(str(amount))
+
+        points = list(series.values())
+        donation_count = sum(p['donation_count'] for p in points)
+        total_amount = sum((p['total_amount'] for p in points), Decimal('0'))
+        recurring_count = sum(p['recurring_count'] for p in points)
+        recurring_amount = sum((p['recurring_amount'] for p in points), Decimal('0'))
+        donors, repeat_donors = CharityAnalyticsService.donor_counts(charity_id, start, end)
+
+        return {
+            'charity_id': charity_id,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            'interval': interval,
+            'totals': {
+                'donation_count': donation_count,
+                'total_amount': str(total_amount),
+                'donors': donors,
+                'repeat_donors': repeat_donors,
+                'recurring': {'donation_count': recurring_count, 'total_amount': str(recurring_amount)},
+                'one_off': {'donation_count': donation_count - recurring_count,
+                            'total_amount': str(total_amount - recurring_amount)},
+            },
+            'series': [dict(p, total_amount=str(p['total_amount']), recurring_amount=str(p['recurring_amount']))
+                       for p in points],
+        }
+
+    @staticmethod
+    def donor_counts(charity_id, start=None, end=None):
+        """Return ``(donors, repeat_donors)`` among completed donations in the range"""
+        if start is None and end is None:
+            prefix = f'{charity_id}:'
+            donors, repeat = db.session.query(
+                func.count(DonationStat.id),
+                func.coalesce(func.sum(case((DonationStat.donation_count > 1, 1), else_=0)), 0)
+            ).filter(
+                DonationStat.scope == CHARITY_DONOR,
+                # ';' sorts right after ':', closing the key range of this charity
+                DonationStat.scope_key >= prefix,
+                DonationStat.scope_key < f'{charity_id};'
+            ).one()
+            return int(donors), int(repeat)
+
+        query = db.session.query(Donation.user_id).filter(
+            Donation.charity_id == charity_id,
+            Donation.status == 'complete'
+        )
+        if start:
+            query = query.filter(Donation.timestamp >= datetime.combine(start, time.min))
+        if end:
+            query = query.filter(Donation.timestamp < datetime.combine(end + timedelta(days=1), time.min))
+        per_donor = query.group_by(Donation.user_id).with_entities(
+            Donation.user_id, func.count().label('donations')).subquery()
+        donors, repeat = db.session.query(
+            func.count(),
+            func.coalesce(func.sum(case((per_donor.c.donations > 1, 1), else_=0)), 0)
+        ).one()
+        return int(donors), int(repeat)
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
+from sqlalchemy.dialects import postgresql, sqlite
 import os
 from dotenv import load_dotenv
 
@@ -7,6 +8,17 @@ load_dotenv()
 
 db = SQLAlchemy()
 
+# INSERT constructs supporting ON CONFLICT DO UPDATE
+_UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+def upsert(table):
+    """INSERT into ``table`` that accepts ``on_conflict_do_update``, or None if the database has none"""
+    insert = _UPSERT_DIALECTS.get(db.engine.dialect.name)
+    return None if insert is None else insert(table)
+
 def init_db(app: Flask):
     """Initialize the database connection."""
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
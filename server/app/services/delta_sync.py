@@ -0,0 +1,139 @@
+"""
+Conditional GETs and ``?since=`` deltas for the list endpoints.
+
+Synced tables carry an ``updated_at`` column, and deleting one of their rows
+through the ORM records a ``Tombstone`` in the same transaction. A list
+endpoint describes its rows with a ``Sync`` and ``paginated_response`` then:
+
+* sends ``Last-Modified``, the newest ``updated_at`` or tombstone in scope,
+  and answers ``If-Modified-Since`` with an empty 304;
+* answers ``?since=<token>`` with only the rows changed after the token,
+  the ids of rows deleted or no longer listed (``deleted``), and a new
+  ``since`` token for the next poll.
+
+Tokens are taken from the server clock when the delta is read, and each
+delta reaches DELTA_SYNC_OVERLAP seconds further back than its token, so
+rows committed by a slower concurrent transaction are not skipped. Clients
+therefore upsert by id and may see a row twice. A token older than the
+tombstone retention, or a delta of more than DELTA_SYNC_MAX_ROWS rows, gets
+a 410 and the client refetches the collection.
+
+HTTP dates have whole-second resolution, so a change made within the same
+second as a response can go unnoticed by ``If-Modified-Since`` until the
+next change; ``since`` tokens keep full precision.
+"""
+from datetime import datetime, timedelta
+from flask import current_app, request, Response
+from flask_restx import abort
+from sqlalchemy import event, func, select
+from werkzeug.http import http_date, parse_date
+from app.services.database import db
+from app.models.beneficiary import Beneficiary
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.inventory import Inventory
+from app.models.story import Story
+from app.models.tombstone import Tombstone
+
+SYNCED_MODELS = (Charity, Story, Donation, Inventory, Beneficiary)
+
+DEFAULT_OVERLAP = 5
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_RETENTION_DAYS = 30
+
+
+def _record_tombstone(mapper, connection, target):
+    connection.execute(Tombstone.__table__.insert().values(
+        table_name=mapper.local_table.name,
+        row_id=target.id,
+        charity_id=getattr(target, 'charity_id', None),
+        user_id=getattr(target, 'user_id', None),
+        deleted_at=datetime.utcnow()
+    ))
+
+
+for _model in SYNCED_MODELS:
+    event.listen(_model, 'after_delete', _record_tombstone)
+
+
+class Sync:
+    """The rows behind one list endpoint.
+
+    ``scope`` narrows the model to the rows the list draws from, as column
+    values shared with ``Tombstone`` (``charity_id`` or ``user_id``).
+    ``hidden`` matches rows in scope that the list leaves out, such as
+    charities that are not approved; when one changes it is reported as
+    deleted.
+    """
+
+    def __init__(self, model, scope=None, hidden=None):
+        self.model = model
+        self.scope = scope or {}
+        self.hidden = hidden
+
+    def _rows(self):
+        return self.model.query.filter_by(**self.scope)
+
+    def _tombstones(self):
+        return Tombstone.query.filter_by(table_name=self.model.__tablename__, **self.scope)
+
+    def last_modified(self):
+        """Newest change in scope, including deletions, or None for an empty scope"""
+        newest = db.session.execute(select(
+            self._rows().with_entities(func.max(self.model.updated_at)).scalar_subquery(),
+            self._tombstones().with_entities(func.max(Tombstone.deleted_at)).scalar_subquery()
+        )).one()
+        values = [value for value in newest if value is not None]
+        return max(values) if values else None
+
+    def changes(self, query, since):
+        """Rows of ``query`` changed after ``since`` and ids deleted or hidden since then"""
+        updated_at = self.model.updated_at
+        max_rows = current_app.config.get('DELTA_SYNC_MAX_ROWS', DEFAULT_MAX_ROWS)
+        changed = query.filter(updated_at > since).order_by(updated_at, self.model.id).limit(max_rows + 1).all()
+        deleted = [row_id for row_id, in self._tombstones().filter(Tombstone.deleted_at > since)
+                   .with_entities(Tombstone.row_id)]
+        if self.hidden is not None:
+            deleted += [row_id for row_id, in self._rows().filter(self.hidden, updated_at > since)
+                        .with_entities(self.model.id)]
+        if len(changed) + len(deleted) > max_rows:
+            abort(410, message='Too many changes since this token; refetch the collection')
+        return changed, sorted(set(deleted))
+
+
+def not_modified_since(last_modified):
+    """True when the request's If-Modified-Since covers ``last_modified``.
+
+    If-None-Match takes precedence, as RFC 9110 requires.
+    """
+    if last_modified is None or 'If-None-Match' in request.headers:
+        return False
+    since = parse_date(request.headers.get('If-Modified-Since'))
+    if since is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since.replace(tzinfo=None)
+
+
+def last_modified_header(last_modified):
+    return {'Last-Modified': http_date(last_modified)} if last_modified else {}
+
+
+def not_modified_response(last_modified):
+    return Response(status=304, headers=last_modified_header(last_modified))
+
+
+def since_window(since):
+    """Lower bound of the delta for a decoded ``since`` token"""
+    retention = current_app.config.get('TOMBSTONE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    if since < datetime.utcnow() - timedelta(days=retention):
+        abort(410, message='since token has expired; refetch the collection')
+    return since - timedelta(seconds=current_app.config.get('DELTA_SYNC_OVERLAP', DEFAULT_OVERLAP))
+
+
+def prune_tombstones(days=None):
+    """Delete tombstones older than the retention period; returns the count"""
+    days = days if days is not None else current_app.config.get('TOMBSTONE_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+    deleted = Tombstone.query.filter(Tombstone.deleted_at < datetime.utcnow() - timedelta(days=days)).delete(
+        synchronize_session=False)
+    db.session.commit()
+    return deleted
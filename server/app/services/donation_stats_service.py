@@ -0,0 +1,147 @@
+"""
+Incrementally maintained donation aggregates.
+Completed donations are folded into the donation_stats rollup inside the same
+transaction that completes them, so dashboards never scan the donations table.
+"""
+from app.services.database import db, upsert
+from app.models.donation import Donation
+from app.models.donation_stat import DonationStat
+from decimal import Decimal
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = 'global'
+CHARITY = 'charity'
+DAY = 'day'
+# Per-charity scopes are keyed '<charity_id>:<suffix>' so one charity is a key range
+CHARITY_DAY = 'charity_day'
+CHARITY_RECURRING_DAY = 'charity_day_rec'
+CHARITY_DONOR = 'charity_donor'
+
+class DonationStatsService:
+    """Maintains the donation_stats rollup"""
+
+    @staticmethod
+    def scopes_for(donation):
+        """Rollup rows a completed donation contributes to"""
+        day = (donation.timestamp or datetime.utcnow()).date().isoformat()
+        charity_id = donation.charity_id
+        scopes = [
+            (GLOBAL, ''),
+            (CHARITY, str(charity_id)),
+            (DAY, day),
+            (CHARITY_DAY, f'{charity_id}:{day}'),
+            (CHARITY_DONOR, f'{charity_id}:{donation.user_id}'),
+        ]
+        if donation.recurring:
+            scopes.append((CHARITY_RECURRING_DAY, f'{charity_id}:{day}'))
+        return scopes
+
+    @staticmethod
+    def record_completed(donation):
+        """Add a donation that just moved to ``complete``.
+
+        Must be called exactly once per transition, before the caller commits.
+        """
+        amount = Decimal(str(donation.amount))
+        for scope, key in DonationStatsService.scopes_for(donation):
+            DonationStatsService._increment(scope, key, 1, amount)
+
+    @staticmethod
+    def record_completed_many(donations):
+        """Add many completed donations with one upsert per affected rollup row"""
+        totals = {}
+        for donation in donations:
+            amount = Decimal(str(donation.amount))
+            for scope_key in DonationStatsService.scopes_for(donation):
+                count, total = totals.get(scope_key, (0, Decimal('0')))
+                totals[scope_key] = (count + 1, total + amount)
+        for (scope, key), (count, total) in totals.items():
+            DonationStatsService._increment(scope, key, count, total)
+
+    @staticmethod
+    def _increment(scope, key, count, amount):
+        table = DonationStat.__table__
+        now = datetime.utcnow()
+        stmt = upsert(table)
+
+        if stmt is not None:
+            stmt = stmt.values(
+                scope=scope, scope_key=key, donation_count=count,
+                total_amount=amount, updated_at=now
+            ).on_conflict_do_update(
+                index_elements=['scope', 'scope_key'],
+                set_={
+                    'donation_count': table.c.donation_count + count,
+                    'total_amount': table.c.total_amount + amount,
+                    'updated_at': now,
+                }
+            )
+            db.session.execute(stmt)
+            return
+
+        updated = db.session.execute(
+            table.update()
+            .where(table.c.scope == scope, table.c.scope_key == key)
+            .values(donation_count=table.c.donation_count + count,
+                    total_amount=table.c.total_amount + amount,
+                    updated_at=now)
+        ).rowcount
+        if not updated:
+            db.session.execute(table.insert().values(
+                scope=scope, scope_key=key, donation_count=count,
+                total_amount=amount, updated_at=now
+            ))
+
+    @staticmethod
+    def rebuild():
+        """Recompute every rollup row from the donations table (for backfills)"""
+        complete = Donation.status == 'complete'
+        count = db.func.count(Donation.id)
+        total = db.func.coalesce(db.func.sum(Donation.amount), 0)
+        day = db.func.date(Donation.timestamp)
+
+        rows = []
+        global_count, global_total = db.session.query(count, total).filter(complete).one()
+        rows.append((GLOBAL, '', global_count, global_total))
+        for charity_id, c, t in db.session.query(Donation.charity_id, count, total).filter(
+                complete).group_by(Donation.charity_id):
+            rows.append((CHARITY, str(charity_id), c, t))
+        for donation_day, c, t in db.session.query(day, count, total).filter(
+                complete, Donation.timestamp.isnot(None)).group_by(day):
+            rows.append((DAY, str(donation_day), c, t))
+        for charity_id, donation_day, c, t in db.session.query(Donation.charity_id, day, count, total).filter(
+                complete, Donation.timestamp.isnot(None)).group_by(Donation.charity_id, day):
+            rows.append((CHARITY_DAY, f'{charity_id}:{donation_day}', c, t))
+        for charity_id, donation_day, c, t in db.session.query(Donation.charity_id, day, count, total).filter(
+                complete, Donation.recurring.is_(True), Donation.timestamp.isnot(None)).group_by(
+                Donation.charity_id, day):
+            rows.append((CHARITY_RECURRING_DAY, f'{charity_id}:{donation_day}', c, t))
+        for charity_id, user_id, c, t in db.session.query(Donation.charity_id, Donation.user_id, count, total).filter(
+                complete).group_by(Donation.charity_id, Donation.user_id):
+            rows.append((CHARITY_DONOR, f'{charity_id}:{user_id}', c, t))
+
+        now = datetime.utcnow()
+        try:
+            DonationStat.query.delete()
+            db.session.bulk_insert_mappings(DonationStat, [
+                {'scope': s, 'scope_key': k, 'donation_count': c,
+                 'total_amount': Decimal(str(t)), 'updated_at': now}
+                for s, k, c, t in rows
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logger.info(f"Rebuilt {len(rows)} donation stat rows")
+        return len(rows)
+
+    @staticmethod
+    def get(scope, key=''):
+        """Return ``(donation_count, total_amount)`` for one rollup row"""
+        row = db.session.query(DonationStat.donation_count, DonationStat.total_amount).filter_by(
+            scope=scope, scope_key=key).first()
+        return (row[0], row[1]) if row else (0, Decimal('0'))
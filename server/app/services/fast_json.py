@@ -0,0 +1,49 @@
+"""
+JSON encoding for responses.
+
+Uses orjson when it is installed (several times faster than the stdlib
+encoder on large lists) and the stdlib ``json`` module otherwise. Both
+encode values the stdlib cannot, such as Decimal, with ``str``. Responses
+from flask-restx resources and from ``jsonify`` go through ``dumps``; set
+JSON_FAST=false to keep the stdlib encoders.
+"""
+from flask import make_response
+from flask.json.provider import DefaultJSONProvider
+import json
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(obj, sort_keys=False):
+    """Encode ``obj`` as compact JSON text"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=str, option=option).decode()
+    return json.dumps(obj, default=str, separators=(',', ':'), sort_keys=sort_keys)
+
+
+def output_json(data, code, headers=None):
+    """flask-restx representation for application/json"""
+    response = make_response(dumps(data) + '\n', code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """``jsonify`` through ``dumps``, except for pretty-printed debug output"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent') is not None or orjson is None:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys))
+
+
+def init_app(app, api):
+    app.config.setdefault('JSON_FAST', True)
+    if app.config['JSON_FAST']:
+        app.json = FastJSONProvider(app)
+        api.representation('application/json')(output_json)
@@ -0,0 +1,73 @@
+"""
+Failed-login throttle.
+Counts failed logins per email and per client IP in worker memory and rejects
+further attempts once either exceeds its limit, before the password hash is
+checked, so a brute-force burst costs a dictionary lookup instead of a hash.
+Counters are per gunicorn worker and reset when the window from the first
+failure has passed or, for the email, on a successful login.
+"""
+from flask import current_app
+from app.services.cache import TTLCache
+import math
+import threading
+import time
+
+
+class LoginThrottle:
+    """Fixed-window failure counters keyed by ``email:...`` and ``ip:...``"""
+
+    def __init__(self, window, max_keys):
+        self.window = window
+        self._failures = TTLCache(maxsize=max_keys, ttl=window)
+        self._lock = threading.Lock()
+
+    def retry_after(self, limits):
+        """Seconds until every key in ``limits`` ({key: limit}) is under its limit"""
+        now = time.monotonic()
+        wait = 0
+        for key, limit in limits.items():
+            count, started = self._failures.get(key, (0, now))
+            if count >= limit:
+                wait = max(wait, started + self.window - now)
+        return math.ceil(wait) if wait > 0 else 0
+
+    def failed(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                count, started = self._failures.get(key, (0, now))
+                self._failures.set(key, (count + 1, started), ttl=max(started + self.window - now, 0.001))
+
+    def reset(self, key):
+        self._failures.pop(key)
+
+    def clear(self):
+        self._failures.clear()
+
+
+def init_app(app):
+    app.config.setdefault('LOGIN_MAX_FAILURES_PER_EMAIL', 5)
+    app.config.setdefault('LOGIN_MAX_FAILURES_PER_IP', 50)
+    app.config.setdefault('LOGIN_FAILURE_WINDOW', 300)
+    app.extensions['login_throttle'] = LoginThrottle(app.config['LOGIN_FAILURE_WINDOW'], max_keys=10000)
+
+
+def _keys(email, ip):
+    return f'email:{email.strip().lower()}', f'ip:{ip}'
+
+
+def retry_after(email, ip):
+    """Seconds the caller must wait before trying to log in, or 0"""
+    email_key, ip_key = _keys(email, ip)
+    return current_app.extensions['login_throttle'].retry_after({
+        email_key: current_app.config['LOGIN_MAX_FAILURES_PER_EMAIL'],
+        ip_key: current_app.config['LOGIN_MAX_FAILURES_PER_IP'],
+    })
+
+
+def record_failure(email, ip):
+    current_app.extensions['login_throttle'].failed(_keys(email, ip))
+
+
+def record_success(email, ip):
+    current_app.extensions['login_throttle'].reset(_keys(email, ip)[0])
@@ -1,9 +1,113 @@
-import requests
 import base64
+import threading
+import time
 from datetime import datetime
 from flask import current_app
 import json
 
+SANDBOX_BASE_URL = "https://sandbox.safaricom.co.ke"
+
+# Refresh tokens this many seconds before Daraja says they expire
+TOKEN_REFRESH_MARGIN = 300
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Process-wide keep-alive session shared by every MpesaService instance"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Imported on first use: requests is not needed to serve most requests
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                config = current_app.config
+                # Connection errors are retried for any method since the request never
+                # reached Daraja; read/status retries are limited to idempotent GETs so
+                # an STK push is never sent twice
+                retries = Retry(
+                    total=config.get('MPESA_MAX_RETRIES', 2),
+                    connect=config.get('MPESA_MAX_RETRIES', 2),
+                    read=1,
+                    status=1,
+                    backoff_factor=0.3,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET'])
+                )
+                pool_size = config.get('MPESA_POOL_SIZE', 4)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def reset_http_session():
+    """Drop the shared session (used by tests and after fork)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+class TokenCache:
+    """Caches OAuth tokens per credential set with single-flight refresh"""
+
+    def __init__(self, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """Return a valid token for ``key``, calling ``fetch()`` at most once concurrently.
+
+        ``fetch`` returns ``(token, expires_in)`` or ``(None, None)`` on failure.
+        """
+        token, refresh_at, expires_at = self._tokens.get(key, (None, 0, 0))
+        now = time.monotonic()
+        if token and now < refresh_at:
+            return token
+
+        with self._lock:
+            token, refresh_at, expires_at = self._tokens.get(key, (None, 0, 0))
+            now = time.monotonic()
+            if token and now < refresh_at:
+                return token
+
+            new_token, expires_in = fetch()
+            if new_token:
+                now = time.monotonic()
+                expires_in = int(expires_in or 3599)
+                self._tokens[key] = (
+                    new_token,
+                    now + max(expires_in - self.refresh_margin, expires_in // 2),
+                    now + expires_in
+                )
+                return new_token
+
+            # Keep serving the old token while it is still valid if the refresh failed
+            if token and now < expires_at:
+                return token
+            return None
+
+    def invalidate(self, key):
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+token_cache = TokenCache()
+
+
 class MpesaService:
     def __init__(self):
         self.consumer_key = current_app.config.get('MPESA_CONSUMER_KEY')
@@ -11,27 +115,41 @@ class MpesaService:
         self.business_short_code = current_app.config.get('MPESA_BUSINESS_SHORT_CODE')
         self.passkey = current_app.config.get('MPESA_PASSKEY')
         self.callback_url = current_app.config.get('MPESA_CALLBACK_URL')
-        
-        # Sandbox URLs (change to production URLs when ready)
-        self.auth_url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
-        self.stk_push_url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
+        self.timeout = (
+            current_app.config.get('MPESA_CONNECT_TIMEOUT', 3.05),
+            current_app.config.get('MPESA_READ_TIMEOUT', 10)
+        )
 
-    def get_access_token(self):
-        """Get OAuth access token from Mpesa"""
+        # Sandbox by default; set MPESA_BASE_URL for production or a local mock
+        base_url = (current_app.config.get('MPESA_BASE_URL') or SANDBOX_BASE_URL).rstrip('/')
+        self.auth_url = f"{base_url}/oauth/v1/generate?grant_type=client_credentials"
+        self.stk_push_url = f"{base_url}/mpesa/stkpush/v1/processrequest"
+        self.session = get_http_session()
+
+    @property
+    def _token_key(self):
+        return (self.auth_url, self.consumer_key)
+
+    def _fetch_access_token(self):
         try:
             credentials = base64.b64encode(f"{self.consumer_key}:{self.consumer_secret}".encode()).decode()
             headers = {
                 'Authorization': f'Basic {credentials}',
                 'Content-Type': 'application/json'
             }
-            
-            response = requests.get(self.auth_url, headers=headers)
+
+            response = self.session.get(self.auth_url, headers=headers, timeout=self.timeout)
             response.raise_for_status()
-            
-            return response.json().get('access_token')
+
+            body = response.json()
+            return body.get('access_token'), body.get('expires_in')
         except Exception as e:
             current_app.logger.error(f"Failed to get Mpesa access token: {str(e)}")
-            return None
+            return None, None
+
+    def get_access_token(self):
+        """Get OAuth access token from Mpesa (cached until shortly before expiry)"""
+        return token_cache.get(self._token_key, self._fetch_access_token)
 
     def generate_password(self):
         """Generate password for STK push"""
@@ -47,12 +165,12 @@ class MpesaService:
             return {'success': False, 'message': 'Failed to get access token'}
 
         password, timestamp = self.generate_password()
-        
+
         headers = {
             'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json'
         }
-        
+
         payload = {
             "BusinessShortCode": self.business_short_code,
             "Password": password,
@@ -66,11 +184,14 @@ class MpesaService:
             "AccountReference": account_reference,
             "TransactionDesc": transaction_desc
         }
-        
+
         try:
-            response = requests.post(self.stk_push_url, json=payload, headers=headers)
+            response = self.session.post(self.stk_push_url, json=payload, headers=headers, timeout=self.timeout)
+            if response.status_code == 401:
+                # Token revoked before its advertised expiry; fetch a fresh one next time
+                token_cache.invalidate(self._token_key)
             response.raise_for_status()
-            
+
             result = response.json()
             if result.get('ResponseCode') == '0':
                 return {
@@ -84,7 +205,7 @@ class MpesaService:
                     'success': False,
                     'message': result.get('ResponseDescription', 'STK push failed')
                 }
-                
+
         except Exception as e:
             current_app.logger.error(f"STK push failed: {str(e)}")
             return {'success': False, 'message': 'Payment initiation failed'}
@@ -97,4 +218,4 @@ class MpesaService:
             'success': True,
             'transaction_status': 'completed',
             'transaction_id': f'MPX{checkout_request_id}'
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,164 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Rows are ordered newest first on a unique key such as ``(created_at, id)``. The
+``after`` cursor is an opaque token holding the key of the last row of the
+previous page, so every page is a single indexed range scan regardless of depth.
+Passing ``format=ndjson`` streams the whole result set instead, one JSON
+document per line, reading rows from a server-side cursor in chunks.
+
+Callers pass the query with explicit loader options: ``joinedload`` for the
+relationships their serializer reads, ``raiseload('*')`` when it reads none,
+so a relationship access added later fails loudly instead of issuing one
+SELECT per row. Passing a ``Serializer`` (e.g. ``Story.serializer``) as
+``serialize`` instead selects only its columns and serializes the row tuples
+without building ORM objects.
+
+Passing a ``delta_sync.Sync`` as ``sync`` adds ``Last-Modified`` and
+``If-Modified-Since`` handling and ``?since=`` deltas (see delta_sync).
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+from flask import request, current_app, Response, stream_with_context
+from flask_restx import abort
+from sqlalchemy import tuple_
+from app.services import delta_sync, fast_json
+from app.services.serializers import Serializer
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+STREAM_CHUNK_SIZE = 500
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+def encode_cursor(values):
+    """Encode the key values of a row into an opaque cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    """Decode a cursor produced by ``encode_cursor`` for the given key columns"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('cursor does not match ordering')
+        return [
+            datetime.fromisoformat(v) if getattr(k.type, 'python_type', None) is datetime and v else v
+            for k, v in zip(keys, values)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        abort(400, message='Invalid pagination cursor')
+
+
+def page_limit():
+    """Page size requested by the client, clamped to the server maximum"""
+    default = current_app.config.get('PAGINATION_DEFAULT_LIMIT', DEFAULT_LIMIT)
+    maximum = current_app.config.get('PAGINATION_MAX_LIMIT', MAX_LIMIT)
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        abort(400, message='limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def _keyset(query, keys):
+    query = query.order_by(*[k.desc() for k in keys])
+    after = request.args.get('after')
+    if after:
+        values = decode_cursor(after, keys)
+        query = query.filter(tuple_(*keys) < tuple_(*values))
+    return query
+
+
+def _serialization(query, serialize):
+    if isinstance(serialize, Serializer):
+        return serialize.select(query), serialize.from_row
+    return query, serialize or (lambda obj: obj.to_dict())
+
+
+def paginate(query, keys, serialize=None):
+    """Return one page of ``query`` ordered by ``keys`` (newest first)"""
+    query, serialize = _serialization(query, serialize)
+    limit = page_limit()
+    rows = _keyset(query, keys).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, k.key) for k in keys])
+    return Page([serialize(row) for row in rows], next_cursor)
+
+
+def stream_ndjson(query, keys, serialize=None):
+    """Stream every row of ``query`` as newline-delimited JSON"""
+    query, serialize = _serialization(query, serialize)
+    query = _keyset(query, keys).execution_options(stream_results=True)
+    chunk_size = current_app.config.get('PAGINATION_STREAM_CHUNK_SIZE', STREAM_CHUNK_SIZE)
+
+    def generate():
+        for row in query.yield_per(chunk_size):
+            yield fast_json.dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def wants_stream():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+
+def delta_response(query, sync, serialize=None, collection=None, message=None, headers=None):
+    """Rows changed since the client's ``since`` token, in update order"""
+    now = datetime.utcnow()
+    since = delta_sync.since_window(decode_cursor(request.args['since'], (sync.model.updated_at,))[0])
+    query, serialize = _serialization(query, serialize)
+    changed, deleted = sync.changes(query, since)
+    token = encode_cursor([now])
+    return {
+        'success': True,
+        collection or 'items': [serialize(row) for row in changed],
+        'deleted': deleted,
+        'since': token,
+        'message': message
+    }, 200, dict(headers or {}, **{'X-Since': token})
+
+
+def paginated_response(query, keys, serialize=None, collection=None, message=None, sync=None):
+    """Build the response for a list endpoint.
+
+    With ``collection`` the page is wrapped in the usual success envelope,
+    otherwise the items are returned as a bare list. The next cursor is always
+    exposed in the ``X-Next-Cursor`` header. With ``sync`` the response
+    carries ``Last-Modified`` and a ``since`` token for delta polling.
+    """
+    headers = {}
+    if sync is not None:
+        last_modified = sync.last_modified()
+        if delta_sync.not_modified_since(last_modified):
+            return delta_sync.not_modified_response(last_modified)
+        headers.update(delta_sync.last_modified_header(last_modified))
+        if request.args.get('since'):
+            return delta_response(query, sync, serialize, collection, message, headers)
+        # Taken before the page is read so a delta from it cannot miss a write
+        headers['X-Since'] = encode_cursor([datetime.utcnow()])
+
+    if wants_stream():
+        return stream_ndjson(query, keys, serialize)
+
+    page = paginate(query, keys, serialize)
+    if page.next_cursor:
+        headers['X-Next-Cursor'] = page.next_cursor
+    if collection is None:
+        return page.items, 200, headers
+    return {
+        'success': True,
+        collection: page.items,
+        'next_cursor': page.next_cursor,
+        'message': message
+    }, 200, headers
@@ -0,0 +1,85 @@
+"""
+Password hashing with configurable parameters.
+
+PASSWORD_HASH_METHOD takes any werkzeug method string (``pbkdf2:sha256:600000``,
+``scrypt:32768:8:1``, ...). Hashes made with other parameters keep verifying;
+after a successful login they are re-hashed with the current ones in the
+background, so tuning the cost never locks anyone out or slows the login
+that triggers it.
+"""
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.database import db
+from app.services.background import job, submit
+from functools import lru_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+REHASH_JOB = 'auth.rehash_password'
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_SALT_LENGTH = 16
+
+# werkzeug's defaults for parameters left out of a method string
+_PBKDF2_DEFAULTS = ('sha256', '600000')
+_SCRYPT_DEFAULTS = (str(2 ** 15), '8', '1')
+
+
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    app.config.setdefault('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH)
+
+
+def _settings():
+    if has_app_context():
+        config = current_app.config
+        return (config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+                config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH))
+    return DEFAULT_METHOD, DEFAULT_SALT_LENGTH
+
+
+@lru_cache(maxsize=16)
+def canonical_method(method):
+    """The method string werkzeug stores in the hash, with defaults filled in"""
+    name, *params = method.split(':')
+    defaults = {'pbkdf2': _PBKDF2_DEFAULTS, 'scrypt': _SCRYPT_DEFAULTS}.get(name)
+    if defaults is None:
+        return method
+    return ':'.join([name, *params, *defaults[len(params):]])
+
+
+def hash_password(password):
+    method, salt_length = _settings()
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def verify_password(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True if ``pwhash`` was made with parameters other than the configured ones"""
+    method, salt_length = _settings()
+    stored_method, _, rest = pwhash.partition('$')
+    salt = rest.partition('$')[0]
+    return stored_method != canonical_method(method) or len(salt) != salt_length
+
+
+def rehash_later(user, password):
+    """Queue a re-hash of ``user``'s verified ``password`` if its parameters are stale"""
+    if needs_rehash(user.password_hash):
+        # The plaintext must never reach the Celery broker
+        submit(REHASH_JOB, user.id, user.password_hash, password, local=True)
+
+
+@job(REHASH_JOB)
+def rehash(user_id, old_hash, password):
+    """Replace ``old_hash`` unless the password changed in the meantime"""
+    from app.models.user import User
+    updated = User.query.filter_by(id=user_id, password_hash=old_hash).update(
+        {User.password_hash: hash_password(password)}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        logger.info(f"Re-hashed password for user {user_id} with {_settings()[0]}")
+    return bool(updated)
@@ -0,0 +1,117 @@
+"""
+Idempotent ingestion of M-Pesa STK push callbacks.
+
+Safaricom retries callbacks and may deliver them out of order, so every
+delivery is applied with conditional UPDATEs keyed on the CheckoutRequestID
+(see Donation.transition for the donation side):
+only the first terminal result for a pending payment changes anything, and
+later deliveries are acknowledged as duplicates without touching the rows.
+Deliveries without a CheckoutRequestID or a numeric ResultCode are rejected
+as malformed and change nothing.
+Work that does not need to finish before Safaricom gets its acknowledgement
+is handed to settlement listeners, which run after the response is sent.
+"""
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services.donation_stats_service import DonationStatsService
+from sqlalchemy import select
+from collections import namedtuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROCESSED = 'processed'
+FAILED = 'failed'
+DUPLICATE = 'duplicate'
+NOT_FOUND = 'not_found'
+MALFORMED = 'malformed'
+
+Callback = namedtuple('Callback', ['checkout_request_id', 'result_code', 'result_desc', 'receipt_number'])
+IngestResult = namedtuple('IngestResult', ['outcome', 'callback', 'donation_id'])
+
+_settlement_listeners = []
+
+
+def on_settled(listener):
+    """Register ``listener(result)`` to run after a callback settles a payment"""
+    _settlement_listeners.append(listener)
+    return listener
+
+
+class PaymentCallbackService:
+    """Applies M-Pesa callbacks to payments and donations"""
+
+    @staticmethod
+    def parse(payload):
+        """Extract the fields we need from a raw Daraja callback body"""
+        stk_callback = (payload or {}).get('Body', {}).get('stkCallback', {})
+        receipt_number = None
+        for item in stk_callback.get('CallbackMetadata', {}).get('Item', []):
+            if item.get('Name') == 'MpesaReceiptNumber':
+                receipt_number = item.get('Value')
+                break
+        try:
+            result_code = int(stk_callback.get('ResultCode'))
+        except (TypeError, ValueError):
+            result_code = None
+        return Callback(
+            stk_callback.get('CheckoutRequestID'),
+            result_code,
+            stk_callback.get('ResultDesc'),
+            receipt_number
+        )
+
+    @staticmethod
+    def ingest(payload):
+        """Apply one callback delivery and commit; safe to call any number of times"""
+        callback = PaymentCallbackService.parse(payload)
+        if callback.checkout_request_id is None or callback.result_code is None:
+            logger.warning(f"Rejected malformed M-Pesa callback for {callback.checkout_request_id}")
+            return IngestResult(MALFORMED, callback, None)
+        success = callback.result_code == 0
+        payments = Payment.__table__
+
+        try:
+            claimed = db.session.execute(
+                payments.update()
+                .where(payments.c.transaction_id == callback.checkout_request_id,
+                       payments.c.status == 'pending')
+                .values(status='success' if success else 'failed',
+                        receipt_number=callback.receipt_number)
+            ).rowcount
+
+            if not claimed:
+                db.session.rollback()
+                exists = db.session.query(Payment.id).filter_by(
+                    transaction_id=callback.checkout_request_id).first()
+                return IngestResult(DUPLICATE if exists else NOT_FOUND, callback, None)
+
+            donation_id = db.session.execute(
+                select(payments.c.donation_id).where(
+                    payments.c.transaction_id == callback.checkout_request_id)
+            ).scalar()
+            moved = Donation.transition(donation_id, 'complete' if success else 'failed')
+
+            if moved and success:
+                donation = db.session.query(
+                    Donation.charity_id, Donation.user_id, Donation.amount,
+                    Donation.recurring, Donation.timestamp
+                ).filter(Donation.id == donation_id).one()
+                DonationStatsService.record_completed(donation)
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return IngestResult(PROCESSED if success else FAILED, callback, donation_id)
+
+    @staticmethod
+    def notify(result):
+        """Run settlement listeners; errors are logged and never reach Safaricom"""
+        for listener in list(_settlement_listeners):
+            try:
+                listener(result)
+            except Exception as e:
+                logger.error(f"Payment settlement listener failed: {str(e)}")
@@ -0,0 +1,287 @@
+"""
+Payment status updates for server-sent event streams.
+
+A donation's status changes are published on its channel: ``initiated`` or
+``failed`` when the background STK push finishes, ``complete`` or ``failed``
+when the M-Pesa callback settles it. Streams subscribe to one channel and
+push each change to the client, instead of the client polling for it.
+
+With PAYMENT_EVENTS_BACKEND=redis the changes go through Redis pub/sub, so
+a callback handled by one worker (or a Celery job) reaches streams held by
+every other worker; each worker keeps a single pattern subscription and fans
+messages out to its own streams. The ``memory`` backend only reaches streams
+in the publishing process.
+
+Every stream holds a server thread, so each worker accepts at most
+PAYMENT_EVENTS_MAX_STREAMS at once (503 beyond that, and the client falls
+back to the status endpoint); the default is half of GUNICORN_THREADS, so a
+single-threaded worker serves no streams at all. Streams send a comment every
+PAYMENT_EVENTS_HEARTBEAT seconds, end after PAYMENT_EVENTS_MAX_AGE seconds
+(EventSource reconnects on its own) and end as soon as the status is final.
+
+Streams and the status endpoint are addressed by a signed reference handed
+to the donor when the payment starts, not by the CheckoutRequestID, and the
+reference expires after PAYMENT_EVENTS_REFERENCE_MAX_AGE seconds. EventSource
+cannot send an Authorization header, so the reference is the credential.
+"""
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import and_
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services import fast_json
+from app.services.payment_callback_service import on_settled
+import json
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'payment-events:'
+# EventSource reconnect delay after a stream ends without a final status
+RETRY_MS = 3000
+FINAL_STATUSES = ('complete', 'failed')
+
+
+class Subscription:
+    """Messages published on one channel after subscribing"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.messages = queue.Queue()
+
+    def get(self, timeout):
+        """Next message, or None after ``timeout`` seconds"""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    """Fan-out to the subscriptions of this process"""
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._channels.pop(subscription.channel, None)
+
+    def dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.messages.put(message)
+
+    def publish(self, channel, message):
+        self.dispatch(channel, message)
+
+
+class RedisBroker(MemoryBroker):
+    """Local fan-out fed by one Redis pattern subscription per process"""
+
+    def __init__(self, url):
+        import redis
+        super().__init__()
+        self.client = redis.from_url(url, socket_connect_timeout=0.5)
+        self._listener = None
+        self._ready = threading.Event()
+
+    def subscribe(self, channel):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name='payment-events', daemon=True)
+                    self._listener.start()
+            # Let the pattern subscription take effect before the caller reads the status
+            self._ready.wait(timeout=1)
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        try:
+            self.client.publish(CHANNEL_PREFIX + channel, json.dumps(message))
+        except Exception as e:
+            # Still reach the streams of this worker
+            logger.error(f"Redis publish failed, delivering locally only: {str(e)}")
+            self.dispatch(channel, message)
+
+    def _listen(self):
+        failures = 0
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(CHANNEL_PREFIX + '*')
+                self._ready.set()
+                failures = 0
+                for message in pubsub.listen():
+                    if message['type'] == 'pmessage':
+                        channel = message['channel'].decode()[len(CHANNEL_PREFIX):]
+                        self.dispatch(channel, json.loads(message['data']))
+            except Exception as e:
+                self._ready.clear()
+                logger.error(f"Payment events subscription lost: {str(e)}")
+                time.sleep(min(2 ** failures, 30))
+                failures += 1
+
+
+def init_app(app):
+    app.config.setdefault('PAYMENT_EVENTS_BACKEND', 'memory')
+    app.config.setdefault('PAYMENT_EVENTS_MAX_STREAMS', 8)
+    app.config.setdefault('PAYMENT_EVENTS_HEARTBEAT', 15)
+    app.config.setdefault('PAYMENT_EVENTS_MAX_AGE', 120)
+    app.config.setdefault('PAYMENT_EVENTS_REFERENCE_MAX_AGE', 900)
+    app.extensions['payment_events'] = {'broker': None, 'streams': None, 'lock': threading.Lock()}
+
+
+def _broker():
+    state = current_app.extensions['payment_events']
+    if state['broker'] is None:
+        with state['lock']:
+            if state['broker'] is None:
+                config = current_app.config
+                if config['PAYMENT_EVENTS_BACKEND'] == 'redis':
+                    state['broker'] = RedisBroker(config.get('REDIS_URL') or config['CELERY_BROKER_URL'])
+                else:
+                    state['broker'] = MemoryBroker()
+    return state['broker']
+
+
+def _stream_slots():
+    state = current_app.extensions['payment_events']
+    if state['streams'] is None:
+        with state['lock']:
+            if state['streams'] is None:
+                state['streams'] = threading.BoundedSemaphore(current_app.config['PAYMENT_EVENTS_MAX_STREAMS'])
+    return state['streams']
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='payment-events')
+
+
+def reference_for(donation_id):
+    """Signed, expiring reference for a donation's status, usable before its STK push is sent"""
+    return _serializer().dumps(donation_id)
+
+
+def resolve(reference):
+    """Donation id of a ``reference_for`` value, or None if it is forged or expired"""
+    try:
+        return int(_serializer().loads(reference, max_age=current_app.config['PAYMENT_EVENTS_REFERENCE_MAX_AGE']))
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+
+def status(donation_id):
+    """Current payment status of a donation, or None if it does not exist"""
+    row = db.session.query(
+        Donation.id, Donation.status, Donation.amount, Donation.charity_id,
+        Payment.transaction_id, Payment.receipt_number
+    ).outerjoin(Payment, and_(Payment.donation_id == Donation.id, Payment.method == 'mpesa')).filter(
+        Donation.id == donation_id
+    ).order_by(Payment.id.desc()).first()
+    if row is None:
+        return None
+    return {
+        'donation_id': row.id,
+        'status': row.status,
+        'amount': str(row.amount),
+        'charity_id': row.charity_id,
+        'checkout_request_id': row.transaction_id,
+        'receipt_number': row.receipt_number,
+    }
+
+
+def publish(donation_id):
+    """Push the donation's current status to its subscribers; errors are logged"""
+    try:
+        current = status(donation_id)
+        if current is not None:
+            _broker().publish(str(donation_id), current)
+    except Exception as e:
+        logger.error(f"Publishing payment status for donation {donation_id} failed: {str(e)}")
+
+
+@on_settled
+def _publish_settlement(result):
+    publish(result.donation_id)
+
+
+def _event(data):
+    return f"event: status\ndata: {fast_json.dumps(data)}\n\n"
+
+
+def open_stream(donation_id):
+    """Subscribe to a donation's channel and return an SSE body generator.
+
+    Returns None when this worker already holds PAYMENT_EVENTS_MAX_STREAMS
+    streams. The subscription is taken before the current status is read,
+    so a change committed in between is still delivered. The generator
+    releases its slot when closed, even if it never started.
+    """
+    slots = _stream_slots()
+    if current_app.config['PAYMENT_EVENTS_MAX_STREAMS'] <= 0 or not slots.acquire(blocking=False):
+        return None
+    subscription = _broker().subscribe(str(donation_id))
+    try:
+        current = status(donation_id)
+    except Exception:
+        subscription.close()
+        slots.release()
+        raise
+    # The stream must not hold a pooled connection while it waits
+    db.session.remove()
+    return _Stream(subscription, current, slots, current_app.config)
+
+
+class _Stream:
+    """Iterable SSE body; ``close`` is called by the WSGI server when the client goes away"""
+
+    def __init__(self, subscription, current, slots, config):
+        self.subscription = subscription
+        self.current = current
+        self.slots = slots
+        self.heartbeat = config['PAYMENT_EVENTS_HEARTBEAT']
+        self.max_age = config['PAYMENT_EVENTS_MAX_AGE']
+        self.closed = False
+
+    def __iter__(self):
+        yield f"retry: {RETRY_MS}\n" + _event(self.current)
+        if self.current['status'] in FINAL_STATUSES:
+            return
+        deadline = time.monotonic() + self.max_age
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = self.subscription.get(timeout=min(self.heartbeat, remaining))
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+            yield _event(message)
+            if message['status'] in FINAL_STATUSES:
+                return
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.subscription.close()
+            self.slots.release()
@@ -0,0 +1,112 @@
+"""
+Connection pool instrumentation.
+
+The engine's pool class is swapped for an instrumented subclass that times
+every checkout (waiting for a free connection, opening a new one and the
+pre-ping) and counts checkouts served from overflow and checkouts that timed
+out. ``render()`` adds these and the pool's current occupancy to
+``/api/v1/health/metrics``: a rising checkout time or overflow count means
+the pool is smaller than the worker's concurrency, timeouts mean requests
+failed for want of a connection.
+"""
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool, QueuePool
+import threading
+import time
+
+# Upper bounds (seconds) of the checkout time histogram
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class PoolStats:
+    """Checkout totals for this process"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(CHECKOUT_BUCKETS)
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed, overflow):
+        with self._lock:
+            self.checkouts += 1
+            self.overflow_checkouts += overflow
+            self.seconds += elapsed
+            for i, bound in enumerate(CHECKOUT_BUCKETS):
+                if elapsed <= bound:
+                    self.buckets[i] += 1
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def reset(self):
+        self.__init__()
+
+
+stats = PoolStats()
+
+
+class _InstrumentedPool:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeout:
+            stats.timed_out()
+            raise
+        stats.observe(time.perf_counter() - started, isinstance(self, QueuePool) and self.checkedout() > self.size())
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    pass
+
+
+def init_app(app):
+    """Instrument the pool of the engine ``app`` is about to create"""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    poolclass = options.get('poolclass')
+    if poolclass is NullPool:
+        options['poolclass'] = InstrumentedNullPool
+    elif poolclass is None and 'pool_size' in options:
+        # Explicit sizing means a QueuePool (SQLite picks its own pool class)
+        options['poolclass'] = InstrumentedQueuePool
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def render(engine):
+    """Prometheus lines for ``engine``'s pool and this process's checkouts"""
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        family('db_pool_size', 'gauge', 'Connections the pool keeps open.')
+        lines.append(f'db_pool_size {pool.size()}')
+        family('db_pool_checked_out', 'gauge', 'Connections currently checked out.')
+        lines.append(f'db_pool_checked_out {pool.checkedout()}')
+        family('db_pool_overflow', 'gauge', 'Connections currently open beyond the pool size.')
+        lines.append(f'db_pool_overflow {max(0, pool.overflow())}')
+
+    with stats._lock:
+        family('db_pool_checkout_seconds', 'histogram', 'Time to obtain a connection from the pool.')
+        for bound, bucket in zip(CHECKOUT_BUCKETS, stats.buckets):
+            lines.append(f'db_pool_checkout_seconds_bucket{{le="{bound}"}} {bucket}')
+        lines.append(f'db_pool_checkout_seconds_bucket{{le="+Inf"}} {stats.checkouts}')
+        lines.append(f'db_pool_checkout_seconds_sum {stats.seconds:.6f}')
+        lines.append(f'db_pool_checkout_seconds_count {stats.checkouts}')
+        family('db_pool_overflow_checkouts_total', 'counter', 'Checkouts served by an overflow connection.')
+        lines.append(f'db_pool_overflow_checkouts_total {stats.overflow_checkouts}')
+        family('db_pool_timeouts_total', 'counter', 'Checkouts that gave up after pool_timeout.')
+        lines.append(f'db_pool_timeouts_total {stats.timeouts}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,177 @@
+"""
+Token-bucket rate limits per client IP and per JWT identity.
+
+A limit such as ``"10/minute"`` is a bucket holding up to 10 tokens that
+refills at 10 per minute; every request takes one token from the bucket of
+its IP and, when it carries a valid JWT, from the bucket of its identity,
+and is answered 429 with Retry-After when either is empty. Rejection happens
+before the endpoint does any work, so an abusive client costs a dictionary
+lookup per request instead of a database round trip or a password hash.
+
+Every API request is checked against RATE_LIMIT_DEFAULT; endpoints that are
+expensive or attractive to abuse add a stricter rule with ``@limited('login')``,
+configured as RATE_LIMIT_LOGIN. With RATE_LIMIT_STORAGE=redis the buckets
+are shared by all workers; if Redis fails the worker falls back to its own
+in-memory buckets rather than letting requests through unchecked.
+"""
+from functools import lru_cache, wraps
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from app.services.cache import TTLCache
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Paths the default limit leaves alone (load balancer probes, not the other health endpoints)
+EXEMPT_PREFIXES = ('/health', '/api/v1/health/live', '/api/v1/health/ready')
+
+
+@lru_cache(maxsize=64)
+def parse(limit):
+    """``"10/minute"`` -> (refill rate per second, bucket size)"""
+    count, _, period = limit.partition('/')
+    count = int(count)
+    if count <= 0 or period not in PERIODS:
+        raise ValueError(f'Invalid rate limit {limit!r}, expected e.g. "10/minute"')
+    return count / PERIODS[period], count
+
+
+class MemoryStore:
+    """Buckets in worker memory; idle buckets are full and simply expire"""
+
+    def __init__(self, max_keys=10000):
+        self._buckets = TTLCache(maxsize=max_keys)
+        self._lock = threading.Lock()
+
+    def take(self, keys, rate, burst):
+        """Take one token from every bucket in ``keys``, or none; returns seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key in keys:
+                tokens, updated = self._buckets.get(key, (burst, now))
+                levels.append(min(burst, tokens + (now - updated) * rate))
+            wait = max((1 - tokens) / rate for tokens in levels) if levels else 0
+            if wait > 0:
+                return wait
+            for key, tokens in zip(keys, levels):
+                self._buckets.set(key, (tokens - 1, now), ttl=burst / rate)
+            return 0
+
+
+# Same algorithm as MemoryStore.take, atomic across workers and on the Redis clock
+_TAKE_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels, wait = {}, 0
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    levels[i] = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    wait = math.max(wait, (1 - levels[i]) / rate)
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'updated', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return '0'
+"""
+
+
+class RedisStore:
+    """Buckets shared by all workers, with a per-worker fallback"""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+        client = redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._take = client.register_script(_TAKE_SCRIPT)
+        self.prefix = prefix
+        self.fallback = MemoryStore()
+
+    def take(self, keys, rate, burst):
+        try:
+            return float(self._take(keys=[self.prefix + key for key in keys], args=[rate, burst]))
+        except Exception as e:
+            logger.error(f"Rate limit store failed, using worker memory: {str(e)}")
+            return self.fallback.take(keys, rate, burst)
+
+
+def init_app(app):
+    app.config.setdefault('RATE_LIMIT_ENABLED', True)
+    app.config.setdefault('RATE_LIMIT_STORAGE', 'memory')
+    app.config.setdefault('RATE_LIMIT_DEFAULT', '300/minute')
+    app.config.setdefault('RATE_LIMIT_LOGIN', '10/minute')
+    app.config.setdefault('RATE_LIMIT_PAYMENTS', '5/minute')
+    app.config.setdefault('RATE_LIMIT_DONATIONS', '10/minute')
+    app.extensions['rate_limit'] = {'store': None, 'lock': threading.Lock()}
+    app.before_request(_default_limit)
+
+
+def _store():
+    state = current_app.extensions['rate_limit']
+    if state['store'] is None:
+        with state['lock']:
+            if state['store'] is None:
+                config = current_app.config
+                if config['RATE_LIMIT_STORAGE'] == 'redis':
+                    state['store'] = RedisStore(config.get('REDIS_URL') or config['CELERY_BROKER_URL'])
+                else:
+                    state['store'] = MemoryStore()
+    return state['store']
+
+
+def _identity():
+    """JWT identity of the request, or None when it carries no valid token"""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        # Invalid tokens are rejected by the endpoint itself; limit them by IP only
+        return None
+
+
+def check(rule):
+    """Seconds until the request may be retried under RATE_LIMIT_<RULE>, or 0"""
+    if not current_app.config['RATE_LIMIT_ENABLED']:
+        return 0
+    rate, burst = parse(current_app.config[f'RATE_LIMIT_{rule.upper()}'])
+    keys = [f'{rule}:ip:{request.remote_addr}']
+    identity = _identity()
+    if identity is not None:
+        keys.append(f'{rule}:user:{identity}')
+    return _store().take(keys, rate, burst)
+
+
+def _too_many(wait):
+    return ({'success': False, 'error': 'Too many requests, try again later'},
+            429, {'Retry-After': str(max(1, math.ceil(wait)))})
+
+
+def _default_limit():
+    if request.path.startswith(EXEMPT_PREFIXES):
+        return None
+    wait = check('default')
+    return _too_many(wait) if wait else None
+
+
+def limited(rule):
+    """Apply RATE_LIMIT_<RULE> to a Resource method on top of the default limit"""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            wait = check(rule)
+            if wait:
+                return _too_many(wait)
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
@@ -0,0 +1,138 @@
+"""
+One-shot release tasks: schema migrations and seeding.
+
+These used to run in ``wsgi.py`` at import time, so every gunicorn worker
+(and every ``--max-requests`` recycle) paid for ``create_all()``, an admin
+lookup and a password hash before serving. They now run once per deploy via
+``flask release``, and workers start without touching the database.
+
+The whole release runs under a lock so several instances starting at once
+cannot race each other: a Postgres transaction-level advisory lock, or on other
+databases (SQLite in development) an exclusive lock on a file next to the
+database.
+"""
+from flask import current_app
+from app.services.database import db
+from app.models.user import User
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from collections import namedtuple
+from contextlib import contextmanager
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+ReleaseResult = namedtuple('ReleaseResult', ['from_revision', 'to_revision', 'admin_created', 'lock_wait', 'seconds'])
+
+# The schema the old import-time create_all() built
+BASELINE_REVISION = 'da75f54f7701'
+
+# Advisory lock keys are a single bigint shared by the whole database
+RELEASE_LOCK = 'tuinue:release'
+
+
+class LockTimeout(Exception):
+    """Another release held the lock for longer than the timeout"""
+
+
+def _lock_key(name):
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], 'big', signed=True)
+
+
+@contextmanager
+def advisory_lock(name, timeout):
+    """Hold a database-wide lock called ``name``, waiting at most ``timeout`` seconds"""
+    if db.engine.dialect.name == 'postgresql':
+        # A transaction-scoped lock on its own connection: migrations run on
+        # others meanwhile, and it stays valid behind PgBouncer in transaction
+        # pooling mode, where session-level locks are not
+        with db.engine.connect() as conn, conn.begin():
+            conn.execute(text("SELECT set_config('lock_timeout', :ms, true)"), {'ms': f'{int(timeout * 1000)}ms'})
+            try:
+                conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _lock_key(name)})
+            except OperationalError as e:
+                raise LockTimeout(f'{name} is held by another process') from e
+            yield
+        return
+
+    import fcntl
+    database = db.engine.url.database
+    if database and database != ':memory:':
+        path = f'{os.path.abspath(database)}.{name.replace(":", "-")}.lock'
+    else:
+        path = os.path.join(tempfile.gettempdir(), f'{name.replace(":", "-")}.lock')
+    with open(path, 'w') as handle:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f'{name} is held by another process')
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class ReleaseService:
+    """Migrations and seeding run once per deploy by ``flask release``"""
+
+    @staticmethod
+    def current_revision():
+        from alembic.runtime.migration import MigrationContext
+        with db.engine.connect() as conn:
+            return MigrationContext.configure(conn).get_current_revision()
+
+    @staticmethod
+    def migrate():
+        """Bring the schema to the latest migration"""
+        from flask_migrate import Migrate, stamp, upgrade
+        if 'migrate' not in current_app.extensions:
+            # FAST_START apps leave Flask-Migrate to the CLI
+            Migrate(current_app, db)
+
+        tables = set(inspect(db.engine).get_table_names())
+        if 'users' in tables and 'alembic_version' not in tables:
+            # Created by the old import-time create_all(), never migrated: that
+            # schema is the baseline revision, and the migrations after it add
+            # the columns create_all() would not add to existing tables
+            logger.info(f"Schema predates migrations; adopting {BASELINE_REVISION} before upgrading")
+            stamp(revision=BASELINE_REVISION)
+        upgrade()
+
+    @staticmethod
+    def seed_admin():
+        """Create the default admin user if it does not exist; True if created"""
+        admin_email = os.getenv('ADMIN_EMAIL', 'admin@tuinuewasichana.com')
+        if User.query.filter_by(email=admin_email).first():
+            logger.info("Admin user already exists")
+            return False
+
+        logger.info(f"Creating default admin user: {admin_email}")
+        admin_user = User(name='System Administrator', email=admin_email, role='admin')
+        admin_user.set_password(os.getenv('ADMIN_PASSWORD', 'admin123'))
+        db.session.add(admin_user)
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def release(seed=True, timeout=None):
+        """Run migrations and seeding under the release lock"""
+        if timeout is None:
+            timeout = current_app.config['RELEASE_LOCK_TIMEOUT']
+        started = time.perf_counter()
+        with advisory_lock(RELEASE_LOCK, timeout):
+            locked = time.perf_counter()
+            from_revision = ReleaseService.current_revision()
+            ReleaseService.migrate()
+            to_revision = ReleaseService.current_revision()
+            admin_created = ReleaseService.seed_admin() if seed else False
+        return ReleaseResult(from_revision, to_revision, admin_created,
+                             locked - started, time.perf_counter() - started)
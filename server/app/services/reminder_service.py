@@ -2,15 +2,24 @@
 Simplified reminder service for free plan deployment
 Since Celery/Redis isn't available on free plan, we'll use database-based scheduling
 """
+from flask import current_app
 from app.services.database import db
 from app.models.reminder import Reminder
 from app.models.user import User
 from app.models.charity import Charity
+from sqlalchemy import and_, func, select
+from collections import namedtuple
 from datetime import datetime, timedelta
+import gzip
+import json
 import logging
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+PurgeResult = namedtuple('PurgeResult', ['deleted', 'seconds', 'rows_per_second'])
+
 class ReminderService:
     """Database-based reminder service for free plan"""
     
@@ -56,83 +65,205 @@ class ReminderService:
             return []
     
     @staticmethod
-    def process_due_reminders():
-        """Process all due reminders (called manually or via cron)"""
+    def claim_batch(now, batch_size):
+        """Claim up to ``batch_size`` due reminders for this worker.
+
+        The claimed rows are re-tagged with a status unique to this claim in a
+        single UPDATE; on PostgreSQL the candidate rows are also locked with
+        SKIP LOCKED so concurrent workers pick disjoint batches instead of
+        queueing behind each other. Returns the claim status to select by; the
+        claim is only visible to others once the caller commits.
+        """
+        claim = f"claimed:{uuid.uuid4().hex[:12]}"
+        candidates = db.session.query(Reminder.id).filter(
+            Reminder.status == 'pending',
+            Reminder.scheduled_time <= now
+        ).order_by(Reminder.scheduled_time, Reminder.id).limit(batch_size)
+        if db.engine.dialect.name == 'postgresql':
+            candidates = candidates.with_for_update(skip_locked=True)
+
+        reminders = Reminder.__table__
+        claimed = db.session.execute(
+            reminders.update()
+            .where(reminders.c.id.in_(candidates.scalar_subquery()))
+            .values(status=claim)
+        ).rowcount
+        return claim, claimed
+
+    @staticmethod
+    def process_batch(now=None, batch_size=None):
+        """Claim, notify and reschedule one batch of due reminders in one transaction.
+
+        Returns ``(claimed, sent)``; ``claimed`` is 0 once nothing is due.
+        """
+        now = now or datetime.utcnow()
+        batch_size = batch_size or current_app.config.get('REMINDER_BATCH_SIZE', 500)
         try:
-            due_reminders = ReminderService.get_due_reminders()
-            processed_count = 0
-            
-            for reminder in due_reminders:
-                if ReminderService.send_reminder_notification(reminder):
-                    reminder.status = 'sent'
-                    processed_count += 1
-                else:
-                    reminder.status = 'failed'
-                
-                # Schedule next reminder for recurring donations
-                if reminder.status == 'sent':
-                    ReminderService.create_reminder(
-                        reminder.user_id,
-                        reminder.charity_id,
-                        reminder.amount,
-                        days_from_now=30
+            claim, claimed = ReminderService.claim_batch(now, batch_size)
+            if not claimed:
+                db.session.rollback()
+                return 0, 0
+
+            rows = db.session.query(
+                Reminder.id, Reminder.user_id, Reminder.charity_id, Reminder.amount,
+                User.email, Charity.name.label('charity_name')
+            ).outerjoin(User, Reminder.user_id == User.id).outerjoin(
+                Charity, Reminder.charity_id == Charity.id
+            ).filter(Reminder.status == claim).all()
+
+            sent, failed = [], []
+            for row in rows:
+                delivered = row.email is not None and row.charity_name is not None and \
+                    ReminderService.deliver(row.id, row.email, row.charity_name, row.amount)
+                (sent if delivered else failed).append(row)
+
+            reminders = Reminder.__table__
+            for status, batch in (('sent', sent), ('failed', failed)):
+                if batch:
+                    db.session.execute(
+                        reminders.update()
+                        .where(reminders.c.id.in_([row.id for row in batch]))
+                        .values(status=status)
                     )
-            
+
+            # Schedule next month's reminder for every recurring donation that went out
+            next_time = now + timedelta(days=30)
+            db.session.bulk_insert_mappings(Reminder, [{
+                'user_id': row.user_id,
+                'charity_id': row.charity_id,
+                'amount': row.amount,
+                'scheduled_time': next_time,
+                'status': 'pending'
+            } for row in sent])
+
             db.session.commit()
+            return claimed, len(sent)
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def process_due_reminders(batch_size=None):
+        """Process all due reminders (called manually or via cron)"""
+        now = datetime.utcnow()
+        processed_count = 0
+        try:
+            while True:
+                claimed, sent = ReminderService.process_batch(now, batch_size)
+                if not claimed:
+                    break
+                processed_count += sent
+
             logger.info(f"Processed {processed_count} reminders")
             return processed_count
-            
+
         except Exception as e:
             logger.error(f"Error processing reminders: {str(e)}")
-            db.session.rollback()
-            return 0
-    
+            return processed_count
+
     @staticmethod
-    def send_reminder_notification(reminder):
-        """Send reminder notification (placeholder for email/SMS integration)"""
+    def deliver(reminder_id, email, charity_name, amount):
+        """Send one reminder (placeholder for email/SMS integration)"""
         try:
-            user = User.query.get(reminder.user_id)
-            charity = Charity.query.get(reminder.charity_id)
-            
-            if not user or not charity:
-                logger.error(f"User or charity not found for reminder {reminder.id}")
-                return False
-            
             # In a real application, you would send an email/SMS here
             # For now, we'll just log the reminder
-            logger.info(f"Reminder sent to {user.email} for {charity.name} - Amount: {reminder.amount}")
-            
+            logger.info(f"Reminder sent to {email} for {charity_name} - Amount: {amount}")
+
             # Here you would integrate with email service (SendGrid, AWS SES, etc.)
             # send_email(
-            #     to=user.email,
-            #     subject=f"Monthly Donation Reminder - {charity.name}",
-            #     body=f"Hi {user.name}, this is a reminder for your monthly donation of {reminder.amount} to {charity.name}"
+            #     to=email,
+            #     subject=f"Monthly Donation Reminder - {charity_name}",
+            #     body=f"This is a reminder for your monthly donation of {amount} to {charity_name}"
             # )
-            
+
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error sending reminder notification: {str(e)}")
+            logger.error(f"Error sending reminder {reminder_id}: {str(e)}")
+            return False
+
+    @staticmethod
+    def send_reminder_notification(reminder):
+        """Send the notification for a single reminder"""
+        user = User.query.get(reminder.user_id)
+        charity = Charity.query.get(reminder.charity_id)
+
+        if not user or not charity:
+            logger.error(f"User or charity not found for reminder {reminder.id}")
             return False
+
+        return ReminderService.deliver(reminder.id, user.email, charity.name, reminder.amount)
     
     @staticmethod
-    def cleanup_old_reminders(days_old=180):
+    def purge_old_reminders(days_old=180, batch_size=None, archive_path=None):
+        """Delete processed reminders older than ``days_old`` in bounded batches.
+
+        Each batch deletes one primary-key range with a single DELETE and
+        commits, so locks are held only for one batch at a time. With
+        ``archive_path`` the rows are first appended to that gzip-compressed
+        JSONL file and exactly the archived ids are deleted, so a reminder
+        processed after the SELECT is never dropped unarchived. Returns a
+        PurgeResult with the deleted count and rows/sec.
+        """
+        batch_size = batch_size or current_app.config.get('REMINDER_PURGE_BATCH_SIZE', 5000)
+        cutoff_date = datetime.utcnow() - timedelta(days=days_old)
+        reminders = Reminder.__table__
+        purgeable = and_(
+            reminders.c.scheduled_time < cutoff_date,
+            reminders.c.status.in_(['sent', 'failed'])
+        )
+        archive = gzip.open(archive_path, 'at', encoding='utf-8') if archive_path else None
+        started = time.perf_counter()
+        deleted = 0
+        last_id = 0
+
+        try:
+            while True:
+                if archive:
+                    rows = db.session.execute(
+                        select(reminders).where(purgeable, reminders.c.id > last_id)
+                        .order_by(reminders.c.id).limit(batch_size)
+                    ).fetchall()
+                    upper_id = rows[-1].id if rows else None
+                    for row in rows:
+                        archive.write(json.dumps(dict(row._mapping), default=str) + '\n')
+                    archive.flush()
+                else:
+                    chunk = select(reminders.c.id).where(purgeable, reminders.c.id > last_id) \
+                        .order_by(reminders.c.id).limit(batch_size).subquery()
+                    upper_id = db.session.execute(select(func.max(chunk.c.id))).scalar()
+
+                if upper_id is None:
+                    break
+
+                if archive:
+                    batch = reminders.c.id.in_([row.id for row in rows])
+                else:
+                    batch = and_(purgeable, reminders.c.id > last_id, reminders.c.id <= upper_id)
+
+                deleted += db.session.execute(reminders.delete().where(batch)).rowcount
+                db.session.commit()
+                last_id = upper_id
+
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if archive:
+                archive.close()
+
+        elapsed = time.perf_counter() - started
+        result = PurgeResult(deleted, elapsed, deleted / elapsed if elapsed else 0.0)
+        logger.info(f"Purged {deleted} old reminders in {elapsed:.2f}s ({result.rows_per_second:.0f} rows/s)")
+        return result
+
+    @staticmethod
+    def cleanup_old_reminders(days_old=180, batch_size=None, archive_path=None):
         """Clean up old processed reminders"""
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days_old)
-            old_reminders = Reminder.query.filter(
-                Reminder.scheduled_time < cutoff_date,
-                Reminder.status.in_(['sent', 'failed'])
-            ).all()
-            
-            count = len(old_reminders)
-            for reminder in old_reminders:
-                db.session.delete(reminder)
-            
-            db.session.commit()
-            logger.info(f"Cleaned up {count} old reminders")
-            return count
-            
+            return ReminderService.purge_old_reminders(days_old, batch_size, archive_path).deleted
+
         except Exception as e:
             logger.error(f"Error cleaning up old reminders: {str(e)}")
-            return 0
\ No newline at end of file
+            return 0
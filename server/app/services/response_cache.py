@@ -0,0 +1,197 @@
+"""
+Response cache for public, read-mostly endpoints.
+
+Rendered 200 responses are stored with an ETag in an in-process LRU or, with
+RESPONSE_CACHE_BACKEND=redis, in Redis so every worker shares them. Entries
+are tagged (``charities``, ``story:42``) and invalidated by bumping the
+tag's version: the versions of an entry's tags are part of its key, so an
+invalidated entry is simply never looked up again and ages out by TTL.
+
+The in-process backend only invalidates the worker that made the change;
+other workers serve the old copy until RESPONSE_CACHE_TTL expires.
+"""
+from functools import wraps
+from flask import current_app, request, Response
+from flask_restx.utils import unpack
+from werkzeug.http import parse_date
+from app.services.cache import TTLCache
+from app.services.pagination import wants_stream
+import hashlib
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Headers that belong to one rendering of a response and must not be replayed
+_UNCACHED_HEADERS = {'content-length', 'set-cookie', 'date'}
+
+
+class MemoryBackend:
+    """Per-process LRU entries and tag versions"""
+
+    def __init__(self, maxsize, ttl):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.versions = {}
+        self._lock = threading.Lock()
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self.versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, entry, ttl):
+        self.entries.set(key, entry, ttl=ttl)
+
+
+class RedisBackend:
+    """Entries and tag versions shared by all workers through Redis"""
+
+    def __init__(self, url, prefix='respcache:'):
+        import redis
+        self.client = redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def tag_versions(self, tags):
+        values = self.client.mget([f'{self.prefix}tag:{tag}' for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags):
+        pipe = self.client.pipeline()
+        for tag in tags:
+            pipe.incr(f'{self.prefix}tag:{tag}')
+        pipe.execute()
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, entry, ttl):
+        self.client.setex(self.prefix + key, ttl, json.dumps(entry))
+
+
+def init_app(app):
+    """Attach the response cache to the app; the backend is created on first use"""
+    app.config.setdefault('RESPONSE_CACHE_BACKEND', 'memory')
+    app.config.setdefault('RESPONSE_CACHE_TTL', 60)
+    app.config.setdefault('RESPONSE_CACHE_SIZE', 512)
+    app.config.setdefault('RESPONSE_CACHE_MAX_AGE', 30)
+    app.extensions['response_cache'] = {'backend': None, 'lock': threading.Lock()}
+
+
+def _backend():
+    state = current_app.extensions['response_cache']
+    if state['backend'] is None:
+        with state['lock']:
+            if state['backend'] is None:
+                config = current_app.config
+                if config['RESPONSE_CACHE_BACKEND'] == 'redis':
+                    state['backend'] = RedisBackend(config.get('REDIS_URL') or config['CELERY_BROKER_URL'])
+                else:
+                    state['backend'] = MemoryBackend(config['RESPONSE_CACHE_SIZE'], config['RESPONSE_CACHE_TTL'])
+    return state['backend']
+
+
+def invalidate(*tags):
+    """Drop every cached response carrying any of ``tags``.
+
+    Cache errors are logged rather than raised: the write that triggered the
+    invalidation has already been committed.
+    """
+    try:
+        _backend().bump(tags)
+    except Exception as e:
+        logger.error(f"Response cache invalidation failed for {tags}: {str(e)}")
+
+
+def _cache_key(tags, versions):
+    args = sorted(request.args.items(multi=True))
+    raw = json.dumps([request.path, args, tags, versions])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _etag_matches(etag):
+    if_none_match = request.headers.get('If-None-Match', '')
+    candidates = {value.strip().removeprefix('W/') for value in if_none_match.split(',')}
+    return etag in candidates or '*' in candidates
+
+
+def _not_modified(entry):
+    if 'If-None-Match' in request.headers:
+        return _etag_matches(entry['etag'])
+    last_modified = parse_date(entry['headers'].get('Last-Modified'))
+    since = parse_date(request.headers.get('If-Modified-Since'))
+    return last_modified is not None and since is not None and last_modified <= since
+
+
+def _respond(entry, status_header):
+    max_age = current_app.config['RESPONSE_CACHE_MAX_AGE']
+    if _not_modified(entry):
+        response = Response(status=304)
+        if 'Last-Modified' in entry['headers']:
+            response.headers['Last-Modified'] = entry['headers']['Last-Modified']
+    else:
+        response = Response(entry['body'], status=200, headers=entry['headers'])
+    response.headers['ETag'] = entry['etag']
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    # The same URL streams NDJSON for Accept: application/x-ndjson
+    response.headers['Vary'] = 'Accept'
+    response.headers['X-Cache'] = status_header
+    return response
+
+
+def cached(*tags, ttl=None):
+    """Cache the 200 responses of a restx Resource GET method.
+
+    ``tags`` may reference view arguments, e.g. ``cached('stories', 'story:{story_id}')``.
+    Apply it above ``marshal_with`` so the cached body is the final rendering.
+    Streamed responses and errors pass through uncached, and NDJSON requests
+    never see a cached JSON page.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(resource, *args, **kwargs):
+            if wants_stream():
+                return fn(resource, *args, **kwargs)
+            entry_tags = [tag.format(**kwargs) for tag in tags]
+            try:
+                backend = _backend()
+                key = _cache_key(entry_tags, backend.tag_versions(entry_tags))
+                entry = backend.get(key)
+            except Exception as e:
+                logger.error(f"Response cache lookup failed: {str(e)}")
+                backend = entry = None
+
+            if entry is not None:
+                return _respond(entry, 'HIT')
+
+            result = fn(resource, *args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            data, code, headers = unpack(result)
+            response = resource.api.make_response(data, code, headers=headers)
+            if code != 200 or response.is_streamed:
+                return response
+
+            body = response.get_data(as_text=True)
+            entry = {
+                'body': body,
+                'etag': '"%s"' % hashlib.sha1(body.encode()).hexdigest(),
+                'headers': {name: value for name, value in response.headers.items()
+                            if name.lower() not in _UNCACHED_HEADERS}
+            }
+            if backend is not None:
+                try:
+                    backend.set(key, entry, ttl or current_app.config['RESPONSE_CACHE_TTL'])
+                except Exception as e:
+                    logger.error(f"Response cache store failed: {str(e)}")
+            return _respond(entry, 'MISS')
+        return decorator
+    return wrapper
@@ -0,0 +1,170 @@
+"""
+Full-text search over stories and approved charities.
+
+SQLite keeps an FTS5 index per table (``stories_fts``, ``charities_fts``)
+as external-content tables over the base rows, maintained by triggers.
+PostgreSQL keeps a stored, generated ``search_vector`` tsvector column on
+each table with a GIN index. Either way the index follows every write,
+including bulk and raw SQL ones, without application code.
+
+The DDL is attached to the tables' ``after_create`` events so ``create_all``
+builds it; existing databases get it from the matching migration.
+
+Queries are reduced to their word characters: every term must match and
+the last one also matches as a prefix, so ``?q=clean wat`` finds "clean
+water". Title and name matches weigh more than body text. Results are
+ordered by rank and paged with a keyset cursor on ``(rank, type, id)``.
+"""
+import re
+from collections import namedtuple
+from sqlalchemy import DDL, Float, Integer, String, event, literal_column, text
+from app.services.database import db
+from app.models.story import Story
+from app.models.charity import Charity
+
+MAX_TERMS = 8
+MAX_QUERY_LENGTH = 200
+TYPES = ('story', 'charity')
+
+Hit = namedtuple('Hit', ['type', 'id', 'rank'])
+
+# Keyset of the ranked result list, for pagination cursors
+KEYS = (literal_column('rank', Float), literal_column('type', String), literal_column('id', Integer))
+
+# Relative weight of the title (name) column against the body (description)
+TITLE_WEIGHT = 10.0
+
+_SQLITE_DDL = {
+    'stories': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS stories_fts USING fts5("
+        "title, content, content='stories', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS stories_fts_ai AFTER INSERT ON stories BEGIN "
+        "INSERT INTO stories_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS stories_fts_ad AFTER DELETE ON stories BEGIN "
+        "INSERT INTO stories_fts(stories_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS stories_fts_au AFTER UPDATE OF title, content ON stories BEGIN "
+        "INSERT INTO stories_fts(stories_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO stories_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    ],
+    'charities': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS charities_fts USING fts5("
+        "name, description, content='charities', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS charities_fts_ai AFTER INSERT ON charities BEGIN "
+        "INSERT INTO charities_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS charities_fts_ad AFTER DELETE ON charities BEGIN "
+        "INSERT INTO charities_fts(charities_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS charities_fts_au AFTER UPDATE OF name, description ON charities BEGIN "
+        "INSERT INTO charities_fts(charities_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO charities_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    ],
+}
+
+_POSTGRES_DDL = {
+    table: [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector('english', coalesce({body}, '')), 'B')) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)",
+    ]
+    for table, title, body in (('stories', 'title', 'content'), ('charities', 'name', 'description'))
+}
+
+for _model in (Story, Charity):
+    _table = _model.__table__
+    for _statement in _SQLITE_DDL[_table.name]:
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    for _statement in _POSTGRES_DDL[_table.name]:
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+    # The FTS5 tables are not in the metadata; drop them with their base table
+    event.listen(_table, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_table.name}_fts').execute_if(dialect='sqlite'))
+
+
+def terms(q):
+    """Word tokens of a user query, lower-cased and capped at MAX_TERMS"""
+    return re.findall(r'\w+', (q or '').lower())[:MAX_TERMS]
+
+
+def _sqlite_match(words):
+    # Quoting each token keeps FTS5 operators and column filters out of user input
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _postgres_tsquery(words):
+    # \w+ tokens carry no tsquery syntax of their own
+    return ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+
+
+def _sqlite_hits(types):
+    selects = []
+    if 'story' in types:
+        selects.append(
+            "SELECT 'story' AS type, s.id AS id, bm25(stories_fts, :weight, 1.0) AS rank "
+            "FROM stories_fts JOIN stories s ON s.id = stories_fts.rowid "
+            "JOIN charities c ON c.id = s.charity_id "
+            "WHERE stories_fts MATCH :q AND c.status = 'approved'")
+    if 'charity' in types:
+        selects.append(
+            "SELECT 'charity' AS type, c.id AS id, bm25(charities_fts, :weight, 1.0) AS rank "
+            "FROM charities_fts JOIN charities c ON c.id = charities_fts.rowid "
+            "WHERE charities_fts MATCH :q AND c.status = 'approved'")
+    return ' UNION ALL '.join(selects)
+
+
+def _postgres_hits(types):
+    # ts_rank_cd grows with relevance; negate it so both dialects sort ascending
+    selects = []
+    if 'story' in types:
+        selects.append(
+            "SELECT 'story' AS type, s.id AS id, -ts_rank_cd(s.search_vector, to_tsquery('english', :q)) AS rank "
+            "FROM stories s JOIN charities c ON c.id = s.charity_id "
+            "WHERE s.search_vector @@ to_tsquery('english', :q) AND c.status = 'approved'")
+    if 'charity' in types:
+        selects.append(
+            "SELECT 'charity' AS type, c.id AS id, -ts_rank_cd(c.search_vector, to_tsquery('english', :q)) AS rank "
+            "FROM charities c "
+            "WHERE c.search_vector @@ to_tsquery('english', :q) AND c.status = 'approved'")
+    return ' UNION ALL '.join(selects)
+
+
+def search(q, types=TYPES, limit=20, after=None):
+    """Return up to ``limit`` ranked ``Hit``s for ``q``, best first.
+
+    ``after`` is the ``(rank, type, id)`` of the last hit of the previous
+    page. A query without any word characters matches nothing.
+    """
+    words = terms(q)
+    if not words or not types:
+        return []
+
+    if db.engine.dialect.name == 'postgresql':
+        hits, params = _postgres_hits(types), {'q': _postgres_tsquery(words)}
+    else:
+        hits, params = _sqlite_hits(types), {'q': _sqlite_match(words), 'weight': TITLE_WEIGHT}
+
+    where = ''
+    if after is not None:
+        where = ("WHERE rank > :after_rank OR (rank = :after_rank AND "
+                 "(type > :after_type OR (type = :after_type AND id > :after_id))) ")
+        params.update(after_rank=after[0], after_type=after[1], after_id=after[2])
+    statement = text(f"SELECT type, id, rank FROM ({hits}) AS hits {where}ORDER BY rank, type, id LIMIT :limit")
+    rows = db.session.execute(statement, dict(params, limit=limit))
+    return [Hit(*row) for row in rows]
+
+
+def load(hits):
+    """Serialized stories and charities for ``hits``, in the same order"""
+    documents = {}
+    for kind, model in (('story', Story), ('charity', Charity)):
+        ids = [hit.id for hit in hits if hit.type == kind]
+        if ids:
+            serializer = model.serializer
+            for row in serializer.select(model.query.filter(model.id.in_(ids))):
+                documents[kind, row[0]] = serializer(row)
+    # A row deleted between the two queries is skipped
+    return [(hit, documents[hit.type, hit.id]) for hit in hits if (hit.type, hit.id) in documents]
@@ -0,0 +1,220 @@
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy cursor events time every statement; Flask request hooks attribute
+them to the request that issued them. Each response carries a
+``Server-Timing`` header with the statement count, total database time and
+slowest statement of that request, and the totals per route are exposed in
+Prometheus text format by ``/api/v1/health/metrics``. Statements slower than
+SLOW_QUERY_MS are logged wherever they run, including in Celery tasks.
+
+Aggregates live in the worker process: with several gunicorn workers each
+scrape sees one worker, so scrape every worker or sum per instance.
+"""
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the statements-per-request histogram
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+# Upper bounds (seconds) of the database-time-per-request histogram
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_STARTED = 'sql_metrics_started'
+
+
+class RequestStats:
+    """Statements issued while handling one request"""
+    __slots__ = ('statements', 'seconds', 'slowest', 'started')
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+        self.started = time.perf_counter()
+
+
+class RouteStats:
+    """Running totals for one route and method"""
+
+    def __init__(self):
+        self.requests = {}
+        self.request_seconds = 0.0
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest = 0.0
+        self.statement_buckets = [0] * len(STATEMENT_BUCKETS)
+        self.db_time_buckets = [0] * len(DB_TIME_BUCKETS)
+
+
+class Registry:
+    """Per-process aggregates behind /health/metrics"""
+
+    def __init__(self):
+        self.routes = {}
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    def observe(self, route, method, status, elapsed, stats):
+        with self._lock:
+            totals = self.routes.setdefault((route, method), RouteStats())
+            totals.requests[status] = totals.requests.get(status, 0) + 1
+            totals.request_seconds += elapsed
+            totals.statements += stats.statements
+            totals.db_seconds += stats.seconds
+            totals.slowest = max(totals.slowest, stats.slowest)
+            for i, bound in enumerate(STATEMENT_BUCKETS):
+                if stats.statements <= bound:
+                    totals.statement_buckets[i] += 1
+            for i, bound in enumerate(DB_TIME_BUCKETS):
+                if stats.seconds <= bound:
+                    totals.db_time_buckets[i] += 1
+
+    def slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        """Prometheus text exposition (format 0.0.4)"""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            slow_queries = self.slow_queries
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            family('http_requests_total', 'counter', 'Requests handled, by route, method and status.')
+            for (route, method), totals in routes:
+                for status, count in sorted(totals.requests.items()):
+                    lines.append(f'http_requests_total{{{_labels(route, method)},status="{status}"}} {count}')
+
+            family('http_request_duration_seconds_total', 'counter', 'Time spent handling requests.')
+            for (route, method), totals in routes:
+                lines.append(f'http_request_duration_seconds_total{{{_labels(route, method)}}} '
+                             f'{totals.request_seconds:.6f}')
+
+            family('db_statements_total', 'counter', 'SQL statements issued while handling requests.')
+            for (route, method), totals in routes:
+                lines.append(f'db_statements_total{{{_labels(route, method)}}} {totals.statements}')
+
+            family('db_statements_per_request', 'histogram', 'SQL statements issued per request.')
+            for (route, method), totals in routes:
+                _histogram(lines, 'db_statements_per_request', _labels(route, method), STATEMENT_BUCKETS,
+                           totals.statement_buckets, sum(totals.requests.values()), totals.statements)
+
+            family('db_time_per_request_seconds', 'histogram', 'Database time per request.')
+            for (route, method), totals in routes:
+                _histogram(lines, 'db_time_per_request_seconds', _labels(route, method), DB_TIME_BUCKETS,
+                           totals.db_time_buckets, sum(totals.requests.values()), f'{totals.db_seconds:.6f}')
+
+            family('db_slowest_statement_seconds', 'gauge', 'Slowest single statement seen for the route.')
+            for (route, method), totals in routes:
+                lines.append(f'db_slowest_statement_seconds{{{_labels(route, method)}}} {totals.slowest:.6f}')
+
+            family('db_slow_queries_total', 'counter', 'Statements slower than SLOW_QUERY_MS.')
+            lines.append(f'db_slow_queries_total {slow_queries}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(route, method):
+    return f'route="{_escape(route)}",method="{method}"'
+
+
+def _histogram(lines, name, labels, bounds, counts, count, total):
+    for bound, bucket in zip(bounds, counts):
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {bucket}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+    lines.append(f'{name}_sum{{{labels}}} {total}')
+    lines.append(f'{name}_count{{{labels}}} {count}')
+
+
+def init_app(app):
+    """Attach the request hooks and a metrics registry to ``app``"""
+    app.config.setdefault('SQL_METRICS_ENABLED', True)
+    app.config.setdefault('SLOW_QUERY_MS', 200)
+    app.config.setdefault('SERVER_TIMING_ENABLED', True)
+    app.extensions['sql_metrics'] = Registry()
+    _listen()
+
+    @app.before_request
+    def start_request():
+        if current_app.config['SQL_METRICS_ENABLED']:
+            g.sql_metrics = RequestStats()
+
+    @app.after_request
+    def finish_request(response):
+        stats = g.pop('sql_metrics', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        current_app.extensions['sql_metrics'].observe(route, request.method, response.status_code, elapsed, stats)
+        if current_app.config['SERVER_TIMING_ENABLED']:
+            response.headers.add('Server-Timing', server_timing(stats, elapsed))
+        return response
+
+    return app
+
+
+def server_timing(stats, elapsed):
+    """``Server-Timing`` value for one request (durations in milliseconds)"""
+    return (f'db;dur={stats.seconds * 1000:.2f};desc="{stats.statements} queries", '
+            f'db-slowest;dur={stats.slowest * 1000:.2f}, '
+            f'app;dur={elapsed * 1000:.2f}')
+
+
+def registry():
+    return current_app.extensions['sql_metrics']
+
+
+def _listen():
+    # Engine-class listeners cover every engine (the app's and Celery's) and
+    # must only be registered once per process
+    if event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED)
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    if has_request_context():
+        stats = g.get('sql_metrics')
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+            stats.slowest = max(stats.slowest, elapsed)
+
+    if not has_app_context() or 'sql_metrics' not in current_app.extensions:
+        return
+    threshold = current_app.config['SLOW_QUERY_MS']
+    if threshold is not None and elapsed * 1000 >= threshold:
+        current_app.extensions['sql_metrics'].slow_query()
+        where = f' in {request.method} {request.path}' if has_request_context() else ''
+        logger.warning(f"Slow query ({elapsed * 1000:.1f}ms){where}: {' '.join(statement.split())[:1000]}")
+
+
+def _handle_error(context):
+    started = context.connection.info.get(_STARTED) if context.connection is not None else None
+    if started:
+        started.pop()
@@ -0,0 +1,76 @@
+"""
+Background STK push initiation.
+The request that creates a donation only commits it as ``pending``; the call to
+Daraja happens here, outside any open transaction. The job first claims the
+donation by moving it from ``pending`` to ``initiated`` with a conditional
+UPDATE, so a redelivered job never sends a second push; a rejected push then
+moves it on to ``failed``.
+"""
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.models.charity import Charity
+from app.services.mpesa_service import MpesaService
+from app.services.background import job, submit
+from app.services import payment_events
+import logging
+
+logger = logging.getLogger(__name__)
+
+STK_PUSH_JOB = 'payments.initiate_stk_push'
+
+class StkPushService:
+    """Initiates M-Pesa STK pushes for pending donations"""
+
+    @staticmethod
+    def start(donation_id, phone_number):
+        """Queue the STK push for a committed pending donation"""
+        return submit(STK_PUSH_JOB, donation_id, phone_number)
+
+    @staticmethod
+    @job(STK_PUSH_JOB)
+    def run(donation_id, phone_number):
+        """Call Daraja for one donation and record the outcome"""
+        donation = db.session.query(Donation.amount, Donation.status, Charity.name).join(
+            Charity, Donation.charity_id == Charity.id
+        ).filter(Donation.id == donation_id).first()
+        # Only the job that moves the donation out of pending may push
+        claimed = donation is not None and donation.status == 'pending' and Donation.transition(
+            donation_id, 'initiated')
+        # Release the connection before the outbound HTTP call
+        db.session.commit()
+
+        if not claimed:
+            logger.info(f"Skipping STK push for donation {donation_id}")
+            return False
+
+        result = MpesaService().initiate_stk_push(
+            phone_number=phone_number,
+            amount=donation.amount,
+            account_reference=f"DONATION_{donation_id}",
+            transaction_desc=f"Donation to {donation.name}"
+        )
+
+        try:
+            if result['success']:
+                db.session.add(Payment(
+                    donation_id=donation_id,
+                    method='mpesa',
+                    transaction_id=result['checkout_request_id'],
+                    status='pending'
+                ))
+            else:
+                logger.error(f"STK push for donation {donation_id} failed: {result['message']}")
+                Donation.transition(donation_id, 'failed')
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if result['success']:
+                # The donor has the prompt but its callback will not find a payment:
+                # the CheckoutRequestID is needed to reconcile by hand
+                logger.critical(f"STK push {result['checkout_request_id']} sent for donation {donation_id} "
+                                f"but its payment was not recorded: {str(e)}")
+            raise
+
+        payment_events.publish(donation_id)
+        return result['success']
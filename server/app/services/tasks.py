@@ -1,82 +1,66 @@
+from flask import current_app
 from celery_app import celery_app
 from app.models.reminder import Reminder
 from app.models.donation import Donation
-from app.models.user import User
-from app.models.charity import Charity
 from app.services.database import db
-from datetime import datetime, timedelta
+from app.services.stk_push_service import StkPushService, STK_PUSH_JOB
+from app.services.reminder_service import ReminderService
+from app.services.user_analytics_service import UserAnalyticsService, StaleWatermark
+from datetime import datetime
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 
 @celery_app.task
 def send_monthly_reminder(reminder_id):
-    """Send monthly donation reminder to user"""
-    try:
-        reminder = Reminder.query.get(reminder_id)
-        if not reminder:
-            logger.error(f"Reminder with ID {reminder_id} not found")
-            return False
+    """Deprecated: reminders are now dispatched in batches from ``scheduled_time``.
 
-        user = User.query.get(reminder.user_id)
-        charity = Charity.query.get(reminder.charity_id)
-        
-        if not user or not charity:
-            logger.error(f"User or charity not found for reminder {reminder_id}")
-            return False
+    Kept so ETA tasks queued by earlier releases drain harmlessly; the
+    reminder they point at is still pending and the dispatcher picks it up.
+    """
+    logger.info(f"Ignoring legacy reminder task for {reminder_id}; handled by the batch dispatcher")
+    return False
 
-        # In a real application, you would send an email/SMS here
-        # For now, we'll just log the reminder
-        logger.info(f"Sending monthly reminder to {user.email} for {charity.name} - Amount: {reminder.amount}")
-        
-        # Here you would integrate with email service (SendGrid, AWS SES, etc.)
-        # send_email(
-        #     to=user.email,
-        #     subject=f"Monthly Donation Reminder - {charity.name}",
-        #     body=f"Hi {user.name}, this is a reminder for your monthly donation of {reminder.amount} to {charity.name}"
-        # )
-        
-        reminder.status = 'sent'
-        db.session.commit()
-        
-        # Schedule next month's reminder
-        next_month = reminder.scheduled_time + timedelta(days=30)
-        new_reminder = Reminder(
-            user_id=reminder.user_id,
-            charity_id=reminder.charity_id,
-            amount=reminder.amount,
-            scheduled_time=next_month,
-            status='pending'
-        )
-        db.session.add(new_reminder)
-        db.session.commit()
-        
-        # Schedule the next reminder
-        send_monthly_reminder.apply_async(args=[new_reminder.id], eta=next_month)
-        
-        return True
-        
+@celery_app.task
+def process_reminder_batch(now, batch_size):
+    """Claim and process one batch of due reminders, reporting its timing"""
+    started = time.perf_counter()
+    try:
+        claimed, sent = ReminderService.process_batch(datetime.fromisoformat(now), batch_size)
     except Exception as e:
-        logger.error(f"Error sending reminder {reminder_id}: {str(e)}")
-        return False
+        logger.error(f"Error processing reminder batch: {str(e)}")
+        claimed = sent = 0
+    elapsed = time.perf_counter() - started
+    logger.info(f"Reminder batch: claimed {claimed}, sent {sent} in {elapsed * 1000:.1f}ms")
+    return {'claimed': claimed, 'sent': sent, 'seconds': round(elapsed, 4)}
 
 @celery_app.task
-def process_pending_reminders():
-    """Process all pending reminders that are due"""
+def process_pending_reminders(batch_size=None):
+    """Dispatch the reminders that are due as batch tasks of REMINDER_BATCH_SIZE.
+
+    Runs periodically from beat. Batches claim their rows, so overlapping
+    dispatches and concurrent workers never send a reminder twice.
+    """
     try:
         now = datetime.utcnow()
-        pending_reminders = Reminder.query.filter(
+        batch_size = batch_size or current_app.config['REMINDER_BATCH_SIZE']
+        due = Reminder.query.filter(
             Reminder.status == 'pending',
             Reminder.scheduled_time <= now
-        ).all()
-        
-        logger.info(f"Processing {len(pending_reminders)} pending reminders")
-        
-        for reminder in pending_reminders:
-            send_monthly_reminder.delay(reminder.id)
-            
-        return len(pending_reminders)
-        
+        ).count()
+        # Release the connection before talking to the broker
+        db.session.commit()
+
+        batches = min(math.ceil(due / batch_size), current_app.config['REMINDER_MAX_BATCHES_PER_RUN'])
+        logger.info(f"Dispatching {due} due reminders in {batches} batches of {batch_size}")
+
+        for _ in range(batches):
+            process_reminder_batch.delay(now.isoformat(), batch_size)
+
+        return batches
+
     except Exception as e:
         logger.error(f"Error processing pending reminders: {str(e)}")
         return 0
@@ -84,23 +68,24 @@ def process_pending_reminders():
 @celery_app.task
 def cleanup_old_reminders():
     """Clean up old sent/failed reminders"""
+    # Delete reminders older than 6 months, one primary-key range at a time
+    return ReminderService.cleanup_old_reminders(
+        days_old=180,
+        archive_path=current_app.config.get('REMINDER_ARCHIVE_PATH')
+    )
+
+@celery_app.task
+def refresh_user_analytics():
+    """Fold new users and completed donations into the analytics summary tables"""
     try:
-        # Delete reminders older than 6 months
-        cutoff_date = datetime.utcnow() - timedelta(days=180)
-        old_reminders = Reminder.query.filter(
-            Reminder.scheduled_time < cutoff_date,
-            Reminder.status.in_(['sent', 'failed'])
-        ).all()
-        
-        count = len(old_reminders)
-        for reminder in old_reminders:
-            db.session.delete(reminder)
-        
-        db.session.commit()
-        logger.info(f"Cleaned up {count} old reminders")
-        
-        return count
-        
-    except Exception as e:
-        logger.error(f"Error cleaning up old reminders: {str(e)}")
-        return 0
+        result = UserAnalyticsService.refresh()
+    except StaleWatermark as e:
+        # Another worker is already refreshing; the next run picks up the rest
+        logger.info(f"Skipped user analytics refresh: {e}")
+        return None
+    return {'users': result.users, 'donations': result.donations, 'seconds': round(result.seconds, 3)}
+
+@celery_app.task(name=STK_PUSH_JOB)
+def initiate_stk_push(donation_id, phone_number):
+    """Initiate the M-Pesa STK push for a pending donation"""
+    return StkPushService.run(donation_id, phone_number)
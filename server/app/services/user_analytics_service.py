@@ -0,0 +1,399 @@
+"""
+Precomputed user analytics for the admin dashboard.
+
+``refresh`` folds users and completed donations that are new since the last
+run into small summary tables, walking both tables in primary-key order from
+watermarks kept in analytics_counters. Each chunk is applied and its watermark
+advanced in one transaction, so an interrupted run resumes where it stopped
+and two concurrent runs cannot apply the same chunk twice. ``summary`` only
+reads the summary tables, so the endpoint cost does not grow with the number
+of users or donations.
+
+Donations only become visible once they are ``complete``; the donation
+watermark therefore never moves past a pending/initiated donation younger
+than ANALYTICS_SETTLE_HOURS, which may still complete. Older ones are
+treated as abandoned.
+"""
+from app.services.database import db, upsert
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.user_analytics import (
+    SignupStat, DonorSummary, DonorMonth, CharityDonor, CohortRetention, AnalyticsCounter
+)
+from app.services.charity_analytics_service import period_start
+from flask import current_app
+from sqlalchemy import bindparam, func, text
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+USERS_WATERMARK = 'watermark:users'
+DONATIONS_WATERMARK = 'watermark:donations'
+DONORS = 'donors'
+REPEAT_DONORS = 'repeat_donors'
+# One counter per charity: 'charity_donors:<charity_id>'
+CHARITY_DONORS = 'charity_donors:'
+
+# Keeps IN lists well under SQLite's bound parameter limit
+_IN_CHUNK = 500
+
+RefreshResult = namedtuple('RefreshResult', ['users', 'donations', 'seconds'])
+
+
+class StaleWatermark(RuntimeError):
+    """Another refresh advanced the watermark first"""
+
+
+def _month(ts):
+    return ts.strftime('%Y-%m')
+
+
+def _months_since(cohort, month):
+    return (int(month[:4]) - int(cohort[:4])) * 12 + int(month[5:]) - int(cohort[5:])
+
+
+def _chunks(values, size=_IN_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+@lru_cache(maxsize=32)
+def _pair_lookup(table, column, size):
+    """SELECT of the rows matching ``size`` (user_id, column) primary keys.
+
+    An OR of key equalities rather than a row-value IN: SQLite scans the table
+    for the latter but probes the primary key once per term for the former.
+    Built as text because constructing the equivalent expression per chunk
+    costs more than running it.
+    """
+    terms = ' OR '.join(f'(user_id = :u{n} AND {column} = :v{n})' for n in range(size))
+    return text(f'SELECT user_id, {column} FROM {table} WHERE {terms}')
+
+
+class UserAnalyticsService:
+    """Maintains and reads the user analytics summary tables"""
+
+    @staticmethod
+    def refresh(batch_size=None):
+        """Fold new users and completed donations into the summary tables.
+
+        Returns a ``RefreshResult`` with the number of users and donations
+        applied by this run.
+        """
+        batch_size = batch_size or current_app.config['ANALYTICS_BATCH_SIZE']
+        started = time.perf_counter()
+        UserAnalyticsService._ensure_counters()
+        users = UserAnalyticsService._refresh_signups(batch_size)
+        donations = UserAnalyticsService._refresh_donations(batch_size)
+        seconds = time.perf_counter() - started
+        logger.info(f"Refreshed user analytics: {users} users, {donations} donations in {seconds:.2f}s")
+        return RefreshResult(users, donations, seconds)
+
+    @staticmethod
+    def rebuild(batch_size=None):
+        """Clear the summary tables and recompute them from scratch"""
+        try:
+            for model in (SignupStat, DonorSummary, DonorMonth, CharityDonor, CohortRetention, AnalyticsCounter):
+                model.query.delete()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return UserAnalyticsService.refresh(batch_size)
+
+    @staticmethod
+    def _ensure_counters():
+        existing = {name for name, in db.session.query(AnalyticsCounter.name).filter(
+            AnalyticsCounter.name.in_([USERS_WATERMARK, DONATIONS_WATERMARK]))}
+        for name in (USERS_WATERMARK, DONATIONS_WATERMARK):
+            if name not in existing:
+                db.session.add(AnalyticsCounter(name=name, value=0))
+        db.session.commit()
+
+    @staticmethod
+    def _counter(name):
+        return db.session.query(AnalyticsCounter.value).filter_by(name=name).scalar() or 0
+
+    @staticmethod
+    def _advance(name, expected, value):
+        """Move a watermark from ``expected`` to ``value`` or raise StaleWatermark"""
+        table = AnalyticsCounter.__table__
+        moved = db.session.execute(
+            table.update()
+            .where(table.c.name == name, table.c.value == expected)
+            .values(value=value, updated_at=datetime.utcnow())
+        ).rowcount
+        if not moved:
+            raise StaleWatermark(f"{name} moved past {expected} during refresh")
+
+    @staticmethod
+    def _increment(model, keys, rows):
+        """Add each row's non-key values to the row of ``model`` matching its ``keys`` columns"""
+        if not rows:
+            return
+        table = model.__table__
+        increments = [column for column in rows[0] if column not in keys]
+        stmt = upsert(table)
+
+        if stmt is not None:
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={column: table.c[column] + stmt.excluded[column] for column in increments}
+            ), rows)
+            return
+
+        for row in rows:
+            updated = db.session.execute(
+                table.update()
+                .where(*[table.c[column] == row[column] for column in keys])
+                .values({column: table.c[column] + row[column] for column in increments})
+            ).rowcount
+            if not updated:
+                db.session.execute(table.insert().values(**row))
+
+    @staticmethod
+    def _bump(counters):
+        UserAnalyticsService._increment(AnalyticsCounter, ('name',), [
+            {'name': name, 'value': amount} for name, amount in counters.items() if amount])
+
+    @staticmethod
+    def _refresh_signups(batch_size):
+        applied = 0
+        while True:
+            watermark = UserAnalyticsService._counter(USERS_WATERMARK)
+            rows = db.session.query(User.id, User.created_at, User.role).filter(
+                User.id > watermark).order_by(User.id).limit(batch_size).all()
+            if not rows:
+                return applied
+            signups = Counter(((created_at or datetime.utcnow()).date().isoformat(), role)
+                              for _, created_at, role in rows)
+            try:
+                UserAnalyticsService._increment(SignupStat, ('day', 'role'), [
+                    {'day': day, 'role': role, 'signups': count, 'converted': 0}
+                    for (day, role), count in signups.items()])
+                UserAnalyticsService._advance(USERS_WATERMARK, watermark, rows[-1].id)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            applied += len(rows)
+
+    @staticmethod
+    def _settled_upper_bound():
+        """Highest donation id whose status can no longer change"""
+        settle = timedelta(hours=current_app.config['ANALYTICS_SETTLE_HOURS'])
+        unsettled = db.session.query(func.min(Donation.id)).filter(
+            Donation.status.in_(['pending', 'initiated']),
+            Donation.timestamp > datetime.utcnow() - settle
+        ).scalar()
+        highest = db.session.query(func.max(Donation.id)).scalar() or 0
+        return min(highest, unsettled - 1) if unsettled else highest
+
+    @staticmethod
+    def _refresh_donations(batch_size):
+        upper = UserAnalyticsService._settled_upper_bound()
+        applied = 0
+        while True:
+            watermark = UserAnalyticsService._counter(DONATIONS_WATERMARK)
+            if watermark >= upper:
+                return applied
+            # A pure primary-key range walk; filtering on status in SQL lets the
+            # planner pick ix_donations_status_timestamp and sort every chunk
+            rows = db.session.query(
+                Donation.id, Donation.user_id, Donation.charity_id, Donation.timestamp, Donation.status
+            ).filter(
+                Donation.id > watermark,
+                Donation.id <= upper
+            ).order_by(Donation.id).limit(batch_size).all()
+            # A short chunk means the walk reached the bound
+            chunk_end = rows[-1].id if len(rows) == batch_size else upper
+            rows = [row for row in rows if row.status == 'complete']
+            try:
+                UserAnalyticsService._apply_donations(rows)
+                UserAnalyticsService._advance(DONATIONS_WATERMARK, watermark, chunk_end)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            applied += len(rows)
+
+    @staticmethod
+    def _apply_donations(rows):
+        if not rows:
+            return
+        now = datetime.utcnow()
+        by_user = defaultdict(list)
+        for row in rows:
+            by_user[row.user_id].append(row)
+        chunk_months = {(row.user_id, _month(row.timestamp or now)) for row in rows}
+        chunk_pairs = {(row.user_id, row.charity_id) for row in rows}
+
+        # Only the keys this chunk touches are read back, not each donor's history
+        summaries = {}
+        for ids in _chunks(by_user):
+            for user_id, first_month, count, last in db.session.query(
+                    DonorSummary.user_id, DonorSummary.first_month,
+                    DonorSummary.donation_count, DonorSummary.last_donation_at
+            ).filter(DonorSummary.user_id.in_(ids)):
+                summaries[user_id] = (first_month, count, last)
+        known_months = UserAnalyticsService._existing(DonorMonth, 'month', chunk_months)
+        known_pairs = UserAnalyticsService._existing(CharityDonor, 'charity_id', chunk_pairs)
+
+        added_months = defaultdict(set)
+        for key in chunk_months - known_months:
+            added_months[key[0]].add(key[1])
+
+        new_summaries, changed_summaries, moved = [], [], {}
+        cohorts, counters, converted = Counter(), Counter(), []
+
+        for user_id, donations in by_user.items():
+            stamps = [d.timestamp or now for d in donations]
+            added = added_months[user_id]
+            old_first, old_count, old_last = summaries.get(user_id, (None, 0, None))
+            first = min(added | ({old_first} if old_first else set()))
+
+            if old_first and first != old_first:
+                # A late donation older than the cohort: every month moves, see below
+                moved[user_id] = (old_first, first)
+            else:
+                for month in added:
+                    cohorts[(first, _months_since(first, month))] += 1
+
+            count = old_count + len(donations)
+            last = max(stamps + ([old_last] if old_last else []))
+            summary = {'user_id': user_id, 'first_month': first, 'donation_count': count, 'last_donation_at': last}
+            if old_count:
+                changed_summaries.append(summary)
+            else:
+                new_summaries.append(summary)
+                counters[DONORS] += 1
+                converted.append(user_id)
+            if old_count < 2 <= count:
+                counters[REPEAT_DONORS] += 1
+
+        for ids in _chunks(moved):
+            for user_id, month in db.session.query(DonorMonth.user_id, DonorMonth.month).filter(
+                    DonorMonth.user_id.in_(ids)):
+                old_first, first = moved[user_id]
+                cohorts[(old_first, _months_since(old_first, month))] -= 1
+                cohorts[(first, _months_since(first, month))] += 1
+        for user_id, (_, first) in moved.items():
+            for month in added_months[user_id]:
+                cohorts[(first, _months_since(first, month))] += 1
+
+        new_months = [{'user_id': user_id, 'month': month} for user_id, month in chunk_months - known_months]
+        new_pairs = []
+        for user_id, charity_id in chunk_pairs - known_pairs:
+            new_pairs.append({'user_id': user_id, 'charity_id': charity_id})
+            counters[f'{CHARITY_DONORS}{charity_id}'] += 1
+
+        # Core executemany: the ORM bulk helpers cost more than the SQL here
+        summaries_table = DonorSummary.__table__
+        for table, values in ((summaries_table, new_summaries), (DonorMonth.__table__, new_months),
+                              (CharityDonor.__table__, new_pairs)):
+            if values:
+                db.session.execute(table.insert(), values)
+        if changed_summaries:
+            db.session.execute(summaries_table.update().where(
+                summaries_table.c.user_id == bindparam('summary_user_id')
+            ).values(first_month=bindparam('first_month'), donation_count=bindparam('donation_count'),
+                     last_donation_at=bindparam('last_donation_at')),
+                [dict(row, summary_user_id=row['user_id']) for row in changed_summaries])
+        UserAnalyticsService._increment(CohortRetention, ('cohort_month', 'months_since'), [
+            {'cohort_month': cohort, 'months_since': months_since, 'donors': delta}
+            for (cohort, months_since), delta in cohorts.items() if delta])
+        UserAnalyticsService._bump(counters)
+
+        conversions = Counter()
+        for ids in _chunks(converted):
+            for created_at, role in db.session.query(User.created_at, User.role).filter(User.id.in_(ids)):
+                conversions[((created_at or now).date().isoformat(), role)] += 1
+        UserAnalyticsService._increment(SignupStat, ('day', 'role'), [
+            {'day': day, 'role': role, 'signups': 0, 'converted': count}
+            for (day, role), count in conversions.items()])
+
+    @staticmethod
+    def _existing(model, column, keys):
+        """Subset of ``(user_id, <column>)`` pairs in ``keys`` that already have a row"""
+        found = set()
+        for pairs in _chunks(keys, _IN_CHUNK // 2):
+            params = {}
+            for n, (user_id, value) in enumerate(pairs):
+                params[f'u{n}'] = user_id
+                params[f'v{n}'] = value
+            stmt = _pair_lookup(model.__tablename__, column, len(pairs))
+            found.update(tuple(row) for row in db.session.execute(stmt, params))
+        return found
+
+    @staticmethod
+    def summary(interval='month', cohorts=12, top=10):
+        """Return signups, conversion, retention cohorts and top charities"""
+        period = period_start(SignupStat.day, interval).label('period')
+        signups = [
+            {'period': bucket, 'role': role, 'signups': int(count), 'converted': int(converted)}
+            for bucket, role, count, converted in db.session.query(
+                period, SignupStat.role, func.sum(SignupStat.signups), func.sum(SignupStat.converted)
+            ).group_by(period, SignupStat.role).order_by(period, SignupStat.role)
+        ]
+
+        counters = dict(db.session.query(AnalyticsCounter.name, AnalyticsCounter.value).filter(
+            AnalyticsCounter.name.in_([DONORS, REPEAT_DONORS])))
+        donor_signups, donor_converted = db.session.query(
+            func.coalesce(func.sum(SignupStat.signups), 0), func.coalesce(func.sum(SignupStat.converted), 0)
+        ).filter(SignupStat.role == 'donor').one()
+        donors = int(counters.get(DONORS, 0))
+        repeat_donors = int(counters.get(REPEAT_DONORS, 0))
+
+        recent = [month for month, in db.session.query(CohortRetention.cohort_month).filter(
+            CohortRetention.months_since == 0, CohortRetention.donors > 0
+        ).order_by(CohortRetention.cohort_month.desc()).limit(cohorts)]
+        retention = {month: {'cohort': month, 'donors': 0, 'retention': []} for month in sorted(recent)}
+        if retention:
+            for month, months_since, count in db.session.query(
+                    CohortRetention.cohort_month, CohortRetention.months_since, CohortRetention.donors
+            ).filter(CohortRetention.cohort_month >= min(retention), CohortRetention.donors > 0).order_by(
+                    CohortRetention.cohort_month, CohortRetention.months_since):
+                cohort = retention.get(month)
+                if cohort is None:
+                    continue
+                if months_since == 0:
+                    cohort['donors'] = count
+                cohort['retention'].append({'months_since': months_since, 'donors': count})
+            for cohort in retention.values():
+                for cell in cohort['retention']:
+                    cell['rate'] = round(cell['donors'] / cohort['donors'], 4) if cohort['donors'] else 0.0
+
+        prefix_length = len(CHARITY_DONORS)
+        charity_rows = db.session.query(AnalyticsCounter.name, AnalyticsCounter.value).filter(
+            AnalyticsCounter.name.like(f'{CHARITY_DONORS}%'), AnalyticsCounter.value > 0
+        ).order_by(AnalyticsCounter.value.desc(), AnalyticsCounter.name).limit(top).all()
+        charity_ids = [int(name[prefix_length:]) for name, _ in charity_rows]
+        names = dict(db.session.query(Charity.id, Charity.name).filter(Charity.id.in_(charity_ids))) if charity_ids else {}
+        top_charities = [{'charity_id': charity_id, 'name': names.get(charity_id), 'donors': int(value)}
+                         for charity_id, (_, value) in zip(charity_ids, charity_rows)]
+
+        refreshed_at = db.session.query(func.max(AnalyticsCounter.updated_at)).filter(
+            AnalyticsCounter.name.in_([USERS_WATERMARK, DONATIONS_WATERMARK])).scalar()
+
+        return {
+            'interval': interval,
+            'signups': signups,
+            'conversion': {
+                'donor_signups': int(donor_signups),
+                'converted': int(donor_converted),
+                'rate': round(int(donor_converted) / int(donor_signups), 4) if donor_signups else 0.0,
+                'donors': donors,
+                'repeat_donors': repeat_donors,
+                'repeat_rate': round(repeat_donors / donors, 4) if donors else 0.0,
+            },
+            'cohorts': list(retention.values()),
+            'top_charities': top_charities,
+            'refreshed_at': refreshed_at.isoformat() if refreshed_at else None,
+        }
+
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark for rate limiting and admission control under a login flood.
+
+One abusive address floods /auth/login with correct passwords for a single
+account (each one a full password hash, and never stopped by the failed-login
+throttle) while a well-behaved client reads /charities/ from another address.
+The well-behaved client's latency is measured alone, during the flood with
+rate limits and the admission gate off, and during the flood with both on.
+
+Usage:
+    python benchmarks/admission.py --flooders 16 --seconds 5
+    python benchmarks/admission.py --in-flight 2 --per-client 1
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.middlewares import admission
+from app.services.database import db
+from app.models.charity import Charity
+from app.models.user import User
+
+PASSWORD = 'correct horse battery staple'
+
+
+def build_app(workdir, name, method, protected, in_flight, per_client):
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, name + '.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    app.config['PASSWORD_HASH_METHOD'] = method
+    app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+    app.config['RATE_LIMIT_STORAGE'] = 'memory'
+    app.config['RATE_LIMIT_ENABLED'] = protected
+    if protected:
+        app.config['ADMISSION_MAX_IN_FLIGHT'] = in_flight
+        app.config['ADMISSION_MAX_PER_CLIENT'] = per_client
+        admission.init_app(app)
+    with app.app_context():
+        db.create_all()
+        user = User(name='Target', email='target@example.com', role='donor',
+                    password_hash=generate_password_hash(PASSWORD, method=method))
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([Charity(owner_id=user.id, name=f'Charity {i}', status='approved') for i in range(50)])
+        db.session.commit()
+    return app
+
+
+def run(app, flooders, seconds):
+    """Flood logins for ``seconds``; returns (reader latencies, reader statuses, flood statuses)"""
+    stop = threading.Event()
+    flood_statuses, lock = [], threading.Lock()
+
+    def flood():
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/api/v1/auth/login', json={'email': 'target@example.com', 'password': PASSWORD},
+                                   environ_base={'REMOTE_ADDR': '198.51.100.7'})
+            with lock:
+                flood_statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=flood) for _ in range(flooders)]
+    for thread in threads:
+        thread.start()
+
+    client = app.test_client()
+    latencies, statuses = [], []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        # Distinct query strings keep the response cache out of the measurement
+        response = client.get('/api/v1/charities/', query_string={'limit': 20, 'n': len(latencies)},
+                              environ_base={'REMOTE_ADDR': '203.0.113.5'})
+        latencies.append(time.perf_counter() - started)
+        statuses.append(response.status_code)
+        time.sleep(0.05)
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, flood_statuses
+
+
+def report(label, latencies, statuses, flood_statuses):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    flood = ', '.join(f'{status}: {flood_statuses.count(status)}' for status in sorted(set(flood_statuses)))
+    print(f"{label + ':':13} reads p50 {statistics.median(latencies) * 1000:7.1f}ms  p95 {p95 * 1000:7.1f}ms"
+          f"  ({len(statuses)} reads, {statuses.count(200)} ok)  flood: {flood or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--flooders', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--in-flight', type=int, default=4)
+    parser.add_argument('--per-client', type=int, default=2)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    args = parser.parse_args()
+
+    logging.getLogger('app.services.passwords').setLevel(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix='admission-bench-')
+
+    quiet = build_app(workdir, 'quiet', args.method, True, args.in_flight, args.per_client)
+    report('no flood', *run(quiet, 0, args.seconds))
+
+    exposed = build_app(workdir, 'exposed', args.method, False, args.in_flight, args.per_client)
+    report('unprotected', *run(exposed, args.flooders, args.seconds))
+
+    protected = build_app(workdir, 'protected', args.method, True, args.in_flight, args.per_client)
+    latencies, statuses, flood_statuses = run(protected, args.flooders, args.seconds)
+    report('protected', latencies, statuses, flood_statuses)
+
+    # The flood gets at most the login burst through and every read is served
+    burst = int(protected.config['RATE_LIMIT_LOGIN'].split('/')[0])
+    consistent = (flood_statuses.count(200) <= burst and statuses.count(200) == len(statuses)
+                  and set(flood_statuses) <= {200, 429, 503})
+    print('invariants:   ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for worker cold start.
+
+Starts fresh interpreters that import ``wsgi`` the way a gunicorn worker does
+and serve a first request, with and without FAST_START. Each run reports the
+time to import the app, to answer /health/live, to answer the first database
+request (/charities/) and to build the Swagger spec on its first request.
+Process start-up of the interpreter itself is included in "total".
+``--flask-env production`` boots the way a deployed worker does.
+
+Usage:
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --flask-env production
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = '''
+import json, time
+started = time.perf_counter()
+import wsgi
+imported = time.perf_counter()
+client = wsgi.app.test_client()
+with wsgi.app.app_context():
+    from app.services.database import db
+    db.create_all()
+prepared = time.perf_counter()
+live = client.get('/api/v1/health/live').status_code
+answered = time.perf_counter()
+charities = client.get('/api/v1/charities/').status_code
+queried = time.perf_counter()
+swagger = client.get('/api/v1/swagger.json').status_code
+documented = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'first request': answered - prepared,
+    'first query': queried - answered,
+    'swagger.json': documented - queried,
+    'statuses': [live, charities, swagger],
+}))
+'''
+
+
+def run(fast_start, database, flask_env):
+    env = dict(os.environ, FAST_START='true' if fast_start else 'false', FLASK_ENV=flask_env,
+               DATABASE_URL=f'sqlite:///{database}')
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', CHILD], capture_output=True, text=True, cwd=SERVER_DIR, env=env)
+    total = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['total'] = total
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--flask-env', default='development')
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(prefix='cold-start-bench-'), 'cold.db')
+    results = {True: [], False: []}
+    for _ in range(args.runs):
+        # Interleaved so both modes see the same page cache and machine load
+        for fast_start in (False, True):
+            results[fast_start].append(run(fast_start, database, args.flask_env))
+
+    consistent = True
+    for fast_start in (False, True):
+        runs = results[fast_start]
+        print(f"FAST_START={'true' if fast_start else 'false'} (median of {len(runs)})")
+        for key in ('import', 'first request', 'first query', 'swagger.json', 'total'):
+            print(f"  {key + ':':15} {statistics.median(r[key] for r in runs) * 1000:.0f}ms")
+        consistent = consistent and all(r['statuses'] == [200, 200, 200] for r in runs)
+    print('invariants:      ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
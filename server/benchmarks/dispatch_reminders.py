@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the batched Celery reminder dispatcher.
+
+Runs ``process_pending_reminders`` with Celery in eager mode (tasks execute
+in-process, no broker needed) against a throwaway SQLite database seeded with
+due reminders, and reports the timing of every ``process_reminder_batch``.
+
+Usage:
+    python benchmarks/dispatch_reminders.py --reminders 100000 --batch-size 500
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# celery_app builds its Flask app at import time from the environment
+workdir = tempfile.mkdtemp(prefix='reminder-dispatch-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'reminders.db')}"
+
+from celery.signals import task_postrun
+from celery_app import celery_app, flask_app
+from app.services.database import db
+from app.services import tasks
+from app.models.reminder import Reminder
+from process_reminders import seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reminders', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--charities', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.getLogger('app.services.reminder_service').setLevel(logging.WARNING)
+    logging.getLogger('app.services.tasks').setLevel(logging.WARNING)
+    celery_app.conf.task_always_eager = True
+    flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    flask_app.config['REMINDER_MAX_BATCHES_PER_RUN'] = args.reminders
+
+    batches = []
+
+    @task_postrun.connect
+    def collect(sender=None, retval=None, **kwargs):
+        if sender.name == tasks.process_reminder_batch.name:
+            batches.append(retval)
+
+    with flask_app.app_context():
+        db.create_all()
+        seed(args.reminders, args.users, args.charities, random.Random(args.seed))
+
+        started = time.perf_counter()
+        tasks.process_pending_reminders.delay(args.batch_size)
+        elapsed = time.perf_counter() - started
+
+        sent = Reminder.query.filter_by(status='sent').count()
+
+    timings = sorted(batch['seconds'] for batch in batches)
+    print(f"reminders:      {args.reminders}")
+    print(f"batches:        {len(batches)} x {args.batch_size}")
+    print(f"sent:           {sent}")
+    print(f"elapsed:        {elapsed:.2f}s")
+    print(f"throughput:     {sent / elapsed:.0f} reminders/s")
+    if timings:
+        print(f"batch p50:      {timings[len(timings) // 2] * 1000:.1f}ms")
+        print(f"batch p99:      {timings[int(len(timings) * 0.99)] * 1000:.1f}ms")
+        print(f"batch max:      {timings[-1] * 1000:.1f}ms")
+    consistent = sent == args.reminders == sum(batch['sent'] for batch in batches)
+    print('invariants:     ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for login throughput.
+
+Creates users in a throwaway SQLite database and logs them in from
+concurrent clients (a thread pool sharing one app, each thread with its own
+Flask test client). Three phases are timed:
+
+  valid        correct passwords, hashed with --method
+  rehash       correct passwords stored with --legacy-method, so each first
+               login also queues a re-hash to --method
+  brute force  wrong passwords against a single account from one address,
+               most of which the failed-login throttle rejects before hashing
+
+Compare --method values to pick the hashing cost the worker can afford.
+
+Usage:
+    python benchmarks/login_throughput.py --clients 8 --logins 200
+    python benchmarks/login_throughput.py --method pbkdf2:sha256:100000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.services.database import db
+from app.services.passwords import needs_rehash
+from app.models.user import User
+
+PASSWORD = 'correct horse battery staple'
+
+
+def timed_logins(app, requests, clients):
+    """POST each (email, password, ip) in ``requests``; returns (seconds, latencies, statuses)"""
+    def login(item):
+        email, password, ip = item
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/api/v1/auth/login', json={'email': email, 'password': password},
+                               environ_base={'REMOTE_ADDR': ip})
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(login, requests))
+    elapsed = time.perf_counter() - started
+    return elapsed, [r[0] for r in results], [r[1] for r in results]
+
+
+def report(label, elapsed, latencies, statuses):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    counts = ', '.join(f'{status}: {statuses.count(status)}' for status in sorted(set(statuses)))
+    print(f"{label + ':':13} {len(statuses) / elapsed:7.1f} logins/s  p50 {statistics.median(latencies) * 1000:6.1f}ms"
+          f"  p95 {p95 * 1000:6.1f}ms  ({counts})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    parser.add_argument('--legacy-method', default='pbkdf2:sha256:260000')
+    args = parser.parse_args()
+
+    logging.getLogger('app.services.passwords').setLevel(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix='login-bench-')
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'login.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    app.config['PASSWORD_HASH_METHOD'] = args.method
+    app.config['BACKGROUND_EXECUTOR'] = 'thread'
+
+    with app.app_context():
+        db.create_all()
+        current = generate_password_hash(PASSWORD, method=args.method)
+        legacy = generate_password_hash(PASSWORD, method=args.legacy_method)
+        # Hashes are shared between users: generating one per user would dominate setup
+        db.session.bulk_insert_mappings(User, [
+            {'name': f'User {i}', 'email': f'user{i}@example.com', 'role': 'donor',
+             'password_hash': current if i < args.logins else legacy}
+            for i in range(args.logins * 2)
+        ])
+        db.session.commit()
+
+    valid = [(f'user{i}@example.com', PASSWORD, f'10.0.{i // 250}.{i % 250}') for i in range(args.logins)]
+    report('valid', *timed_logins(app, valid, args.clients))
+
+    rehash = [(f'user{i}@example.com', PASSWORD, f'10.1.{i // 250}.{i % 250}')
+              for i in range(args.logins, args.logins * 2)]
+    report('rehash', *timed_logins(app, rehash, args.clients))
+
+    brute_force = [('user0@example.com', f'guess {i}', '192.0.2.1') for i in range(args.logins)]
+    elapsed, latencies, statuses = timed_logins(app, brute_force, args.clients)
+    report('brute force', elapsed, latencies, statuses)
+
+    # Thread-mode re-hashes finish shortly after their logins
+    deadline = time.monotonic() + 60
+    with app.app_context():
+        while time.monotonic() < deadline:
+            stale = sum(needs_rehash(h) for (h,) in db.session.query(User.password_hash))
+            if not stale:
+                break
+            db.session.remove()
+            time.sleep(0.2)
+
+    limit = app.config['LOGIN_MAX_FAILURES_PER_EMAIL']
+    consistent = (stale == 0 and statuses.count(401) <= limit + args.clients
+                  and statuses.count(429) + statuses.count(401) == len(statuses))
+    print(f"stale hashes: {stale}")
+    print('invariants:   ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
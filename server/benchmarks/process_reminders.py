@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark for ReminderService.process_due_reminders.
+
+Seeds due reminders spread over a set of users and charities into a throwaway
+SQLite database and runs the batched pipeline over all of them, counting the
+SQL statements issued. ``--legacy`` runs the previous row-at-a-time loop
+(two lookups and a commit per reminder) on the same data for comparison.
+
+Usage:
+    python benchmarks/process_reminders.py --reminders 100000 --batch-size 500
+    python benchmarks/process_reminders.py --reminders 5000 --legacy
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import event
+from app import create_app
+from app.services.database import db
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.reminder import Reminder
+from app.services.reminder_service import ReminderService
+
+
+def seed(reminder_count, user_count, charity_count, rng):
+    db.session.bulk_insert_mappings(User, [
+        {'id': i, 'name': f'Donor {i}', 'email': f'donor{i}@example.com', 'role': 'donor', 'password_hash': 'x'}
+        for i in range(1, user_count + 1)
+    ])
+    db.session.bulk_insert_mappings(Charity, [
+        {'id': i, 'owner_id': 1, 'name': f'Charity {i}', 'status': 'approved'}
+        for i in range(1, charity_count + 1)
+    ])
+    now = datetime.utcnow()
+    for start in range(0, reminder_count, 10000):
+        db.session.bulk_insert_mappings(Reminder, [{
+            'user_id': rng.randint(1, user_count),
+            'charity_id': rng.randint(1, charity_count),
+            'amount': 100,
+            'scheduled_time': now - timedelta(minutes=rng.randint(1, 60 * 24 * 7)),
+            'status': 'pending'
+        } for _ in range(start, min(start + 10000, reminder_count))])
+    db.session.commit()
+
+
+def legacy_process_due_reminders():
+    """The pre-batching implementation, kept here only as a baseline"""
+    due = Reminder.query.filter(Reminder.status == 'pending', Reminder.scheduled_time <= datetime.utcnow()).all()
+    processed = 0
+    for reminder in due:
+        if ReminderService.send_reminder_notification(reminder):
+            reminder.status = 'sent'
+            processed += 1
+            db.session.add(Reminder(user_id=reminder.user_id, charity_id=reminder.charity_id,
+                                    amount=reminder.amount, status='pending',
+                                    scheduled_time=datetime.utcnow() + timedelta(days=30)))
+            db.session.commit()
+        else:
+            reminder.status = 'failed'
+    db.session.commit()
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reminders', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--charities', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--legacy', action='store_true', help='run the row-at-a-time baseline instead')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # Per-reminder log lines would dominate the measurement
+    logging.getLogger('app.services.reminder_service').setLevel(logging.WARNING)
+
+    workdir = tempfile.mkdtemp(prefix='reminders-bench-')
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'reminders.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+
+    with app.app_context():
+        db.create_all()
+        seed(args.reminders, args.users, args.charities, random.Random(args.seed))
+
+        statements = []
+
+        def record(conn, cursor, statement, *rest):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+
+        started = time.perf_counter()
+        if args.legacy:
+            sent = legacy_process_due_reminders()
+        else:
+            sent = ReminderService.process_due_reminders(batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+        left = Reminder.query.filter(Reminder.status == 'pending',
+                                     Reminder.scheduled_time <= datetime.utcnow()).count()
+        rescheduled = Reminder.query.filter(Reminder.status == 'pending',
+                                            Reminder.scheduled_time > datetime.utcnow()).count()
+
+    print(f"mode:           {'legacy' if args.legacy else f'batched ({args.batch_size}/batch)'}")
+    print(f"reminders:      {args.reminders}")
+    print(f"sent:           {sent}")
+    print(f"elapsed:        {elapsed:.2f}s")
+    print(f"throughput:     {sent / elapsed:.0f} reminders/s")
+    print(f"statements:     {len(statements)} ({len(statements) / max(sent, 1):.3f} per reminder)")
+    consistent = left == 0 and rescheduled == sent == args.reminders
+    print(f"due left:       {left}")
+    print(f"rescheduled:    {rescheduled}")
+    print('invariants:     ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
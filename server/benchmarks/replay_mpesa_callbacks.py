@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Replay harness for the M-Pesa callback endpoint.
+
+Seeds pending payments into a throwaway SQLite database, then fires synthetic
+Daraja callbacks at /api/v1/payments/verify through the Flask test client.
+A share of the deliveries are retries of an earlier callback and some of those
+carry a different result code, arriving after the original (out of order).
+
+Usage:
+    python benchmarks/replay_mpesa_callbacks.py --callbacks 10000 --duplicate-rate 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app
+from app.services.database import db
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services.donation_stats_service import DonationStatsService
+
+
+def build_callback(checkout_request_id, result_code):
+    items = [{'Name': 'Amount', 'Value': 100}]
+    if result_code == 0:
+        items.append({'Name': 'MpesaReceiptNumber', 'Value': f'R{checkout_request_id[-8:]}'})
+    return {'Body': {'stkCallback': {
+        'MerchantRequestID': f'MR_{checkout_request_id}',
+        'CheckoutRequestID': checkout_request_id,
+        'ResultCode': result_code,
+        'ResultDesc': 'ok' if result_code == 0 else 'Request cancelled by user',
+        'CallbackMetadata': {'Item': items}
+    }}}
+
+
+def seed(payment_count):
+    user = User(name='Replay Donor', email='replay@example.com', role='donor', password_hash='x')
+    owner = User(name='Replay Charity', email='charity@example.com', role='charity', password_hash='x')
+    db.session.add_all([user, owner])
+    db.session.flush()
+    charity = Charity(owner_id=owner.id, name='Replay Charity', status='approved')
+    db.session.add(charity)
+    db.session.flush()
+
+    db.session.bulk_insert_mappings(Donation, [
+        {'id': i, 'user_id': user.id, 'charity_id': charity.id, 'amount': 100, 'status': 'pending'}
+        for i in range(1, payment_count + 1)
+    ])
+    db.session.bulk_insert_mappings(Payment, [
+        {'donation_id': i, 'method': 'mpesa', 'transaction_id': f'ws_CO_{i:08d}', 'status': 'pending'}
+        for i in range(1, payment_count + 1)
+    ])
+    db.session.commit()
+
+
+def build_deliveries(total, duplicate_rate, rng):
+    unique = max(1, int(total * (1 - duplicate_rate)))
+    first = [(f'ws_CO_{i:08d}', 0 if rng.random() < 0.9 else 1032) for i in range(1, unique + 1)]
+    deliveries = list(first)
+    for _ in range(total - unique):
+        checkout_request_id, result_code = rng.choice(first)
+        # Roughly a third of the retries disagree with the original result
+        if rng.random() < 0.33:
+            result_code = 1032 if result_code == 0 else 0
+        deliveries.append((checkout_request_id, result_code))
+    rng.shuffle(deliveries)
+    return unique, deliveries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--callbacks', type=int, default=10000)
+    parser.add_argument('--duplicate-rate', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='mpesa-replay-')
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'replay.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        unique, deliveries = build_deliveries(args.callbacks, args.duplicate_rate, rng)
+        seed(unique)
+
+        client = app.test_client()
+        statuses = Counter()
+        latencies = []
+        started = time.perf_counter()
+        for checkout_request_id, result_code in deliveries:
+            t0 = time.perf_counter()
+            response = client.post('/api/v1/payments/verify', json=build_callback(checkout_request_id, result_code))
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.get_json().get('message', '').split(':')[0]] += 1
+            response.close()
+        elapsed = time.perf_counter() - started
+
+        pending = Payment.query.filter_by(status='pending').count()
+        completed = Donation.query.filter_by(status='complete').count()
+        rolled_up, _ = DonationStatsService.get('global')
+
+    latencies.sort()
+    print(f"callbacks:      {len(deliveries)} ({unique} unique payments)")
+    print(f"elapsed:        {elapsed:.2f}s")
+    print(f"throughput:     {len(deliveries) / elapsed:.0f} callbacks/s")
+    print(f"latency p50:    {latencies[len(latencies) // 2] * 1000:.2f}ms")
+    print(f"latency p99:    {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms")
+    for message, count in statuses.most_common():
+        print(f"  {message}: {count}")
+
+    consistent = pending == 0 and completed == rolled_up
+    print(f"pending left:   {pending}")
+    print(f"complete:       {completed} (rollup {rolled_up})")
+    print('invariants:     ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
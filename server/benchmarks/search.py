@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark for story and charity search.
+
+Fills a throwaway SQLite database with stories drawn from a large synthetic
+vocabulary (Zipf-distributed, so most words are rare) with a few topic words
+mixed in, and times the first page of results for a few queries two ways:
+
+  like     the old ``title LIKE '%q%' OR content LIKE '%q%'`` scan
+  fts      app.services.search_service (FTS5, ranked)
+
+Every FTS hit is checked to contain each query term in its title or content.
+The FTS5 index is maintained by triggers during the bulk insert, so the
+reported insert time includes indexing.
+
+Usage:
+    python benchmarks/search.py --stories 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app
+from app.services import search_service
+from app.services.database import db
+from app.models.charity import Charity
+from app.models.story import Story
+from app.models.user import User
+
+TOPICS = ('girls school water clean pads uniform books library mentor health clinic '
+          'community village support training teacher fees meal garden well farm').split()
+QUERIES = ('water', 'library', 'mentor', 'clin')
+
+
+def like_page(q, limit):
+    pattern = f'%{q}%'
+    return (Story.query.join(Story.charity).filter(Charity.status == 'approved')
+            .filter(db.or_(Story.title.ilike(pattern), Story.content.ilike(pattern)))
+            .order_by(Story.created_at.desc()).limit(limit).all())
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=200000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='search-bench-')
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'search.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    app.config['SLOW_QUERY_MS'] = float('inf')
+
+    ok = True
+    with app.app_context():
+        db.create_all()
+        owner = User(name='Owner', email='owner@example.com', role='charity')
+        owner.set_password('benchmark')
+        db.session.add(owner)
+        db.session.flush()
+        charities = [Charity(owner_id=owner.id, name=f'Charity {i}', status='approved') for i in range(50)]
+        db.session.add_all(charities)
+        db.session.commit()
+
+        vocabulary = [f'w{i:05d}' for i in range(20000)]
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+        def text(n):
+            words = rng.choices(vocabulary, weights, k=n)
+            if rng.random() < 0.05:
+                words[rng.randrange(n)] = rng.choice(TOPICS)
+            return ' '.join(words)
+
+        rows = [{'charity_id': rng.choice(charities).id, 'title': text(4), 'content': text(60)}
+                for _ in range(args.stories)]
+        started = time.perf_counter()
+        db.session.execute(Story.__table__.insert(), rows)
+        db.session.commit()
+        print(f"insert + index:   {time.perf_counter() - started:8.2f}s  ({args.stories} stories)")
+
+        for q in QUERIES:
+            like_seconds, _ = best_of(lambda: like_page(q, args.limit), args.repeat)
+            fts_seconds, hits = best_of(lambda: search_service.search(q, types=('story',), limit=args.limit),
+                                        args.repeat)
+            words = search_service.terms(q)
+            for _, story in search_service.load(hits):
+                text = f"{story['title']} {story['content']}".lower()
+                ok &= all(word in text for word in words[:-1]) and words[-1] in text
+            ok &= len(hits) == args.limit
+            print(f"{q + ':':17} like {like_seconds * 1000:8.1f}ms   fts {fts_seconds * 1000:8.1f}ms   "
+                  f"{like_seconds / fts_seconds:6.1f}x")
+
+    print('invariants:       ' + ('OK' if ok else 'VIOLATED'))
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for donation serialization.
+
+Inserts donations into a throwaway SQLite database and times turning all of
+them into a JSON document four ways:
+
+  orm + to_dict (old)   ORM instances, the hand-written per-row to_dict this
+                        layer replaced, stdlib json
+  orm + compiled        ORM instances, Donation.to_dict (compiled), stdlib json
+  rows + compiled       Donation.serializer over with_entities row tuples,
+                        stdlib json
+  rows + fast json      as above, encoded with app.services.fast_json
+                        (orjson when installed)
+
+Each time covers the query, serialization and encoding; the best of --repeat
+runs is reported.
+
+Usage:
+    python benchmarks/serializers.py --donations 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app
+from app.services import fast_json
+from app.services.database import db
+from app.models.donation import Donation
+
+
+def legacy_to_dict(donation):
+    return {
+        'id': donation.id,
+        'user_id': donation.user_id,
+        'charity_id': donation.charity_id,
+        'amount': str(donation.amount),
+        'recurring': donation.recurring,
+        'status': donation.status,
+        'is_anonymous': donation.is_anonymous,
+        'timestamp': donation.timestamp.isoformat()
+    }
+
+
+def orm_legacy():
+    return json.dumps([legacy_to_dict(d) for d in Donation.query.order_by(Donation.id)])
+
+
+def orm_compiled():
+    return json.dumps([d.to_dict() for d in Donation.query.order_by(Donation.id)])
+
+
+def rows_compiled():
+    serialize = Donation.serializer
+    return json.dumps([serialize(row) for row in serialize.select(Donation.query.order_by(Donation.id))])
+
+
+def rows_fast_json():
+    serialize = Donation.serializer
+    return fast_json.dumps([serialize(row) for row in serialize.select(Donation.query.order_by(Donation.id))])
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        body = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--donations', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # SQLite stores Numeric as float; the Decimal conversion is part of what is measured
+    warnings.filterwarnings('ignore', message='Dialect sqlite')
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='serializer-bench-')
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'serializers.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+
+    with app.app_context():
+        db.create_all()
+        start = datetime(2025, 1, 1)
+        db.session.execute(Donation.__table__.insert(), [{
+            'user_id': rng.randint(1, 5000),
+            'charity_id': rng.randint(1, 200),
+            'amount': rng.choice(('100.00', '250.00', '500.50', '1000.00')),
+            'recurring': rng.random() < 0.2,
+            'status': 'complete',
+            'is_anonymous': rng.random() < 0.1,
+            'timestamp': start + timedelta(seconds=i * 37),
+        } for i in range(args.donations)])
+        db.session.commit()
+
+        results = []
+        for label, fn in (('orm + to_dict (old)', orm_legacy), ('orm + compiled', orm_compiled),
+                          ('rows + compiled', rows_compiled), ('rows + fast json', rows_fast_json)):
+            seconds, body = best_of(fn, args.repeat)
+            results.append((label, seconds, json.loads(body)))
+
+    baseline = results[0][1]
+    for label, seconds, _ in results:
+        print(f"{label + ':':22} {seconds * 1000:8.1f}ms  {args.donations / seconds:10.0f} rows/s  "
+              f"{baseline / seconds:4.1f}x")
+    print(f"encoder:               {'orjson' if fast_json.orjson is not None else 'stdlib json'}")
+    consistent = all(documents == results[0][2] for _, _, documents in results)
+    print('invariants:            ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the user analytics summary tables.
+
+Generates synthetic users and donations into a throwaway SQLite database,
+then times a full refresh, an incremental refresh after a further slice of
+signups and donations, and the /users/analytics read. ``--scan`` also times
+the equivalent aggregates computed straight from the users and donations
+tables, which is what the endpoint would cost without the summary tables.
+
+Donations are generated in timestamp order with a skew towards a few popular
+charities and repeat donors; about 3% are failed or abandoned.
+
+Usage:
+    python benchmarks/user_analytics.py --users 1000000 --donations 10000000
+    python benchmarks/user_analytics.py --users 50000 --donations 500000 --scan
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func
+from app import create_app
+from app.services.database import db
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.user_analytics import AnalyticsCounter
+from app.services.user_analytics_service import UserAnalyticsService, DONORS
+
+CHUNK = 50000
+START = datetime(2023, 1, 1)
+DAYS = 730
+
+
+def generate_users(first_id, count, rng):
+    users = Donation.metadata.tables['users']
+    for start in range(first_id, first_id + count, CHUNK):
+        db.session.execute(users.insert(), [{
+            'id': i,
+            'name': f'User {i}',
+            'email': f'user{i}@example.com',
+            'password_hash': 'x',
+            'role': 'donor' if rng.random() < 0.97 else 'charity',
+            'is_anonymous': False,
+            'created_at': START + timedelta(days=DAYS * (i - 1) / (first_id + count), seconds=rng.randint(0, 86399)),
+        } for i in range(start, min(start + CHUNK, first_id + count))])
+        db.session.commit()
+
+
+def generate_donations(count, user_count, charity_count, rng, start_day=0, days=DAYS):
+    donations = Donation.metadata.tables['donations']
+    # Pareto-ish skew: a minority of users and charities get most donations
+    weights = [1 / (i + 1) for i in range(charity_count)]
+    charities = rng.choices(range(1, charity_count + 1), weights=weights, k=10000)
+    done = 0
+    while done < count:
+        size = min(CHUNK, count - done)
+        offsets = sorted(start_day + days * (done + i) / count for i in range(size))
+        db.session.execute(donations.insert(), [{
+            'user_id': min(user_count, int(user_count * rng.random() ** 2) + 1),
+            'charity_id': rng.choice(charities),
+            'amount': rng.choice((100, 250, 500, 1000)),
+            'recurring': rng.random() < 0.2,
+            'status': 'complete' if rng.random() < 0.97 else rng.choice(('failed', 'pending')),
+            'is_anonymous': False,
+            'timestamp': START + timedelta(days=offset, seconds=rng.randint(0, 3600)),
+        } for offset in offsets])
+        db.session.commit()
+        done += size
+
+
+def scan_aggregates(top):
+    """The endpoint's numbers computed from the raw tables, for comparison"""
+    complete = Donation.status == 'complete'
+    donors = db.session.query(func.count(func.distinct(Donation.user_id))).filter(complete).scalar()
+    per_charity = db.session.query(
+        Donation.charity_id, func.count(func.distinct(Donation.user_id)).label('donors')
+    ).filter(complete).group_by(Donation.charity_id).order_by(db.desc('donors'), Donation.charity_id).limit(top).all()
+    db.session.query(func.date(User.created_at), User.role, func.count()).group_by(
+        func.date(User.created_at), User.role).all()
+    return donors, [tuple(row) for row in per_charity]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--donations', type=int, default=10000000)
+    parser.add_argument('--charities', type=int, default=500)
+    parser.add_argument('--increment', type=float, default=0.01, help='fraction added before the incremental refresh')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--scan', action='store_true', help='also time the aggregates over the raw tables')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.getLogger('app.services.user_analytics_service').setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+
+    workdir = tempfile.mkdtemp(prefix='user-analytics-bench-')
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'analytics.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+
+    with app.app_context():
+        @event.listens_for(db.engine, 'connect')
+        def fast_writes(dbapi_connection, record):
+            # Generation speed only; the refresh itself runs with these too
+            dbapi_connection.execute('PRAGMA journal_mode=WAL')
+            dbapi_connection.execute('PRAGMA synchronous=NORMAL')
+
+        db.create_all()
+        started = time.perf_counter()
+        generate_users(1, args.users, rng)
+        db.session.bulk_insert_mappings(Charity, [
+            {'id': i, 'owner_id': 1, 'name': f'Charity {i}', 'status': 'approved'}
+            for i in range(1, args.charities + 1)
+        ])
+        db.session.commit()
+        generate_donations(args.donations, args.users, args.charities, rng)
+        generated = time.perf_counter() - started
+
+        full = UserAnalyticsService.refresh(args.batch_size)
+
+        extra_users = int(args.users * args.increment)
+        extra_donations = int(args.donations * args.increment)
+        generate_users(args.users + 1, extra_users, rng)
+        generate_donations(extra_donations, args.users + extra_users, args.charities, rng,
+                           start_day=DAYS, days=max(1, int(DAYS * args.increment)))
+        incremental = UserAnalyticsService.refresh(args.batch_size)
+
+        admin = User(name='Admin', email='admin@example.com', password_hash='x', role='admin')
+        db.session.add(admin)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+        client = app.test_client()
+        reads = []
+        for _ in range(5):
+            read_started = time.perf_counter()
+            response = client.get('/api/v1/users/analytics', headers={'Authorization': f'Bearer {token}'})
+            reads.append(time.perf_counter() - read_started)
+        analytics = response.get_json()['analytics']
+
+        scan_seconds = None
+        if args.scan:
+            scan_started = time.perf_counter()
+            scan_donors, scan_top = scan_aggregates(10)
+            scan_seconds = time.perf_counter() - scan_started
+        else:
+            scan_donors = db.session.query(func.count(func.distinct(Donation.user_id))).filter(
+                Donation.status == 'complete').scalar()
+            scan_top = None
+        counted = db.session.query(AnalyticsCounter.value).filter_by(name=DONORS).scalar()
+
+    total_donations = args.donations + extra_donations
+    print(f"users:          {args.users + extra_users + 1}")
+    print(f"donations:      {total_donations}")
+    print(f"generate:       {generated:.1f}s")
+    print(f"full refresh:   {full.seconds:.1f}s ({full.donations / max(full.seconds, 1e-9):.0f} donations/s)")
+    print(f"incremental:    {incremental.seconds:.2f}s ({incremental.users} users, {incremental.donations} donations)")
+    print(f"endpoint read:  {min(reads) * 1000:.1f}ms best of {len(reads)} ({response.status_code})")
+    if scan_seconds is not None:
+        print(f"raw-table scan: {scan_seconds:.2f}s")
+    consistent = response.status_code == 200 and counted == scan_donors == analytics['conversion']['donors']
+    if scan_top is not None:
+        consistent = consistent and scan_top == [(c['charity_id'], c['donors']) for c in analytics['top_charities']]
+    print('invariants:     ' + ('OK' if consistent else 'VIOLATED'))
+    return 0 if consistent else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
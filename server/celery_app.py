@@ -7,7 +7,8 @@ def make_celery(app):
     celery = Celery(
         app.import_name,
         broker=app.config['CELERY_BROKER_URL'],
-        backend=app.config['CELERY_RESULT_BACKEND']
+        backend=app.config['CELERY_RESULT_BACKEND'],
+        include=['app.services.tasks']
     )
     
     # Update Celery configuration
@@ -22,6 +23,20 @@ def make_celery(app):
         task_soft_time_limit=25 * 60,  # 25 minutes
         worker_prefetch_multiplier=1,
         worker_max_tasks_per_child=1000,
+        beat_schedule={
+            'dispatch-due-reminders': {
+                'task': 'app.services.tasks.process_pending_reminders',
+                'schedule': app.config['REMINDER_DISPATCH_INTERVAL'],
+            },
+            'cleanup-old-reminders': {
+                'task': 'app.services.tasks.cleanup_old_reminders',
+                'schedule': 24 * 60 * 60,
+            },
+            'refresh-user-analytics': {
+                'task': 'app.services.tasks.refresh_user_analytics',
+                'schedule': app.config['ANALYTICS_REFRESH_INTERVAL'],
+            },
+        },
     )
     
     # Production-specific settings
@@ -3,6 +3,63 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Connections all web workers may hold together (Postgres defaults to max_connections=100)
+DEFAULT_MAX_CONNECTIONS = 90
+
+
+def pool_settings(environ=os.environ):
+    """Per-process pool size and overflow for the web workers.
+
+    Each gunicorn thread holds at most one session connection, and so does
+    each in-process background worker; the overflow leaves every request
+    thread room for a second connection (``engine.connect()`` alongside the
+    session). DB_MAX_CONNECTIONS caps the total across WEB_CONCURRENCY
+    workers. Threads beyond ADMISSION_MAX_IN_FLIGHT only ever answer 503 and
+    need no connection. DB_POOL_SIZE and DB_MAX_OVERFLOW override the
+    derived values.
+    """
+    workers = max(1, int(environ.get('WEB_CONCURRENCY', '1')))
+    threads = max(1, int(environ.get('GUNICORN_THREADS', '1')))
+    admitted = int(environ.get('ADMISSION_MAX_IN_FLIGHT', '0'))
+    if admitted > 0:
+        threads = min(threads, admitted)
+    use_redis = environ.get('USE_REDIS', 'true').lower() == 'true'
+    executor = environ.get('BACKGROUND_EXECUTOR', 'celery' if use_redis else 'thread')
+    background = int(environ.get('BACKGROUND_WORKERS', '2')) if executor == 'thread' else 0
+
+    per_worker = max(1, int(environ.get('DB_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)) // workers)
+    pool_size = int(environ.get('DB_POOL_SIZE', min(threads + background, per_worker)))
+    max_overflow = int(environ.get('DB_MAX_OVERFLOW', max(0, min(threads, per_worker - pool_size))))
+    return pool_size, max_overflow
+
+
+def database_engine_options(database_url, environ=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``database_url``"""
+    if database_url.startswith('sqlite'):
+        # SQLite settings (no pooling)
+        return {'pool_pre_ping': True}
+
+    if environ.get('DB_PGBOUNCER', 'false').lower() == 'true':
+        # Transaction pooling: PgBouncer owns the pool, so open a connection per
+        # checkout and never rely on session state such as prepared statements.
+        # psycopg2 never prepares server-side; psycopg 3 must be told not to.
+        from sqlalchemy.pool import NullPool
+        options = {'poolclass': NullPool}
+        if database_url.startswith('postgresql+psycopg:'):
+            options['connect_args'] = {'prepare_threshold': None}
+        return options
+
+    pool_size, max_overflow = pool_settings(environ)
+    return {
+        'pool_pre_ping': True,
+        'pool_recycle': int(environ.get('DB_POOL_RECYCLE', '300')),
+        # Size against db_pool_checkout_seconds on /api/v1/health/metrics
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': float(environ.get('DB_POOL_TIMEOUT', '10')),
+    }
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'a_very_secret_key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'super_secret_jwt_key')
@@ -31,6 +88,10 @@ class Config:
         CELERY_BROKER_URL = f"db+{DATABASE_URL}"
         CELERY_RESULT_BACKEND = f"db+{DATABASE_URL}"
     
+    # Background jobs: celery with a broker, otherwise an in-process thread pool
+    BACKGROUND_EXECUTOR = os.getenv('BACKGROUND_EXECUTOR', 'celery' if USE_REDIS else 'thread')
+    BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', '2'))
+    
     # Session Configuration
     SESSION_TYPE = os.getenv('SESSION_TYPE', 'redis' if USE_REDIS else 'sqlalchemy')
     
@@ -40,22 +101,120 @@ class Config:
     MPESA_BUSINESS_SHORT_CODE = os.getenv('MPESA_BUSINESS_SHORT_CODE')
     MPESA_PASSKEY = os.getenv('MPESA_PASSKEY')
     MPESA_CALLBACK_URL = os.getenv('MPESA_CALLBACK_URL', 'https://yourdomain.com/api/v1/payments/verify')
+    MPESA_BASE_URL = os.getenv('MPESA_BASE_URL', 'https://sandbox.safaricom.co.ke')
+    MPESA_CONNECT_TIMEOUT = float(os.getenv('MPESA_CONNECT_TIMEOUT', '3.05'))
+    MPESA_READ_TIMEOUT = float(os.getenv('MPESA_READ_TIMEOUT', '10'))
+    MPESA_POOL_SIZE = int(os.getenv('MPESA_POOL_SIZE', '4'))
+    MPESA_MAX_RETRIES = int(os.getenv('MPESA_MAX_RETRIES', '2'))
+    
+    # Authorization cache (per worker process)
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', '60'))
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '4096'))
+    APPROVED_CHARITY_CACHE_TTL = int(os.getenv('APPROVED_CHARITY_CACHE_TTL', '300'))
+    DONATION_BATCH_MAX = int(os.getenv('DONATION_BATCH_MAX', '1000'))
+    
+    # Reminder processing
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', '500'))
+    REMINDER_MAX_BATCHES_PER_RUN = int(os.getenv('REMINDER_MAX_BATCHES_PER_RUN', '200'))
+    REMINDER_DISPATCH_INTERVAL = int(os.getenv('REMINDER_DISPATCH_INTERVAL', '300'))
+    REMINDER_PURGE_BATCH_SIZE = int(os.getenv('REMINDER_PURGE_BATCH_SIZE', '5000'))
+    REMINDER_ARCHIVE_PATH = os.getenv('REMINDER_ARCHIVE_PATH')
+    
+    # SQL instrumentation: Server-Timing headers, /health/metrics and the slow-query log
+    SQL_METRICS_ENABLED = os.getenv('SQL_METRICS_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    # Bearer token for /health/metrics; the endpoint answers 401 while unset
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # User analytics summary tables (refreshed by a periodic job)
+    ANALYTICS_REFRESH_INTERVAL = int(os.getenv('ANALYTICS_REFRESH_INTERVAL', '900'))
+    ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', '20000'))
+    ANALYTICS_SETTLE_HOURS = int(os.getenv('ANALYTICS_SETTLE_HOURS', '24'))
+
+    # Public response cache (charity and story reads)
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'redis' if USE_REDIS else 'memory')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '60'))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))
+    RESPONSE_CACHE_MAX_AGE = int(os.getenv('RESPONSE_CACHE_MAX_AGE', '30'))
+    
+    # List endpoint pagination
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', '50'))
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', '200'))
+    PAGINATION_STREAM_CHUNK_SIZE = int(os.getenv('PAGINATION_STREAM_CHUNK_SIZE', '500'))
+
+    # Delta sync (?since=) for list endpoints; tombstones are pruned by `flask prune-tombstones`
+    DELTA_SYNC_OVERLAP = int(os.getenv('DELTA_SYNC_OVERLAP', '5'))
+    DELTA_SYNC_MAX_ROWS = int(os.getenv('DELTA_SYNC_MAX_ROWS', '1000'))
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+
+    # Payment status event streams; each open stream holds a gunicorn thread
+    PAYMENT_EVENTS_BACKEND = os.getenv('PAYMENT_EVENTS_BACKEND', 'redis' if USE_REDIS else 'memory')
+    # Half the threads; a single-threaded worker serves none, as one stream would hold its only
+    # thread for PAYMENT_EVENTS_MAX_AGE seconds (clients poll the status endpoint instead)
+    PAYMENT_EVENTS_MAX_STREAMS = int(os.getenv(
+        'PAYMENT_EVENTS_MAX_STREAMS', str(int(os.getenv('GUNICORN_THREADS', '1')) // 2)))
+    PAYMENT_EVENTS_HEARTBEAT = int(os.getenv('PAYMENT_EVENTS_HEARTBEAT', '15'))
+    PAYMENT_EVENTS_MAX_AGE = int(os.getenv('PAYMENT_EVENTS_MAX_AGE', '120'))
+    # Lifetime of the signed payment_reference; covers the STK prompt and a late callback
+    PAYMENT_EVENTS_REFERENCE_MAX_AGE = int(os.getenv('PAYMENT_EVENTS_REFERENCE_MAX_AGE', '900'))
+    
+    # Encode JSON responses with orjson when it is installed
+    JSON_FAST = os.getenv('JSON_FAST', 'true').lower() == 'true'
+    
+    # Password hashing (any werkzeug method; older hashes are upgraded on login)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', '16'))
+    
+    # Failed-login throttle, checked before the password hash
+    LOGIN_MAX_FAILURES_PER_EMAIL = int(os.getenv('LOGIN_MAX_FAILURES_PER_EMAIL', '5'))
+    LOGIN_MAX_FAILURES_PER_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_IP', '50'))
+    LOGIN_FAILURE_WINDOW = int(os.getenv('LOGIN_FAILURE_WINDOW', '300'))
+    
+    # Token-bucket rate limits ("<count>/<second|minute|hour|day>") per client IP and per JWT identity
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'redis' if USE_REDIS else 'memory')
+    RATE_LIMIT_DEFAULT = os.getenv('RATE_LIMIT_DEFAULT', '300/minute')
+    RATE_LIMIT_LOGIN = os.getenv('RATE_LIMIT_LOGIN', '10/minute')
+    RATE_LIMIT_PAYMENTS = os.getenv('RATE_LIMIT_PAYMENTS', '5/minute')
+    RATE_LIMIT_DONATIONS = os.getenv('RATE_LIMIT_DONATIONS', '10/minute')
+    
+    # Admission control: requests beyond this many in flight get a 503 (0 disables the gate)
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '0'))
+    ADMISSION_MAX_PER_CLIENT = int(os.getenv('ADMISSION_MAX_PER_CLIENT', '2'))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '0.5'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+    
+    # Reverse proxies in front of the app that append to X-Forwarded-For (1 on Render)
+    TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+    
+    # Fast start: skip CLI-only setup (Flask-Migrate/alembic) in web workers
+    FAST_START = os.getenv('FAST_START', 'false').lower() == 'true'
+    
+    # `flask release` waits this long for another instance's release to finish
+    RELEASE_LOCK_TIMEOUT = float(os.getenv('RELEASE_LOCK_TIMEOUT', '600'))
     
     # Environment detection
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
     DEBUG = FLASK_ENV == 'development'
     
-    # Database engine options (conditional based on database type)
-    if DATABASE_URL and not DATABASE_URL.startswith('sqlite'):
-        # PostgreSQL/MySQL settings
-        SQLALCHEMY_ENGINE_OPTIONS = {
-            'pool_pre_ping': True,
-            'pool_recycle': 300,
-            'pool_size': 5,  # Reduced for free plan
-            'max_overflow': 0,  # No overflow for free plan
-        }
-    else:
-        # SQLite settings (no pooling)
-        SQLALCHEMY_ENGINE_OPTIONS = {
-            'pool_pre_ping': True,
-        }
+    # Database engine options: pool sized from WEB_CONCURRENCY/GUNICORN_THREADS,
+    # or DB_PGBOUNCER=true behind PgBouncer in transaction-pooling mode
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(DATABASE_URL)
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(SQLALCHEMY_DATABASE_URI)
+
+
+def get_config(env=None):
+    """The configuration class for ``env`` (default: FLASK_ENV)"""
+    env = env or os.getenv('FLASK_ENV', 'development')
+    if env == 'production':
+        from config.production import ProductionConfig
+        return ProductionConfig
+    if env == 'testing':
+        return TestingConfig
+    return Config
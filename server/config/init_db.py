@@ -8,6 +8,16 @@ from app.models.story import Story
 from app.models.beneficiary import Beneficiary
 from app.models.inventory import Inventory
 from app.models.reminder import Reminder
+from app.models.donation_stat import DonationStat
+from app.models.user_analytics import (
+    SignupStat, DonorSummary, DonorMonth, CharityDonor, CohortRetention, AnalyticsCounter
+)
+from app.services import delta_sync
+from app.services.donation_stats_service import DonationStatsService
+from app.services.release_service import ReleaseService
+from app.services.reminder_service import ReminderService
+from app.services.user_analytics_service import UserAnalyticsService
+import click
 
 def init_db_command():
     """Clear existing data and create new tables."""
@@ -15,5 +25,50 @@ def init_db_command():
     db.create_all()
     print("Initialized the database.")
 
+def rebuild_donation_stats_command():
+    """Recompute the donation_stats rollup from the donations table."""
+    rows = DonationStatsService.rebuild()
+    print(f"Rebuilt {rows} donation stat rows.")
+
+@click.option('--days', default=180, show_default=True, help='Purge sent/failed reminders older than this.')
+@click.option('--batch-size', default=None, type=int, help='Rows per DELETE (REMINDER_PURGE_BATCH_SIZE).')
+@click.option('--archive', default=None, type=click.Path(dir_okay=False), help='Append purged rows to this .jsonl.gz file.')
+def purge_reminders_command(days, batch_size, archive):
+    """Delete old processed reminders in primary-key batches."""
+    result = ReminderService.purge_old_reminders(days, batch_size, archive)
+    print(f"Purged {result.deleted} reminders in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s).")
+
+@click.option('--full', is_flag=True, help='Clear the summary tables and recompute them from scratch.')
+@click.option('--batch-size', default=None, type=int, help='Rows per chunk (ANALYTICS_BATCH_SIZE).')
+def refresh_user_analytics_command(full, batch_size):
+    """Fold new users and completed donations into the user analytics tables."""
+    refresh = UserAnalyticsService.rebuild if full else UserAnalyticsService.refresh
+    result = refresh(batch_size)
+    print(f"Applied {result.users} users and {result.donations} donations in {result.seconds:.2f}s.")
+
+@click.option('--days', default=None, type=int, help='Keep tombstones this many days (TOMBSTONE_RETENTION_DAYS).')
+def prune_tombstones_command(days):
+    """Delete tombstones older than any ?since= token still accepted."""
+    deleted = delta_sync.prune_tombstones(days)
+    print(f"Pruned {deleted} tombstones.")
+
+@click.option('--skip-seed', is_flag=True, help='Only run migrations.')
+@click.option('--timeout', default=None, type=float, help='Seconds to wait for a concurrent release (RELEASE_LOCK_TIMEOUT).')
+def release_command(skip_seed, timeout):
+    """Run migrations and seed the admin user, once per deploy."""
+    result = ReleaseService.release(seed=not skip_seed, timeout=timeout)
+    if result.from_revision == result.to_revision:
+        print(f"Schema already at {result.to_revision}.")
+    else:
+        print(f"Migrated schema from {result.from_revision} to {result.to_revision}.")
+    if result.admin_created:
+        print("Created the default admin user.")
+    print(f"Release finished in {result.seconds:.2f}s (waited {result.lock_wait:.2f}s for the lock).")
+
 def init_app(app):
     app.cli.add_command(app.cli.command('init-db')(init_db_command))
+    app.cli.add_command(app.cli.command('rebuild-donation-stats')(rebuild_donation_stats_command))
+    app.cli.add_command(app.cli.command('purge-reminders')(purge_reminders_command))
+    app.cli.add_command(app.cli.command('refresh-user-analytics')(refresh_user_analytics_command))
+    app.cli.add_command(app.cli.command('prune-tombstones')(prune_tombstones_command))
+    app.cli.add_command(app.cli.command('release')(release_command))
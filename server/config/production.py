@@ -1,41 +1,19 @@
 import os
-from dotenv import load_dotenv
+from config.config import Config
 
-load_dotenv()
 
-class ProductionConfig:
-    """Production configuration"""
+class ProductionConfig(Config):
+    """Production configuration, selected by FLASK_ENV=production"""
     
-    # Basic Flask Configuration
-    SECRET_KEY = os.getenv('SECRET_KEY')
-    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+    DEBUG = False
     
-    # Database Configuration
-    DATABASE_URL = os.getenv('DATABASE_URL')
-    if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
-        DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
-    
-    SQLALCHEMY_DATABASE_URI = DATABASE_URL
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-        'connect_args': {
-            'connect_timeout': 10,
+    # Database Configuration: fail fast instead of hanging a worker on connect
+    SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS)
+    if Config.SQLALCHEMY_DATABASE_URI.startswith('postgresql'):
+        SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {
+            **SQLALCHEMY_ENGINE_OPTIONS.get('connect_args', {}),
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '10')),
         }
-    }
-    
-    # Redis/Celery Configuration
-    REDIS_URL = os.getenv('REDIS_URL', os.getenv('CELERY_BROKER_URL'))
-    CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
-    CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
-    
-    # Mpesa Configuration
-    MPESA_CONSUMER_KEY = os.getenv('MPESA_CONSUMER_KEY')
-    MPESA_CONSUMER_SECRET = os.getenv('MPESA_CONSUMER_SECRET')
-    MPESA_BUSINESS_SHORT_CODE = os.getenv('MPESA_BUSINESS_SHORT_CODE')
-    MPESA_PASSKEY = os.getenv('MPESA_PASSKEY')
-    MPESA_CALLBACK_URL = os.getenv('MPESA_CALLBACK_URL')
     
     # Security Settings
     SESSION_COOKIE_SECURE = True
@@ -68,4 +46,4 @@ class ProductionConfig:
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
         
-        return True
\ No newline at end of file
+        return True
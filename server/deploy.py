@@ -71,22 +71,11 @@ def initialize_database(app, db):
     print("🗄️  Initializing database...")
     
     try:
-        # Create all database tables
-        print("📋 Creating database tables...")
-        db.create_all()
-        print("✅ Database tables created successfully")
-        
-        # Run database migrations if available
+        # Migrations run under the same lock as `flask release`
+        from app.services.release_service import ReleaseService
         print("🔄 Running database migrations...")
-        try:
-            from flask_migrate import upgrade
-            upgrade()
-            print("✅ Database migrations completed successfully")
-        except ImportError:
-            print("⚠️  Flask-Migrate not available, skipping migrations")
-        except Exception as e:
-            print(f"⚠️  Migration warning: {e}")
-            # Continue deployment even if migrations fail
+        result = ReleaseService.release(seed=False)
+        print(f"✅ Database schema at revision {result.to_revision}")
         
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
@@ -0,0 +1,13 @@
+"""
+Gunicorn settings, loaded automatically from the working directory.
+config.config sizes each worker's database pool from the same
+WEB_CONCURRENCY and GUNICORN_THREADS variables.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+timeout = 120
+max_requests = 1000
+max_requests_jitter = 100
@@ -0,0 +1,62 @@
+"""Add indexes for hot query shapes.
+
+Revision ID: 3b8e1f2c9a71
+Revises: da75f54f7701
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1f2c9a71'
+down_revision = 'da75f54f7701'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_donations_charity_id_status', 'donations', ['charity_id', 'status']),
+    ('ix_donations_charity_id_timestamp', 'donations', ['charity_id', 'timestamp']),
+    ('ix_donations_user_id_timestamp', 'donations', ['user_id', 'timestamp']),
+    ('ix_donations_status_timestamp', 'donations', ['status', 'timestamp']),
+    ('ix_payments_transaction_id', 'payments', ['transaction_id']),
+    ('ix_payments_donation_id', 'payments', ['donation_id']),
+    ('ix_reminders_status_scheduled_time', 'reminders', ['status', 'scheduled_time']),
+    ('ix_charities_owner_id', 'charities', ['owner_id']),
+    ('ix_charities_status_created_at', 'charities', ['status', 'created_at']),
+    ('ix_charity_applications_user_id', 'charity_applications', ['user_id']),
+    ('ix_charity_applications_status', 'charity_applications', ['status']),
+    ('ix_charity_applications_submitted_at', 'charity_applications', ['submitted_at']),
+    ('ix_stories_created_at', 'stories', ['created_at']),
+    ('ix_stories_charity_id', 'stories', ['charity_id']),
+    ('ix_users_created_at', 'users', ['created_at']),
+    ('ix_inventory_charity_id', 'inventory', ['charity_id']),
+    ('ix_beneficiaries_charity_id', 'beneficiaries', ['charity_id']),
+]
+
+
+def _existing_indexes():
+    # reminders is created later (c6e2b8d4f173) and databases bootstrapped with
+    # db.create_all already carry the model-declared indexes, so skip whatever is
+    # missing or present
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table: {ix['name'] for ix in inspector.get_indexes(table)}
+        for table in inspector.get_table_names()
+    }
+
+
+def upgrade():
+    existing = _existing_indexes()
+    for name, table, columns in INDEXES:
+        if table in existing and name not in existing[table]:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    for name, table, _ in reversed(INDEXES):
+        if name in existing.get(table, ()):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,34 @@
+"""Add donation_stats rollup table.
+
+Revision ID: 7c4d2a9e5b13
+Revises: 3b8e1f2c9a71
+Create Date: 2026-10-18 10:03:27.540918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4d2a9e5b13'
+down_revision = '3b8e1f2c9a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('donation_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=16), nullable=False),
+    sa.Column('scope_key', sa.String(length=32), nullable=False),
+    sa.Column('donation_count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'scope_key', name='uq_donation_stats_scope')
+    )
+    # Run `flask rebuild-donation-stats` afterwards to backfill existing donations
+
+
+def downgrade():
+    op.drop_table('donation_stats')
@@ -0,0 +1,32 @@
+"""Add payments.receipt_number and the pending payment status.
+
+Revision ID: 9e6f3b1d8c42
+Revises: 7c4d2a9e5b13
+Create Date: 2026-10-18 11:21:05.870412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e6f3b1d8c42'
+down_revision = '7c4d2a9e5b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('receipt_number', sa.String(length=64), nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older servers
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE payment_status_enum ADD VALUE IF NOT EXISTS 'pending' BEFORE 'success'")
+
+
+def downgrade():
+    # PostgreSQL cannot drop enum values; 'pending' is left in payment_status_enum
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_column('receipt_number')
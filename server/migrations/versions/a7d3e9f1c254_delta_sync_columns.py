@@ -0,0 +1,63 @@
+"""updated_at columns and tombstones for delta sync.
+
+Revision ID: a7d3e9f1c254
+Revises: f4c8a2d6b319
+Create Date: 2026-10-18 19:27:05.116930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9f1c254'
+down_revision = 'f4c8a2d6b319'
+branch_labels = None
+depends_on = None
+
+
+# Table and the column existing rows take their updated_at from
+SYNCED_TABLES = [
+    ('charities', 'created_at'),
+    ('stories', 'created_at'),
+    ('donations', 'timestamp'),
+    ('inventory', None),
+    ('beneficiaries', None),
+]
+
+INDEXES = [
+    ('ix_charities_updated_at', 'charities', ['updated_at']),
+    ('ix_stories_updated_at', 'stories', ['updated_at']),
+    ('ix_donations_user_id_updated_at', 'donations', ['user_id', 'updated_at']),
+    ('ix_donations_charity_id_updated_at', 'donations', ['charity_id', 'updated_at']),
+    ('ix_inventory_charity_id_updated_at', 'inventory', ['charity_id', 'updated_at']),
+    ('ix_beneficiaries_charity_id_updated_at', 'beneficiaries', ['charity_id', 'updated_at']),
+    ('ix_tombstones_table_name_deleted_at', 'tombstones', ['table_name', 'deleted_at']),
+]
+
+
+def upgrade():
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=32), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('charity_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for table, source in SYNCED_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        value = f'COALESCE({source}, CURRENT_TIMESTAMP)' if source else 'CURRENT_TIMESTAMP'
+        op.execute(f'UPDATE {table} SET updated_at = {value}')
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    for table, _ in SYNCED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
+    op.drop_table('tombstones')
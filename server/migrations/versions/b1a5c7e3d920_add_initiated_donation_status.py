@@ -0,0 +1,26 @@
+"""Add the initiated donation status.
+
+Revision ID: b1a5c7e3d920
+Revises: 9e6f3b1d8c42
+Create Date: 2026-10-18 12:40:52.301776
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1a5c7e3d920'
+down_revision = '9e6f3b1d8c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE donation_status_enum ADD VALUE IF NOT EXISTS 'initiated' AFTER 'pending'")
+
+
+def downgrade():
+    # PostgreSQL cannot drop enum values; move in-flight donations back to pending instead
+    op.execute("UPDATE donations SET status = 'pending' WHERE status = 'initiated'")
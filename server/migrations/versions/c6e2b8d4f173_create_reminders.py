@@ -0,0 +1,52 @@
+"""Create the reminders table.
+
+Revision ID: c6e2b8d4f173
+Revises: a7d3e9f1c254
+Create Date: 2026-10-19 10:04:27.583912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e2b8d4f173'
+down_revision = 'a7d3e9f1c254'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_reminders_status_scheduled_time', 'reminders', ['status', 'scheduled_time']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Databases bootstrapped with the old db.create_all already have the
+    # table, but not the index, which the model gained later
+    if 'reminders' in inspector.get_table_names():
+        existing = {index['name'] for index in inspector.get_indexes('reminders')}
+        for name, table, columns in INDEXES:
+            if name not in existing:
+                op.create_index(name, table, columns, unique=False)
+        return
+    op.create_table('reminders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('charity_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('scheduled_time', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['charity_id'], ['charities.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    op.drop_table('reminders')
@@ -0,0 +1,64 @@
+"""Per-charity analytics rollups and covering index.
+
+Revision ID: d2f7a9c4e816
+Revises: b1a5c7e3d920
+Create Date: 2026-10-18 15:03:27.640912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7a9c4e816'
+down_revision = 'b1a5c7e3d920'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_donations_charity_id_status_timestamp', 'donations', ['charity_id', 'status', 'timestamp', 'user_id']),
+    ('ix_donation_stats_scope_key_count', 'donation_stats', ['scope', 'scope_key', 'donation_count']),
+]
+
+# Superseded by the covering index above, which shares its leading columns
+DROPPED_INDEXES = [
+    ('ix_donations_charity_id_status', 'donations', ['charity_id', 'status']),
+]
+
+NEW_SCOPES = ('charity_day', 'charity_day_rec', 'charity_donor')
+
+
+def _backfill():
+    if op.get_bind().dialect.name == 'postgresql':
+        day = "to_char(timestamp, 'YYYY-MM-DD')"
+    else:
+        day = 'date(timestamp)'
+    complete = "status = 'complete'"
+    for scope, key, where in (
+        ('charity_day', f"charity_id || ':' || {day}", 'timestamp IS NOT NULL'),
+        ('charity_day_rec', f"charity_id || ':' || {day}", 'timestamp IS NOT NULL AND recurring'),
+        ('charity_donor', "charity_id || ':' || user_id", '1 = 1'),
+    ):
+        op.execute(
+            "INSERT INTO donation_stats (scope, scope_key, donation_count, total_amount, updated_at) "
+            f"SELECT '{scope}', {key}, COUNT(id), SUM(amount), CURRENT_TIMESTAMP FROM donations "
+            f"WHERE {complete} AND {where} GROUP BY {key}"
+        )
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    for name, table, _ in DROPPED_INDEXES:
+        op.drop_index(name, table_name=table)
+    _backfill()
+
+
+def downgrade():
+    op.execute(sa.text('DELETE FROM donation_stats WHERE scope IN :scopes').bindparams(
+        sa.bindparam('scopes', NEW_SCOPES, expanding=True)))
+    for name, table, columns in DROPPED_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,67 @@
+"""Add user analytics summary tables.
+
+Revision ID: e8b3c5d1a627
+Revises: d2f7a9c4e816
+Create Date: 2026-10-18 16:41:09.213574
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3c5d1a627'
+down_revision = 'd2f7a9c4e816'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('signup_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.String(length=10), nullable=False),
+    sa.Column('role', sa.String(length=16), nullable=False),
+    sa.Column('signups', sa.Integer(), nullable=False),
+    sa.Column('converted', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'role', name='uq_signup_stats_day_role')
+    )
+    op.create_table('donor_summaries',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('first_month', sa.String(length=7), nullable=False),
+    sa.Column('donation_count', sa.Integer(), nullable=False),
+    sa.Column('last_donation_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('donor_months',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+    op.create_table('charity_donors',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('charity_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'charity_id')
+    )
+    op.create_table('cohort_retention',
+    sa.Column('cohort_month', sa.String(length=7), nullable=False),
+    sa.Column('months_since', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('donors', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('cohort_month', 'months_since')
+    )
+    op.create_table('analytics_counters',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Run `flask refresh-user-analytics` afterwards to fold in existing users and donations
+
+
+def downgrade():
+    op.drop_table('analytics_counters')
+    op.drop_table('cohort_retention')
+    op.drop_table('charity_donors')
+    op.drop_table('donor_months')
+    op.drop_table('donor_summaries')
+    op.drop_table('signup_stats')
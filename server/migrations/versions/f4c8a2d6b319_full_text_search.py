@@ -0,0 +1,64 @@
+"""Full-text search indexes for stories and charities.
+
+Revision ID: f4c8a2d6b319
+Revises: e8b3c5d1a627
+Create Date: 2026-10-18 18:12:44.508213
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a2d6b319'
+down_revision = 'e8b3c5d1a627'
+branch_labels = None
+depends_on = None
+
+
+# (table, title column, body column)
+TABLES = [
+    ('stories', 'title', 'content'),
+    ('charities', 'name', 'description'),
+]
+
+
+def _sqlite_upgrade(table, title, body):
+    fts = f'{table}_fts'
+    op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5("
+               f"{title}, {body}, content='{table}', content_rowid='id', tokenize='porter unicode61')")
+    insert = f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body});"
+    delete = (f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) "
+              f"VALUES ('delete', old.id, old.{title}, old.{body});")
+    op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+    op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+    op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {title}, {body} ON {table} BEGIN {delete} {insert} END")
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _postgres_upgrade(table, title, body):
+    # Stored generated columns are filled for existing rows by the ALTER itself
+    op.execute(f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+               f"setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+               f"setweight(to_tsvector('english', coalesce({body}, '')), 'B')) STORED")
+    op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table, title, body in TABLES:
+        if postgres:
+            _postgres_upgrade(table, title, body)
+        else:
+            _sqlite_upgrade(table, title, body)
+
+
+def downgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table, _, _ in TABLES:
+        if postgres:
+            op.execute(f'DROP INDEX ix_{table}_search_vector')
+            op.execute(f'ALTER TABLE {table} DROP COLUMN search_vector')
+        else:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER {table}_fts_{suffix}')
+            op.execute(f'DROP TABLE {table}_fts')
@@ -10,7 +10,12 @@ from app.models.story import Story
 from app.models.beneficiary import Beneficiary
 from app.models.inventory import Inventory
 from app.models.reminder import Reminder
+from app.models.donation_stat import DonationStat
+from app.models.user_analytics import (
+    SignupStat, DonorSummary, DonorMonth, CharityDonor, CohortRetention, AnalyticsCounter
+)
 from flask_jwt_extended import create_access_token
+from sqlalchemy import event
 
 @pytest.fixture(scope='function')
 def app():
@@ -20,6 +25,10 @@ def app():
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['JWT_SECRET_KEY'] = 'test-secret-key'
     app.config['WTF_CSRF_ENABLED'] = False
+    app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+    app.config['PAYMENT_EVENTS_BACKEND'] = 'memory'
+    app.config['RATE_LIMIT_STORAGE'] = 'memory'
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
     
     with app.app_context():
         db.create_all()
@@ -116,4 +125,59 @@ def auth_headers_charity(charity_token):
 @pytest.fixture
 def auth_headers_admin(admin_token):
     """Create authorization headers for admin"""
-    return {'Authorization': f'Bearer {admin_token}'}
\ No newline at end of file
+    return {'Authorization': f'Bearer {admin_token}'}
+class StatementCounter:
+    """Records the SQL statements sent to the database while active"""
+
+    def __init__(self):
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_statements(app):
+    """Context manager counting the SQL statements run inside it"""
+    return StatementCounter
+
+@pytest.fixture
+def assert_constant_statements(client):
+    """N+1 detector: fail when a GET issues more statements as it returns more rows.
+
+    ``seed(n)`` must add ``n`` rows that the request returns; ``collection`` is
+    the key holding them, or None when the body is a bare list.
+    """
+    def check(url, headers, seed, collection=None):
+        def get():
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200, response.get_json()
+            body = response.get_json()
+            return len(body if collection is None else body[collection])
+
+        # Warm per-process caches such as the authorization lookup; seeding
+        # again afterwards also invalidates any cached response
+        seed(1)
+        get()
+        seed(2)
+        with StatementCounter() as small:
+            few = get()
+        seed(20)
+        with StatementCounter() as large:
+            many = get()
+
+        assert many > few, f'{url} returned {few} rows, then {many}'
+        assert large.count == small.count, (
+            f'{url} ran {small.count} statements for {few} rows but {large.count} for {many}:\n'
+            + '\n'.join(large.statements))
+    return check
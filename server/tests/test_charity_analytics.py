@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from app.services.database import db
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.services.donation_stats_service import DonationStatsService
+from app.services.charity_analytics_service import CharityAnalyticsService
+
+@pytest.fixture
+def charity_headers(app, charity_user):
+    with app.app_context():
+        token = create_access_token(identity=str(charity_user), additional_claims={'role': 'charity'})
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def donations(app, donor_user, charity_user, approved_charity):
+    other_donor = User(name='Second Donor', email='second@example.com', role='donor')
+    other_donor.set_password('password123')
+    other_charity = Charity(name='Other', description='Another charity', owner_id=donor_user, status='approved')
+    db.session.add_all([other_donor, other_charity])
+    db.session.flush()
+
+    rows = [
+        Donation(user_id=donor_user, charity_id=approved_charity, amount=100, recurring=True,
+                 status='complete', timestamp=datetime(2025, 3, 3, 9)),
+        Donation(user_id=other_donor.id, charity_id=approved_charity, amount=50, recurring=False,
+                 status='complete', timestamp=datetime(2025, 3, 4, 18)),
+        Donation(user_id=donor_user, charity_id=approved_charity, amount=25, recurring=False,
+                 status='complete', timestamp=datetime(2025, 3, 9, 23)),
+        Donation(user_id=donor_user, charity_id=approved_charity, amount=100, recurring=True,
+                 status='complete', timestamp=datetime(2025, 4, 1, 7)),
+        Donation(user_id=donor_user, charity_id=approved_charity, amount=999, recurring=False,
+                 status='failed', timestamp=datetime(2025, 3, 5)),
+        Donation(user_id=donor_user, charity_id=other_charity.id, amount=999, recurring=False,
+                 status='complete', timestamp=datetime(2025, 3, 5)),
+    ]
+    db.session.add_all(rows)
+    DonationStatsService.record_completed_many([d for d in rows if d.status == 'complete'])
+    db.session.commit()
+
+def _analytics(client, headers, **params):
+    response = client.get('/api/v1/charities/my-charity/analytics', headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['analytics']
+
+def test_all_time_totals(client, charity_headers, donations):
+    """Test totals, donor counts and the recurring split"""
+    totals = _analytics(client, charity_headers)['totals']
+
+    assert totals['donation_count'] == 4
+    assert float(totals['total_amount']) == 275
+    assert totals['donors'] == 2
+    assert totals['repeat_donors'] == 1
+    assert totals['recurring']['donation_count'] == 2
+    assert float(totals['recurring']['total_amount']) == 200
+    assert totals['one_off']['donation_count'] == 2
+    assert float(totals['one_off']['total_amount']) == 75
+
+def test_series_intervals(client, charity_headers, donations):
+    """Test daily, weekly (Monday-based) and monthly buckets"""
+    daily = _analytics(client, charity_headers)['series']
+    assert [p['period'] for p in daily] == ['2025-03-03', '2025-03-04', '2025-03-09', '2025-04-01']
+
+    weekly = _analytics(client, charity_headers, interval='week')['series']
+    assert [(p['period'], p['donation_count'], p['recurring_count']) for p in weekly] == [
+        ('2025-03-03', 3, 1), ('2025-03-31', 1, 1)]
+
+    monthly = _analytics(client, charity_headers, interval='month')['series']
+    assert [(p['period'], float(p['total_amount'])) for p in monthly] == [('2025-03-01', 175), ('2025-04-01', 100)]
+
+def test_date_range(client, charity_headers, donations):
+    """Test that start and end are inclusive days and donors are counted in range"""
+    analytics = _analytics(client, charity_headers, start='2025-03-04', end='2025-03-09')
+
+    assert analytics['totals']['donation_count'] == 2
+    assert analytics['totals']['donors'] == 2
+    assert analytics['totals']['repeat_donors'] == 0
+    assert [p['period'] for p in analytics['series']] == ['2025-03-04', '2025-03-09']
+
+def test_invalid_parameters(client, charity_headers, donations):
+    """Test validation of interval and dates"""
+    url = '/api/v1/charities/my-charity/analytics'
+    assert client.get(url, headers=charity_headers, query_string={'interval': 'hour'}).status_code == 400
+    assert client.get(url, headers=charity_headers, query_string={'start': '03/04/2025'}).status_code == 400
+    assert client.get(url, headers=charity_headers,
+                      query_string={'start': '2025-04-01', 'end': '2025-03-01'}).status_code == 400
+
+def test_rebuild_matches_incremental_rollup(app, approved_charity, donations):
+    """Test that rebuilding the rollup from donations gives the same analytics"""
+    before = CharityAnalyticsService.get(approved_charity, interval='week')
+    DonationStatsService.rebuild()
+    assert CharityAnalyticsService.get(approved_charity, interval='week') == before
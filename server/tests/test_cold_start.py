@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+import pytest
+from flask_restx.swagger import Swagger
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Optional or CLI-only dependencies a FAST_START web worker must not import
+DEFERRED_MODULES = ('redis', 'requests', 'celery', 'alembic', 'flask_migrate')
+# Frameworks every worker needs; their import cost is not ours to budget
+BASELINE = ('flask, flask_sqlalchemy, flask_restx, flask_jwt_extended, sqlalchemy.orm, '
+            'sqlalchemy.dialects.postgresql, sqlalchemy.dialects.sqlite, werkzeug.security')
+# Import time of `wsgi` beyond the baseline; generous so only a heavy new import trips it
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '350'))
+
+def _importtime(code):
+    """Return (total top-level import ms, imported module names) for ``python -c code``"""
+    env = dict(os.environ, FAST_START='true', FLASK_ENV='development')
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=SERVER_DIR, env=env)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    total, modules = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip())
+        # One space of indentation marks an import made by the -c code itself
+        if name.startswith(' ') and not name.startswith('  '):
+            total += int(cumulative)
+    return total / 1000, modules
+
+def test_fast_start_defers_optional_imports():
+    """Test that importing the WSGI app does not import optional dependencies"""
+    _, modules = _importtime('import wsgi')
+    assert not [m for m in modules if m.split('.')[0] in DEFERRED_MODULES]
+
+@pytest.mark.skipif(os.getenv('COLD_START_BENCH') != '1',
+                    reason='wall-clock budget; set COLD_START_BENCH=1 to run it on a quiet machine')
+def test_import_time_budget():
+    """Test that the app's own import cost stays within IMPORT_BUDGET_MS"""
+    app_ms = min(_importtime('import wsgi')[0] for _ in range(2))
+    baseline_ms = min(_importtime(f'import {BASELINE}')[0] for _ in range(2))
+    assert app_ms - baseline_ms < IMPORT_BUDGET_MS, (
+        f'wsgi imports in {app_ms:.0f}ms, {app_ms - baseline_ms:.0f}ms over the framework baseline')
+
+def test_swagger_spec_built_on_first_request(client):
+    """Test that the Swagger spec is only built when swagger.json is requested"""
+    with patch.object(Swagger, 'as_dict', autospec=True, side_effect=Swagger.as_dict) as build:
+        assert client.get('/api/v1/health/live').status_code == 200
+        assert build.call_count == 0
+
+        assert client.get('/api/v1/swagger.json').status_code == 200
+        assert client.get('/api/v1/swagger.json').status_code == 200
+        assert build.call_count == 1
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from werkzeug.http import http_date
+from app.services.database import db
+from app.services import delta_sync, response_cache
+from app.services.pagination import encode_cursor
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.inventory import Inventory
+from app.models.story import Story
+from app.models.tombstone import Tombstone
+
+def _stories(approved_charity, *titles):
+    stories = [Story(charity_id=approved_charity, title=title, content='...') for title in titles]
+    db.session.add_all(stories)
+    db.session.commit()
+    response_cache.invalidate('stories')
+    return stories
+
+def test_if_modified_since(client, approved_charity):
+    """Test Last-Modified on a list and an empty 304 when nothing changed"""
+    _stories(approved_charity, 'First')
+    response = client.get('/api/v1/stories/')
+    last_modified = response.headers['Last-Modified']
+
+    # Served from the response cache, then computed after an invalidation
+    assert client.get('/api/v1/stories/', headers={'If-Modified-Since': last_modified}).status_code == 304
+    response_cache.invalidate('stories')
+    not_modified = client.get('/api/v1/stories/', headers={'If-Modified-Since': last_modified})
+    assert not_modified.status_code == 304 and not_modified.data == b''
+
+    earlier = http_date(datetime.utcnow() - timedelta(days=1))
+    assert client.get('/api/v1/stories/', headers={'If-Modified-Since': earlier}).status_code == 200
+
+def test_delta_reports_changes_and_deletions(app, client, approved_charity):
+    """Test that ?since= returns only changed rows and tombstones of deleted ones"""
+    app.config['DELTA_SYNC_OVERLAP'] = 0
+    kept, edited, removed = _stories(approved_charity, 'Kept', 'Edited', 'Removed')
+    since = client.get('/api/v1/stories/').headers['X-Since']
+
+    edited.title = 'Edited again'
+    db.session.delete(removed)
+    added, = _stories(approved_charity, 'Added')
+
+    delta = client.get('/api/v1/stories/', query_string={'since': since}).get_json()
+    assert [story['title'] for story in delta['stories']] == ['Edited again', 'Added']
+    assert delta['deleted'] == [removed.id]
+
+    empty = client.get('/api/v1/stories/', query_string={'since': delta['since']}).get_json()
+    assert empty['stories'] == [] and empty['deleted'] == []
+
+def test_charity_leaving_the_list_is_deleted(app, client, charity_user, approved_charity):
+    """Test that a charity that is no longer approved shows up as deleted"""
+    app.config['DELTA_SYNC_OVERLAP'] = 0
+    since = client.get('/api/v1/charities/').headers['X-Since']
+    Charity.query.get(approved_charity).status = 'rejected'
+    db.session.commit()
+    response_cache.invalidate('charities')
+
+    delta = client.get('/api/v1/charities/', query_string={'since': since}).get_json()
+    assert delta['charities'] == [] and delta['deleted'] == [approved_charity]
+
+def test_scoped_delta(app, client, charity_user, approved_charity):
+    """Test that a charity's inventory delta ignores other charities' rows"""
+    app.config['DELTA_SYNC_OVERLAP'] = 0
+    other = Charity(owner_id=charity_user, name='Other', status='approved')
+    db.session.add(other)
+    db.session.commit()
+    headers = {'Authorization': 'Bearer ' + create_access_token(
+        identity=str(charity_user), additional_claims={'role': 'charity'})}
+    url = f'/api/v1/inventory/charities/{approved_charity}/inventory'
+    since = client.get(url, headers=headers).headers['X-Since']
+
+    mine = Inventory(charity_id=approved_charity, item_name='Pads', quantity=10)
+    theirs = Inventory(charity_id=other.id, item_name='Books', quantity=5)
+    db.session.add_all([mine, theirs])
+    db.session.commit()
+    db.session.delete(theirs)
+    db.session.commit()
+
+    delta = client.get(url, headers=headers, query_string={'since': since}).get_json()
+    assert [item['item_name'] for item in delta['items']] == ['Pads'] and delta['deleted'] == []
+
+def test_updated_at_follows_bulk_updates(app, donor_user, approved_charity):
+    """Test that conditional UPDATEs such as donation transitions bump updated_at"""
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=10, status='pending',
+                        updated_at=datetime(2025, 1, 1))
+    db.session.add(donation)
+    db.session.commit()
+    assert Donation.transition(donation.id, 'complete')
+    db.session.commit()
+    db.session.refresh(donation)
+    assert donation.updated_at > datetime(2025, 1, 1)
+
+def test_stale_token_and_pruning(app, client, approved_charity):
+    """Test 410 for tokens past the retention or deltas past the row limit, and tombstone pruning"""
+    story, = _stories(approved_charity, 'Gone')
+    db.session.delete(story)
+    db.session.commit()
+
+    expired = encode_cursor([datetime.utcnow() - timedelta(days=31)])
+    assert client.get('/api/v1/stories/', query_string={'since': expired}).status_code == 410
+    app.config['DELTA_SYNC_MAX_ROWS'] = 0
+    recent = encode_cursor([datetime.utcnow() - timedelta(hours=1)])
+    assert client.get('/api/v1/stories/', query_string={'since': recent}).status_code == 410
+
+    Tombstone.query.update({'deleted_at': datetime.utcnow() - timedelta(days=40)})
+    assert delta_sync.prune_tombstones() == 1
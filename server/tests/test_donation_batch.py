@@ -0,0 +1,118 @@
+import pytest
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app.services.database import db
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services import approved_charities
+from app.services.donation_stats_service import DonationStatsService
+
+@pytest.fixture
+def donor_headers(app, donor_user):
+    with app.app_context():
+        token = create_access_token(identity=str(donor_user), additional_claims={'role': 'donor'})
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def admin_headers(app, admin_user):
+    with app.app_context():
+        token = create_access_token(identity=str(admin_user), additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+def _count_commits():
+    commits = []
+    event.listen(db.session, 'after_commit', lambda session: commits.append(1))
+    return commits
+
+def test_make_donation_commits_once(client, donor_headers, approved_charity):
+    """Test that a simulated donation is written with its payment in one transaction"""
+    approved_charities.approved_charity_ids()
+    commits = _count_commits()
+    response = client.post('/api/v1/donations/', headers=donor_headers, json={
+        'charityId': approved_charity, 'amount': 250, 'paymentMethod': 'mpesa'
+    })
+
+    assert response.status_code == 201
+    assert len(commits) == 1
+    donation_id = response.get_json()['donation']['id']
+    assert Donation.query.get(donation_id).status == 'complete'
+    assert Payment.query.filter_by(donation_id=donation_id).one().transaction_id == 'SIMULATED'
+    assert DonationStatsService.get('charity', str(approved_charity))[0] == 1
+
+def test_make_donation_rejects_unapproved_charity(client, donor_headers, charity_user):
+    """Test that donations to a pending charity are refused"""
+    charity = Charity(name='Pending', description='Pending charity', owner_id=charity_user, status='pending')
+    db.session.add(charity)
+    db.session.commit()
+
+    response = client.post('/api/v1/donations/', headers=donor_headers, json={
+        'charityId': charity.id, 'amount': 100, 'paymentMethod': 'mpesa'
+    })
+    assert response.status_code == 404
+
+def test_approval_invalidates_cached_charity_ids(client, admin_headers, charity_user, approved_charity):
+    """Test that approving a charity makes it available without waiting for the TTL"""
+    charity = Charity(name='Late', description='Approved later', owner_id=charity_user, status='pending')
+    db.session.add(charity)
+    db.session.commit()
+    assert not approved_charities.is_approved(charity.id)
+
+    response = client.post(f'/api/v1/charities/admin/charities/{charity.id}/approve', headers=admin_headers)
+    assert response.status_code == 200
+    assert approved_charities.is_approved(charity.id)
+
+def test_batch_import_inserts_and_updates_stats(client, admin_headers, donor_user, approved_charity):
+    """Test bulk import of offline donations"""
+    donations = [{'charityId': approved_charity, 'amount': 10, 'userId': donor_user} for _ in range(50)]
+    donations.append({'charityId': approved_charity, 'amount': 5.5, 'timestamp': '2024-01-15T10:00:00'})
+
+    response = client.post('/api/v1/donations/batch', headers=admin_headers, json={'donations': donations})
+
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 51
+    assert Donation.query.filter_by(charity_id=approved_charity, status='complete').count() == 51
+    count, total = DonationStatsService.get('charity', str(approved_charity))
+    assert count == 51
+    assert float(total) == 505.5
+    assert DonationStatsService.get('day', '2024-01-15')[0] == 1
+
+def test_batch_import_rejects_invalid_rows(client, admin_headers, approved_charity):
+    """Test that one invalid row rejects the whole batch with per-row errors"""
+    response = client.post('/api/v1/donations/batch', headers=admin_headers, json={'donations': [
+        {'charityId': approved_charity, 'amount': 10},
+        {'charityId': approved_charity, 'amount': -1},
+        {'charityId': 9999, 'amount': 10},
+        {'charityId': approved_charity, 'amount': 10, 'userId': 9999},
+        {'amount': 10}
+    ]})
+
+    assert response.status_code == 400
+    assert [e['index'] for e in response.get_json()['errors']] == [1, 2, 3, 4]
+    assert Donation.query.count() == 0
+
+def test_batch_import_requires_admin(client, donor_headers, approved_charity):
+    """Test that donors cannot import donations"""
+    response = client.post('/api/v1/donations/batch', headers=donor_headers, json={
+        'donations': [{'charityId': approved_charity, 'amount': 10}]
+    })
+    assert response.status_code == 403
+
+def test_batch_import_checks_flags_and_timestamps(client, admin_headers, approved_charity):
+    """Test that is_anonymous must be a boolean and aware timestamps are stored as UTC"""
+    response = client.post('/api/v1/donations/batch', headers=admin_headers, json={'donations': [
+        {'charityId': approved_charity, 'amount': 10, 'is_anonymous': 'false'},
+        {'charityId': approved_charity, 'amount': 10, 'is_anonymous': 0}
+    ]})
+    assert response.status_code == 400
+    assert [e['index'] for e in response.get_json()['errors']] == [0, 1]
+
+    response = client.post('/api/v1/donations/batch', headers=admin_headers, json={'donations': [
+        {'charityId': approved_charity, 'amount': 10, 'is_anonymous': True,
+         'timestamp': '2024-01-15T23:30:00-05:00'}
+    ]})
+    assert response.status_code == 201
+    donation = Donation.query.one()
+    assert donation.is_anonymous is True
+    assert donation.timestamp == datetime(2024, 1, 16, 4, 30)
@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from flask_jwt_extended import create_access_token
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services.donation_stats_service import DonationStatsService
+
+def _headers(app, user_id, role):
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={'role': role})
+    return {'Authorization': f'Bearer {token}'}
+
+def _callback(checkout_request_id, result_code=0):
+    return {'Body': {'stkCallback': {
+        'CheckoutRequestID': checkout_request_id,
+        'ResultCode': result_code,
+        'ResultDesc': 'done',
+        'CallbackMetadata': {'Item': [{'Name': 'MpesaReceiptNumber', 'Value': 'MPX1'}]}
+    }}}
+
+@pytest.fixture
+def pending_payment(app, donor_user, approved_charity):
+    with app.app_context():
+        donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=150,
+                            status='pending', timestamp=datetime(2025, 3, 1, 12))
+        db.session.add(donation)
+        db.session.flush()
+        db.session.add(Payment(donation_id=donation.id, method='mpesa',
+                               transaction_id='ws_CO_1', status='pending'))
+        db.session.commit()
+
+def test_callback_updates_rollup_once(client, app, approved_charity, pending_payment):
+    """Test that a completed payment is folded into every rollup scope exactly once"""
+    assert client.post('/api/v1/payments/verify', json=_callback('ws_CO_1')).status_code == 200
+    client.post('/api/v1/payments/verify', json=_callback('ws_CO_1'))
+
+    assert DonationStatsService.get('global') == (1, Decimal('150'))
+    assert DonationStatsService.get('charity', str(approved_charity)) == (1, Decimal('150'))
+    assert DonationStatsService.get('day', '2025-03-01') == (1, Decimal('150'))
+
+def test_dashboard_reads_rollup(client, app, admin_user, pending_payment):
+    """Test the admin dashboard totals"""
+    client.post('/api/v1/payments/verify', json=_callback('ws_CO_1'))
+
+    response = client.get('/api/v1/admin/dashboard', headers=_headers(app, admin_user, 'admin'))
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['total_users'] == 3
+    assert data['approved_charities'] == 1
+    assert data['total_donations'] == 1
+    assert float(data['total_donation_amount']) == 150.0
+
+def test_rebuild_command(runner, app, donor_user, approved_charity):
+    """Test backfilling the rollup from existing donations"""
+    with app.app_context():
+        for amount, status in [(10, 'complete'), (20, 'complete'), (40, 'failed')]:
+            db.session.add(Donation(user_id=donor_user, charity_id=approved_charity, amount=amount,
+                                    status=status, timestamp=datetime(2025, 1, 5)))
+        db.session.commit()
+
+    result = runner.invoke(args=['rebuild-donation-stats'])
+
+    # global, charity, day, charity_day and charity_donor
+    assert 'Rebuilt 5 donation stat rows' in result.output
+    assert DonationStatsService.get('global') == (2, Decimal('30'))
+    assert DonationStatsService.get('day', '2025-01-05') == (2, Decimal('30'))
+    assert DonationStatsService.get('charity_day', f'{approved_charity}:2025-01-05') == (2, Decimal('30'))
+    assert DonationStatsService.get('charity_donor', f'{approved_charity}:{donor_user}') == (2, Decimal('30'))
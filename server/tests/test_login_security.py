@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import patch
+from werkzeug.security import generate_password_hash
+from app.services.database import db
+from app.services import passwords
+from app.models.user import User
+
+LOGIN = '/api/v1/auth/login'
+
+@pytest.fixture
+def sync_jobs(app):
+    app.config['BACKGROUND_EXECUTOR'] = 'sync'
+
+def _login(client, password='password123', email='donor@test.com', ip='10.0.0.1'):
+    return client.post(LOGIN, json={'email': email, 'password': password}, environ_base={'REMOTE_ADDR': ip})
+
+def test_canonical_method():
+    """Test that werkzeug's defaults are filled into a method string"""
+    assert passwords.canonical_method('pbkdf2') == 'pbkdf2:sha256:600000'
+    assert passwords.canonical_method('pbkdf2:sha512') == 'pbkdf2:sha512:600000'
+    assert passwords.canonical_method('scrypt') == 'scrypt:32768:8:1'
+
+def test_login_rehashes_stale_parameters(app, client, donor_user, sync_jobs):
+    """Test that a hash made with old parameters is replaced after a successful login"""
+    user = User.query.get(donor_user)
+    user.password_hash = generate_password_hash('password123', method='pbkdf2:sha256:500', salt_length=8)
+    db.session.commit()
+
+    assert _login(client).status_code == 200
+    db.session.expire_all()
+    new_hash = User.query.get(donor_user).password_hash
+    assert new_hash.startswith('pbkdf2:sha256:1000$')
+    assert not passwords.needs_rehash(new_hash)
+
+    with patch.object(passwords, 'submit') as submit:
+        assert _login(client).status_code == 200
+        submit.assert_not_called()
+
+def test_rehash_skips_changed_password(app, donor_user):
+    """Test that a queued re-hash does not overwrite a password changed meanwhile"""
+    old_hash = User.query.get(donor_user).password_hash
+    user = User.query.get(donor_user)
+    user.set_password('new-password')
+    db.session.commit()
+
+    assert passwords.rehash(donor_user, old_hash, 'password123') is False
+    assert User.query.get(donor_user).check_password('new-password')
+
+def test_failed_logins_throttled_before_hashing(app, client, donor_user):
+    """Test that failures past the per-email limit get 429 without checking the hash"""
+    app.config['LOGIN_MAX_FAILURES_PER_EMAIL'] = 3
+    for _ in range(3):
+        assert _login(client, 'wrong').status_code == 401
+
+    with patch('app.services.passwords.check_password_hash') as check:
+        response = _login(client, 'wrong', email='DONOR@test.com', ip='10.0.0.2')
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) > 0
+        assert _login(client).status_code == 429
+        check.assert_not_called()
+
+def test_failed_logins_throttled_per_ip(app, client, donor_user):
+    """Test that one address spraying many emails is throttled"""
+    app.config['LOGIN_MAX_FAILURES_PER_IP'] = 4
+    for i in range(4):
+        assert _login(client, email=f'user{i}@test.com').status_code == 401
+
+    assert _login(client).status_code == 429
+    assert _login(client, ip='10.0.0.2').status_code == 200
+
+def test_successful_login_resets_email_failures(app, client, donor_user):
+    """Test that a successful login clears the email's failure count"""
+    app.config['LOGIN_MAX_FAILURES_PER_EMAIL'] = 3
+    for _ in range(2):
+        assert _login(client, 'wrong').status_code == 401
+    assert _login(client).status_code == 200
+    for _ in range(2):
+        assert _login(client, 'wrong').status_code == 401
+    assert _login(client).status_code == 200
+
+def test_non_string_credentials_rejected(client):
+    """Test that non-string emails or passwords get a 400 instead of reaching the throttle"""
+    for body in ({'email': 12345, 'password': 'x'}, {'email': ['a@test.com'], 'password': 'x'},
+                 {'email': 'a@test.com', 'password': {'x': 1}}):
+        response = client.post('/api/v1/auth/login', json=body)
+        assert response.status_code == 400 and response.get_json()['success'] is False
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.services import mpesa_service
+from app.services.mpesa_service import MpesaService, TokenCache
+
+class MockDaraja(ThreadingHTTPServer):
+    """Minimal stand-in for the Daraja OAuth and STK push endpoints"""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), MockDarajaHandler)
+        self.token_requests = 0
+        self.stk_requests = 0
+        self.connections = set()
+        self.token_delay = 0
+        self.stk_status = 200
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+class MockDarajaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.token_requests += 1
+            server.connections.add(self.client_address)
+        time.sleep(server.token_delay)
+        self._reply(200, {'access_token': f'token-{server.token_requests}', 'expires_in': '3599'})
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers['Content-Length']))
+        with server.lock:
+            server.stk_requests += 1
+            server.connections.add(self.client_address)
+        if server.stk_status != 200:
+            return self._reply(server.stk_status, {'errorMessage': 'Invalid Access Token'})
+        self._reply(200, {
+            'ResponseCode': '0',
+            'CheckoutRequestID': f'ws_CO_{server.stk_requests}',
+            'MerchantRequestID': 'MR_1'
+        })
+
+@pytest.fixture
+def daraja(app):
+    server = MockDaraja()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.config.update(MPESA_BASE_URL=server.url, MPESA_CONSUMER_KEY='key', MPESA_CONSUMER_SECRET='secret',
+                      MPESA_BUSINESS_SHORT_CODE='174379', MPESA_PASSKEY='passkey')
+    mpesa_service.token_cache.clear()
+    mpesa_service.reset_http_session()
+    yield server
+    mpesa_service.reset_http_session()
+    mpesa_service.token_cache.clear()
+    server.shutdown()
+    server.server_close()
+
+def _push():
+    return MpesaService().initiate_stk_push('254712345678', 100, 'DONATION_1', 'Donation')
+
+def test_token_is_reused_across_pushes(app, daraja):
+    """Test that repeated STK pushes share one OAuth token and one connection"""
+    results = [_push() for _ in range(5)]
+
+    assert all(r['success'] for r in results)
+    assert daraja.token_requests == 1
+    assert daraja.stk_requests == 5
+    assert len(daraja.connections) == 1
+
+def test_concurrent_pushes_fetch_token_once(app, daraja):
+    """Test single-flight refresh when many pushes start at once"""
+    daraja.token_delay = 0.2
+
+    def push():
+        with app.app_context():
+            return _push()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: push(), range(8)))
+
+    assert all(r['success'] for r in results)
+    assert daraja.token_requests == 1
+
+def test_rejected_token_is_invalidated(app, daraja):
+    """Test that a 401 from the STK endpoint forces a new token"""
+    daraja.stk_status = 401
+    assert _push()['success'] is False
+
+    daraja.stk_status = 200
+    assert _push()['success'] is True
+    assert daraja.token_requests == 2
+
+def test_token_cache_refreshes_early_and_falls_back():
+    """Test early refresh and serving the old token when refresh fails"""
+    cache = TokenCache(refresh_margin=300)
+    # A token this short-lived is already due for refresh but valid for another second
+    assert cache.get('k', lambda: ('first', 1)) == 'first'
+    # Inside the refresh window a failed refresh keeps the still-valid token
+    assert cache.get('k', lambda: (None, None)) == 'first'
+    assert cache.get('k', lambda: ('second', 3599)) == 'second'
@@ -0,0 +1,77 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+
+@pytest.fixture
+def donor_headers(app, donor_user):
+    with app.app_context():
+        token = create_access_token(identity=str(donor_user), additional_claims={'role': 'donor'})
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def donations(app, donor_user, approved_charity):
+    """Create 25 donations, two of them sharing a timestamp"""
+    from app.models.donation import Donation
+    from app.services.database import db
+
+    base = datetime(2025, 1, 1)
+    with app.app_context():
+        for i in range(25):
+            db.session.add(Donation(
+                user_id=donor_user,
+                charity_id=approved_charity,
+                amount=10 + i,
+                status='complete',
+                timestamp=base + timedelta(minutes=min(i, 23))
+            ))
+        db.session.commit()
+
+def test_donation_history_pages_cover_all_rows(client, donor_headers, donations):
+    """Test that following cursors visits every row exactly once, newest first"""
+    seen = []
+    after = None
+    while True:
+        url = '/api/v1/donations/history?limit=10' + (f'&after={after}' if after else '')
+        response = client.get(url, headers=donor_headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['donations']) <= 10
+        seen.extend(d['id'] for d in data['donations'])
+        after = data['next_cursor']
+        if not after:
+            break
+        assert response.headers['X-Next-Cursor'] == after
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    assert seen[:2] == [25, 24]
+
+def test_limit_is_clamped_to_maximum(client, app, donor_headers, donations):
+    """Test that the server enforces the maximum page size"""
+    app.config['PAGINATION_MAX_LIMIT'] = 5
+    response = client.get('/api/v1/donations/history?limit=1000', headers=donor_headers)
+    assert len(response.get_json()['donations']) == 5
+
+def test_invalid_cursor(client, donor_headers, donations):
+    """Test that a malformed cursor is rejected"""
+    response = client.get('/api/v1/donations/history?after=not-a-cursor', headers=donor_headers)
+    assert response.status_code == 400
+
+def test_ndjson_stream(client, donor_headers, donations):
+    """Test streaming the full history as NDJSON"""
+    response = client.get('/api/v1/donations/history?format=ndjson', headers=donor_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 25
+    assert rows[0]['id'] == 25
+
+def test_public_charity_list_is_paginated(client, approved_charity):
+    """Test the public charity list envelope"""
+    response = client.get('/api/v1/charities/?limit=1')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is True
+    assert [c['id'] for c in data['charities']] == [approved_charity]
+    assert data['next_cursor'] is None
@@ -0,0 +1,88 @@
+import pytest
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services import payment_callback_service
+
+def _callback(checkout_request_id, result_code=0, receipt='MPX123'):
+    return {'Body': {'stkCallback': {
+        'MerchantRequestID': 'MR_1',
+        'CheckoutRequestID': checkout_request_id,
+        'ResultCode': result_code,
+        'ResultDesc': 'done' if result_code == 0 else 'Request cancelled by user',
+        'CallbackMetadata': {'Item': [{'Name': 'MpesaReceiptNumber', 'Value': receipt}]}
+    }}}
+
+@pytest.fixture
+def pending_payment(app, donor_user, approved_charity):
+    with app.app_context():
+        donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=100, status='pending')
+        db.session.add(donation)
+        db.session.flush()
+        db.session.add(Payment(donation_id=donation.id, method='mpesa',
+                               transaction_id='ws_CO_1', status='pending'))
+        db.session.commit()
+        return donation.id
+
+def _state(donation_id):
+    db.session.expire_all()
+    payment = Payment.query.filter_by(donation_id=donation_id).one()
+    return payment.status, payment.receipt_number, Donation.query.get(donation_id).status
+
+def test_callback_keeps_checkout_request_id(client, pending_payment):
+    """Test that the receipt is stored without losing the CheckoutRequestID"""
+    response = client.post('/api/v1/payments/verify', json=_callback('ws_CO_1'))
+
+    assert response.status_code == 200
+    assert response.get_json()['ResultCode'] == 0
+    assert _state(pending_payment) == ('success', 'MPX123', 'complete')
+    assert Payment.query.filter_by(transaction_id='ws_CO_1').count() == 1
+
+def test_duplicate_callback_is_acknowledged(client, pending_payment):
+    """Test that a retried callback is acknowledged without re-applying it"""
+    client.post('/api/v1/payments/verify', json=_callback('ws_CO_1'))
+    response = client.post('/api/v1/payments/verify', json=_callback('ws_CO_1', receipt='MPX999'))
+
+    assert response.status_code == 200
+    assert 'already processed' in response.get_json()['message']
+    assert _state(pending_payment) == ('success', 'MPX123', 'complete')
+
+def test_late_failure_does_not_override_success(client, pending_payment):
+    """Test that out-of-order deliveries keep the first terminal result"""
+    client.post('/api/v1/payments/verify', json=_callback('ws_CO_1'))
+    client.post('/api/v1/payments/verify', json=_callback('ws_CO_1', result_code=1032))
+
+    assert _state(pending_payment) == ('success', 'MPX123', 'complete')
+
+def test_failed_callback(client, pending_payment):
+    """Test that a failed payment fails its donation"""
+    response = client.post('/api/v1/payments/verify', json=_callback('ws_CO_1', result_code=1032))
+
+    assert response.status_code == 200
+    assert 'Payment failed' in response.get_json()['message']
+    assert _state(pending_payment)[::2] == ('failed', 'failed')
+
+def test_malformed_callback_changes_nothing(client, pending_payment, monkeypatch):
+    """Test that a callback without a usable ResultCode is rejected, not settled as failed"""
+    settled = []
+    monkeypatch.setattr(payment_callback_service, '_settlement_listeners', [settled.append])
+    for result_code in (None, 'oops'):
+        response = client.post('/api/v1/payments/verify', json=_callback('ws_CO_1', result_code=result_code))
+        assert response.status_code == 400
+    assert _state(pending_payment) == ('pending', None, 'pending') and settled == []
+
+def test_unknown_checkout_request(client):
+    """Test a callback for a payment we never initiated"""
+    response = client.post('/api/v1/payments/verify', json=_callback('ws_CO_404'))
+    assert response.status_code == 404
+
+def test_settlement_listener_runs_once(client, pending_payment, monkeypatch):
+    """Test that listeners run after the response and not for duplicates"""
+    settled = []
+    monkeypatch.setattr(payment_callback_service, '_settlement_listeners', [settled.append])
+
+    for _ in range(3):
+        client.post('/api/v1/payments/verify', json=_callback('ws_CO_1')).close()
+
+    assert [r.outcome for r in settled] == ['processed']
+    assert settled[0].donation_id == pending_payment
@@ -0,0 +1,77 @@
+import json
+import pytest
+from app.services.database import db
+from app.services import payment_events
+from app.models.donation import Donation
+from app.models.payment import Payment
+
+def _callback(checkout_request_id, result_code=0):
+    return {'Body': {'stkCallback': {
+        'CheckoutRequestID': checkout_request_id,
+        'ResultCode': result_code,
+        'ResultDesc': 'done',
+        'CallbackMetadata': {'Item': [{'Name': 'MpesaReceiptNumber', 'Value': 'MPX123'}]}
+    }}}
+
+def _events(chunk):
+    return [json.loads(line[len('data: '):]) for line in chunk.decode().splitlines() if line.startswith('data: ')]
+
+@pytest.fixture
+def initiated_payment(app, donor_user, approved_charity):
+    app.config['PAYMENT_EVENTS_MAX_STREAMS'] = 2
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=100, status='initiated')
+    db.session.add(donation)
+    db.session.flush()
+    db.session.add(Payment(donation_id=donation.id, method='mpesa', transaction_id='ws_CO_1', status='pending'))
+    db.session.commit()
+    return donation.id
+
+def test_status_lookup(app, client, initiated_payment):
+    """Test the status endpoint by payment reference, and that nothing else resolves"""
+    reference = payment_events.reference_for(initiated_payment)
+    current = client.get(f'/api/v1/donations/mpesa/status/{reference}').get_json()
+    assert current['status'] == 'initiated'
+    assert current['donation']['checkout_request_id'] == 'ws_CO_1'
+
+    assert client.get('/api/v1/donations/mpesa/status/ws_CO_1').status_code == 404
+    assert client.get('/api/v1/payments/ws_CO_1/events').status_code == 404
+    assert client.get(f'/api/v1/donations/mpesa/status/{reference[:-2]}xx').status_code == 404
+    app.config['PAYMENT_EVENTS_REFERENCE_MAX_AGE'] = -1
+    assert client.get(f'/api/v1/donations/mpesa/status/{reference}').status_code == 404
+
+def test_stream_pushes_callback_result(client, initiated_payment):
+    """Test that a processed callback reaches an open stream, which then ends"""
+    reference = payment_events.reference_for(initiated_payment)
+    response = client.get(f'/api/v1/payments/{reference}/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert [event['status'] for event in _events(next(chunks))] == ['initiated']
+
+    client.post('/api/v1/payments/verify', json=_callback('ws_CO_1')).close()
+    final, = _events(next(chunks))
+    assert final['status'] == 'complete' and final['receipt_number'] == 'MPX123'
+    assert next(chunks, None) is None
+    response.close()
+
+def test_final_status_ends_stream_immediately(client, initiated_payment):
+    """Test that a stream for a settled payment sends one event and ends"""
+    Donation.transition(initiated_payment, 'failed')
+    db.session.commit()
+    reference = payment_events.reference_for(initiated_payment)
+    body = client.get(f'/api/v1/payments/{reference}/events').data
+    assert [event['status'] for event in _events(body)] == ['failed']
+
+def test_streams_are_bounded(app, client, initiated_payment):
+    """Test the per-worker stream limit, heartbeats and the maximum stream age"""
+    app.config.update(PAYMENT_EVENTS_HEARTBEAT=0.01, PAYMENT_EVENTS_MAX_AGE=0.05)
+    url = f'/api/v1/payments/{payment_events.reference_for(initiated_payment)}/events'
+    open_streams = [client.get(url, buffered=False) for _ in range(2)]
+    refused = client.get(url)
+    assert refused.status_code == 503 and refused.headers['Retry-After'] == '5'
+
+    body = b''.join(open_streams[0].response)
+    assert b': keepalive' in body
+    for response in open_streams:
+        response.close()
+    assert client.get(url, buffered=False).status_code == 200
+    assert client.get('/api/v1/payments/unknown/events').status_code == 404
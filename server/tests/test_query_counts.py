@@ -0,0 +1,120 @@
+import pytest
+from itertools import count
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import raiseload
+from app.services.database import db
+from app.services import response_cache
+from app.services.pagination import paginated_response
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.charity_application import CharityApplication
+from app.models.donation import Donation
+from app.models.story import Story
+from app.models.beneficiary import Beneficiary
+from app.models.inventory import Inventory
+
+_ids = count(1)
+
+def _headers(user_id, role):
+    return {'Authorization': f"Bearer {create_access_token(identity=str(user_id), additional_claims={'role': role})}"}
+
+def _donors(n):
+    users = [User(name=f'Donor {i}', email=f'donor{i}@example.com', role='donor', password_hash='x')
+             for i in (next(_ids) for _ in range(n))]
+    db.session.add_all(users)
+    db.session.flush()
+    return users
+
+def _charities(n, status='approved'):
+    owners = _donors(n)
+    charities = [Charity(name=f'Charity {u.id}', description='d', owner_id=u.id, status=status) for u in owners]
+    db.session.add_all(charities)
+    db.session.flush()
+    return charities
+
+def _donate(n, user_id=None, charity_id=None):
+    users = _donors(n) if user_id is None else None
+    charities = _charities(n) if charity_id is None else None
+    start = datetime.utcnow()
+    db.session.add_all([Donation(
+        user_id=user_id or users[i].id,
+        charity_id=charity_id or charities[i].id,
+        amount=10, status='complete', timestamp=start - timedelta(minutes=next(_ids))
+    ) for i in range(n)])
+    db.session.commit()
+
+def test_public_lists(client, assert_constant_statements):
+    """Test that the public charity and story lists do not load per row"""
+    def seed_charities(n):
+        _charities(n)
+        db.session.commit()
+        response_cache.invalidate('charities')
+    assert_constant_statements('/api/v1/charities/', {}, seed_charities, 'charities')
+
+    def seed_stories(n):
+        db.session.add_all([Story(charity_id=c.id, title='t', content='c') for c in _charities(n)])
+        db.session.commit()
+        response_cache.invalidate('stories')
+    assert_constant_statements('/api/v1/stories/', {}, seed_stories, 'stories')
+
+def test_donor_history(client, donor_user, assert_constant_statements):
+    """Test that the donation history joins each charity instead of lazy loading it"""
+    assert_constant_statements('/api/v1/donations/history', _headers(donor_user, 'donor'),
+                               lambda n: _donate(n, user_id=donor_user), 'donations')
+
+    donation = client.get('/api/v1/donations/history', headers=_headers(donor_user, 'donor')).get_json()['donations'][0]
+    assert donation['charity_name'] == Charity.query.get(donation['charity_id']).name
+
+def test_charity_dashboard_lists(client, charity_user, approved_charity, assert_constant_statements):
+    """Test the charity's donation, donor, beneficiary and inventory lists"""
+    headers = _headers(charity_user, 'charity')
+    assert_constant_statements('/api/v1/charities/my-charity/donations', headers,
+                               lambda n: _donate(n, charity_id=approved_charity))
+    assert_constant_statements('/api/v1/charities/my-charity/donors', headers,
+                               lambda n: _donate(n, charity_id=approved_charity))
+
+    def seed_beneficiaries(n):
+        db.session.add_all([Beneficiary(charity_id=approved_charity, name=f'B{next(_ids)}') for _ in range(n)])
+        db.session.commit()
+    assert_constant_statements(f'/api/v1/beneficiaries/charities/{approved_charity}/beneficiaries',
+                               headers, seed_beneficiaries)
+
+    def seed_inventory(n):
+        db.session.add_all([Inventory(charity_id=approved_charity, item_name='Rice', quantity=1) for _ in range(n)])
+        db.session.commit()
+    assert_constant_statements(f'/api/v1/inventory/charities/{approved_charity}/inventory',
+                               headers, seed_inventory)
+
+def test_admin_lists(client, admin_user, assert_constant_statements):
+    """Test the admin user, application and activity lists"""
+    headers = _headers(admin_user, 'admin')
+
+    def seed_users(n):
+        _donors(n)
+        db.session.commit()
+    assert_constant_statements('/api/v1/users/', headers, seed_users, 'users')
+
+    def seed_applications(n):
+        db.session.add_all([CharityApplication(user_id=u.id, organization_name=f'Org {u.id}', mission='m')
+                            for u in _donors(n)])
+        db.session.commit()
+    assert_constant_statements('/api/v1/charities/applications', headers, seed_applications, 'applications')
+    assert_constant_statements('/api/v1/admin/activities', headers, _donate, 'activities')
+
+def test_activity_feed_names_charities(client, admin_user, donor_user, approved_charity):
+    """Test that donation activities carry the charity name"""
+    _donate(1, user_id=donor_user, charity_id=approved_charity)
+    activities = client.get('/api/v1/admin/activities', headers=_headers(admin_user, 'admin')).get_json()['activities']
+    assert activities[0]['message'] == 'New donation of 10.00 to Test Charity Organization'
+
+def test_lazy_load_in_list_serializer_fails(app, approved_charity):
+    """Test that a relationship read by an instance serializer fails instead of loading per row"""
+    db.session.add(Story(charity_id=approved_charity, title='t', content='c'))
+    db.session.commit()
+
+    with app.test_request_context('/api/v1/stories/'):
+        with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+            paginated_response(Story.query.options(raiseload('*')), (Story.created_at, Story.id),
+                               serialize=lambda story: {'charity': story.charity.name})
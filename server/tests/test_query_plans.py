@@ -0,0 +1,99 @@
+import re
+import importlib.util
+import os
+import pytest
+from datetime import datetime
+from app.services.database import db
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.charity_application import CharityApplication
+from app.models.donation import Donation
+from app.models.donation_stat import DonationStat
+from app.models.payment import Payment
+from app.models.reminder import Reminder
+from app.models.story import Story
+from app.models.inventory import Inventory
+from app.models.beneficiary import Beneficiary
+from app.models.tombstone import Tombstone
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+
+# Query shapes issued on hot paths. Add new ones here so they stay index-backed.
+HOT_QUERIES = {
+    'charity_complete_donations': lambda: Donation.query.filter_by(charity_id=1, status='complete'),
+    'charity_ranged_donors': lambda: Donation.query.filter(
+        Donation.charity_id == 1, Donation.status == 'complete',
+        Donation.timestamp >= datetime(2025, 1, 1)).with_entities(Donation.user_id),
+    'charity_day_rollup': lambda: DonationStat.query.filter(
+        DonationStat.scope.in_(['charity_day', 'charity_day_rec']),
+        DonationStat.scope_key.between('1:2025-01-01', '1:2025-12-31')),
+    'charity_donations_page': lambda: Donation.query.filter_by(charity_id=1).order_by(
+        Donation.timestamp.desc(), Donation.id.desc()).limit(51),
+    'donation_history_page': lambda: Donation.query.filter_by(user_id=1).order_by(
+        Donation.timestamp.desc(), Donation.id.desc()).limit(51),
+    'recent_complete_donations': lambda: Donation.query.filter_by(status='complete').order_by(
+        Donation.timestamp.desc()).limit(10),
+    'payment_by_transaction_id': lambda: Payment.query.filter_by(transaction_id='ws_CO_1'),
+    'payments_for_donation': lambda: Payment.query.filter_by(donation_id=1),
+    'due_reminders': lambda: Reminder.query.filter(
+        Reminder.status == 'pending', Reminder.scheduled_time <= datetime(2025, 1, 1)),
+    'charity_by_owner': lambda: Charity.query.filter_by(owner_id=1).limit(1),
+    'approved_charities_page': lambda: Charity.query.filter_by(status='approved').order_by(
+        Charity.created_at.desc(), Charity.id.desc()).limit(51),
+    'application_by_user': lambda: CharityApplication.query.filter_by(user_id=1).limit(1),
+    'pending_applications': lambda: CharityApplication.query.filter_by(status='pending'),
+    'recent_applications': lambda: CharityApplication.query.order_by(
+        CharityApplication.submitted_at.desc()).limit(10),
+    'stories_page': lambda: Story.query.order_by(Story.created_at.desc(), Story.id.desc()).limit(51),
+    'users_page': lambda: User.query.order_by(User.created_at.desc(), User.id.desc()).limit(51),
+    'charity_inventory_page': lambda: Inventory.query.filter_by(charity_id=1).order_by(
+        Inventory.id.desc()).limit(51),
+    'charity_beneficiaries_page': lambda: Beneficiary.query.filter_by(charity_id=1).order_by(
+        Beneficiary.id.desc()).limit(51),
+    'donation_history_delta': lambda: Donation.query.filter(
+        Donation.user_id == 1, Donation.updated_at > datetime(2025, 1, 1)).order_by(
+        Donation.updated_at, Donation.id).limit(1001),
+    'charity_inventory_delta': lambda: Inventory.query.filter(
+        Inventory.charity_id == 1, Inventory.updated_at > datetime(2025, 1, 1)).order_by(
+        Inventory.updated_at, Inventory.id).limit(1001),
+    'stories_delta': lambda: Story.query.filter(Story.updated_at > datetime(2025, 1, 1)).order_by(
+        Story.updated_at, Story.id).limit(1001),
+    'stories_last_modified': lambda: Story.query.with_entities(db.func.max(Story.updated_at)),
+    'tombstones_since': lambda: Tombstone.query.filter(
+        Tombstone.table_name == 'donations', Tombstone.user_id == 1,
+        Tombstone.deleted_at > datetime(2025, 1, 1)).with_entities(Tombstone.row_id),
+}
+
+def explain(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).fetchall()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize('name', sorted(HOT_QUERIES))
+def test_hot_query_uses_index(app, name):
+    """Test that a registered hot query never degrades to a full table scan"""
+    plan = explain(HOT_QUERIES[name]())
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+    assert not [step for step in plan if 'TEMP B-TREE' in step], plan
+
+def test_migration_matches_model_indexes(app):
+    """Test that the index migrations create every index declared on the models"""
+    versions = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'versions')
+    migrated = set()
+    dropped = set()
+    for filename in sorted(os.listdir(versions)):
+        if not filename.endswith('.py'):
+            continue
+        spec = importlib.util.spec_from_file_location(filename[:-3], os.path.join(versions, filename))
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        migrated |= {(name, table, tuple(columns)) for name, table, columns in getattr(migration, 'INDEXES', [])}
+        dropped |= {(name, table, tuple(columns)) for name, table, columns in getattr(migration, 'DROPPED_INDEXES', [])}
+
+    declared = {
+        (ix.name, table.name, tuple(c.name for c in ix.columns))
+        for table in db.metadata.tables.values() for ix in table.indexes
+    }
+    assert declared == migrated - dropped
@@ -0,0 +1,103 @@
+import threading
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from app.middlewares.admission import AdmissionGate
+from app.services import rate_limit
+
+def _login(client, ip='10.0.0.1'):
+    return client.post('/api/v1/auth/login', json={'email': 'nobody@example.com', 'password': 'x'},
+                       environ_base={'REMOTE_ADDR': ip})
+
+def test_bucket_refills():
+    """Test burst size, refill rate and all-or-nothing takes across keys"""
+    assert rate_limit.parse('6/minute') == (0.1, 6)
+    store = rate_limit.MemoryStore()
+    with patch('app.services.rate_limit.time.monotonic', return_value=100.0) as clock:
+        assert [store.take(['ip'], 0.1, 2) for _ in range(2)] == [0, 0]
+        assert store.take(['ip'], 0.1, 2) == 10.0
+        # A refused take must not drain the other key
+        assert store.take(['ip', 'user'], 0.1, 2) == 10.0
+        assert store.take(['user'], 0.1, 2) == 0
+        clock.return_value = 105.0
+        assert store.take(['ip'], 0.1, 2) == 5.0
+        clock.return_value = 110.0
+        assert store.take(['ip'], 0.1, 2) == 0
+
+def test_login_limited_per_ip(app, client, donor_user):
+    """Test 429 with Retry-After once an address exceeds RATE_LIMIT_LOGIN"""
+    app.config['RATE_LIMIT_LOGIN'] = '3/minute'
+    assert [_login(client).status_code for _ in range(3)] == [401, 401, 401]
+    limited = _login(client)
+    assert limited.status_code == 429 and limited.headers['Retry-After'] == '20'
+    assert limited.get_json()['success'] is False
+    assert _login(client, ip='10.0.0.2').status_code == 401
+
+def test_limit_follows_identity(app, client, donor_user, approved_charity):
+    """Test that one account is limited across addresses and other accounts are not"""
+    app.config['RATE_LIMIT_DONATIONS'] = '2/minute'
+    headers = {'Authorization': 'Bearer ' + create_access_token(
+        identity=str(donor_user), additional_claims={'role': 'donor'})}
+    statuses = [client.post('/api/v1/donations/', json={}, headers=headers,
+                            environ_base={'REMOTE_ADDR': f'10.0.1.{i}'}).status_code for i in range(3)]
+    assert 429 not in statuses[:2] and statuses[2] == 429
+    other = {'Authorization': 'Bearer ' + create_access_token(identity='999', additional_claims={'role': 'donor'})}
+    assert client.post('/api/v1/donations/', json={}, headers=other,
+                       environ_base={'REMOTE_ADDR': '10.0.1.9'}).status_code != 429
+
+def test_default_limit_spares_health_checks(app, client):
+    """Test the app-wide limit and that health checks are exempt"""
+    app.config['RATE_LIMIT_DEFAULT'] = '2/minute'
+    assert [client.get('/api/v1/stories/').status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get('/api/v1/health/live').status_code == 200
+    app.config['RATE_LIMIT_ENABLED'] = False
+    assert client.get('/api/v1/stories/').status_code == 200
+
+def test_admission_gate_sheds_excess_requests():
+    """Test 503 with Retry-After beyond the in-flight budget while admitted requests finish"""
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(5)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    gate = AdmissionGate(slow_app, max_in_flight=1, max_per_client=0, queue_timeout=0.01, retry_after=2)
+    statuses = []
+    admitted = threading.Thread(
+        target=lambda: gate({'PATH_INFO': '/api/v1/stories/'}, lambda status, headers: statuses.append(status)))
+    admitted.start()
+    while gate.in_flight == 0:
+        pass
+
+    headers = {}
+    body = gate({'PATH_INFO': '/api/v1/stories/'}, lambda status, h: headers.update(h, status=status))
+    assert headers['status'].startswith('503') and headers['Retry-After'] == '2'
+    assert b'busy' in b''.join(body)
+
+    release.set()
+    admitted.join()
+    assert statuses == ['200 OK'] and gate.in_flight == 0
+    assert 'admission_rejected_total 1' in gate.render()
+
+def test_admission_gate_caps_each_client():
+    """Test that one address cannot hold more than its share of the budget"""
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        release.wait(5)
+        start_response('200 OK', [])
+        return [b'ok']
+
+    gate = AdmissionGate(slow_app, max_in_flight=4, max_per_client=1, queue_timeout=0.01)
+    abusive = {'PATH_INFO': '/api/v1/auth/login', 'REMOTE_ADDR': '198.51.100.7'}
+    holder = threading.Thread(target=gate, args=(abusive, lambda status, headers: None))
+    holder.start()
+    while gate.in_flight == 0:
+        pass
+
+    statuses = []
+    gate(abusive, lambda status, headers: statuses.append(status))
+    release.set()
+    gate(dict(abusive, REMOTE_ADDR='203.0.113.5'), lambda status, headers: statuses.append(status))
+    holder.join()
+    assert statuses == ['429 Too Many Requests', '200 OK']
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from app.services.database import db
+from app.services.release_service import advisory_lock, LockTimeout, RELEASE_LOCK
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAD = 'c6e2b8d4f173'
+BASELINE = 'da75f54f7701'
+
+# Counts pool connections made while importing the WSGI module
+COUNT_CONNECTIONS = '''
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connects = []
+event.listen(Pool, 'connect', lambda *args: connects.append(1))
+import wsgi
+print(len(connects))
+'''
+
+def _env(database, **extra):
+    # Migrations run in a subprocess: alembic's fileConfig() would otherwise
+    # reconfigure logging for the rest of the test session
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', FLASK_APP='wsgi.py',
+               FAST_START='true', ADMIN_EMAIL='release@example.com', **extra)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    return env
+
+def _release(database):
+    return subprocess.Popen([sys.executable, '-m', 'flask', 'release'], cwd=SERVER_DIR, env=_env(database),
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+def _query(database, sql):
+    with sqlite3.connect(database) as conn:
+        return conn.execute(sql).fetchall()
+
+def test_concurrent_releases(tmp_path):
+    """Test that concurrent releases migrate and seed exactly once"""
+    database = str(tmp_path / 'release.db')
+    processes = [_release(database) for _ in range(3)]
+    outputs = [p.communicate(timeout=120)[0] for p in processes]
+    assert [p.returncode for p in processes] == [0, 0, 0], outputs
+
+    assert sum(f'Migrated schema from None to {HEAD}' in out for out in outputs) == 1
+    # Every model table comes from the migrations alone
+    tables = {name for (name,) in _query(database, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'reminders' in tables and set(db.metadata.tables) <= tables
+    assert _query(database, "SELECT count(*) FROM sqlite_master WHERE name = 'ix_reminders_status_scheduled_time'") \
+        == [(1,)]
+    assert sum('Created the default admin user' in out for out in outputs) == 1
+    assert _query(database, 'SELECT version_num FROM alembic_version') == [(HEAD,)]
+    assert _query(database, "SELECT role FROM users WHERE email = 'release@example.com'") == [('admin',)]
+
+def _columns(database, table):
+    return {row[1] for row in _query(database, f'PRAGMA table_info({table})')}
+
+def test_release_adopts_unmigrated_schema(tmp_path):
+    """Test that a schema built by the old create_all() is migrated, not just stamped"""
+    database = str(tmp_path / 'legacy.db')
+    # The baseline schema, plus the reminders table create_all() built outside the migrations
+    baseline = subprocess.run([sys.executable, '-m', 'flask', 'db', 'upgrade', BASELINE], cwd=SERVER_DIR,
+                              env=_env(database), capture_output=True, text=True)
+    assert baseline.returncode == 0, baseline.stderr[-2000:]
+    with sqlite3.connect(database) as conn:
+        conn.execute('DROP TABLE alembic_version')
+        conn.execute('CREATE TABLE reminders (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                     'charity_id INTEGER NOT NULL, amount NUMERIC(10, 2) NOT NULL, '
+                     'scheduled_time DATETIME NOT NULL, status VARCHAR(50))')
+        conn.execute("INSERT INTO users (name, email, password_hash, role) VALUES ('Legacy', 'legacy@example.com', 'x', 'donor')")
+    assert 'updated_at' not in _columns(database, 'charities')
+
+    process = _release(database)
+    output = process.communicate(timeout=120)[0]
+    assert process.returncode == 0, output
+    assert _query(database, 'SELECT version_num FROM alembic_version') == [(HEAD,)]
+    assert 'updated_at' in _columns(database, 'charities')
+    assert 'receipt_number' in _columns(database, 'payments')
+    assert _query(database, "SELECT count(*) FROM sqlite_master WHERE name = 'ix_reminders_status_scheduled_time'") \
+        == [(1,)]
+    assert _query(database, "SELECT name FROM users WHERE email = 'legacy@example.com'") == [('Legacy',)]
+
+def test_worker_import_makes_no_db_round_trips(tmp_path):
+    """Test that importing wsgi in production does not connect to the database"""
+    result = subprocess.run([sys.executable, '-c', COUNT_CONNECTIONS], cwd=SERVER_DIR, capture_output=True,
+                            text=True, env=_env(str(tmp_path / 'worker.db'), FLASK_ENV='production'))
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.split()[-1] == '0'
+
+def test_release_lock_times_out(app):
+    """Test that a second holder gives up after the timeout"""
+    with advisory_lock(RELEASE_LOCK, timeout=1):
+        with pytest.raises(LockTimeout):
+            with advisory_lock(RELEASE_LOCK, timeout=0.2):
+                pass
+    with advisory_lock(RELEASE_LOCK, timeout=0.2):
+        pass
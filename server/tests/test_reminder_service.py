@@ -0,0 +1,133 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import event
+from app.services.database import db
+from app.models.reminder import Reminder
+from app.services.reminder_service import ReminderService
+
+def _seed(user_id, charity_id, count, days_ago=1):
+    scheduled = datetime.utcnow() - timedelta(days=days_ago)
+    db.session.bulk_insert_mappings(Reminder, [
+        {'user_id': user_id, 'charity_id': charity_id, 'amount': 100,
+         'scheduled_time': scheduled, 'status': 'pending'}
+        for _ in range(count)
+    ])
+    db.session.commit()
+
+def test_process_due_reminders_in_batches(app, donor_user, approved_charity):
+    """Test that due reminders are sent and rescheduled batch by batch"""
+    _seed(donor_user, approved_charity, 25)
+    _seed(donor_user, approved_charity, 3, days_ago=-5)
+
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    assert ReminderService.process_due_reminders(batch_size=10) == 25
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+    # Claim, fetch, mark sent, insert next + the empty claim that ends the loop
+    assert len(statements) <= 4 * 3 + 1
+    assert Reminder.query.filter_by(status='sent').count() == 25
+    next_reminders = Reminder.query.filter_by(status='pending').all()
+    assert len(next_reminders) == 28
+    assert sum(r.scheduled_time > datetime.utcnow() + timedelta(days=29) for r in next_reminders) == 25
+
+def test_missing_charity_fails_without_rescheduling(app, donor_user, approved_charity):
+    """Test that reminders for deleted charities are marked failed and not rescheduled"""
+    _seed(donor_user, approved_charity, 2)
+    _seed(donor_user, 9999, 1)
+
+    assert ReminderService.process_due_reminders() == 2
+    assert Reminder.query.filter_by(status='failed').count() == 1
+    assert Reminder.query.filter_by(status='pending').count() == 2
+
+def test_claimed_reminders_are_skipped(app, donor_user, approved_charity):
+    """Test that rows claimed by another worker are not processed twice"""
+    _seed(donor_user, approved_charity, 5)
+    claim, claimed = ReminderService.claim_batch(datetime.utcnow(), 3)
+    db.session.commit()
+    assert claimed == 3
+
+    assert ReminderService.process_batch(batch_size=10) == (2, 2)
+    assert Reminder.query.filter_by(status=claim).count() == 3
+
+def test_failed_batch_releases_claim(app, donor_user, approved_charity, monkeypatch):
+    """Test that an error rolls the claim back so the batch is retried later"""
+    _seed(donor_user, approved_charity, 4)
+
+    def boom(*args):
+        raise RuntimeError('smtp down')
+    monkeypatch.setattr(ReminderService, 'deliver', boom)
+
+    assert ReminderService.process_due_reminders() == 0
+    assert Reminder.query.filter_by(status='pending').count() == 4
+
+def _seed_old(user_id, charity_id, status, count, days_ago):
+    db.session.bulk_insert_mappings(Reminder, [
+        {'user_id': user_id, 'charity_id': charity_id, 'amount': 100,
+         'scheduled_time': datetime.utcnow() - timedelta(days=days_ago), 'status': status}
+        for _ in range(count)
+    ])
+    db.session.commit()
+
+def test_purge_deletes_old_processed_reminders_in_batches(app, donor_user, approved_charity):
+    """Test that only old sent/failed reminders are purged, one bounded DELETE per batch"""
+    _seed_old(donor_user, approved_charity, 'sent', 12, 200)
+    _seed_old(donor_user, approved_charity, 'pending', 3, 200)
+    _seed_old(donor_user, approved_charity, 'failed', 5, 200)
+    _seed_old(donor_user, approved_charity, 'sent', 4, 10)
+
+    deletes = []
+    def record(conn, cursor, statement, *args):
+        if statement.startswith('DELETE'):
+            deletes.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    result = ReminderService.purge_old_reminders(days_old=180, batch_size=5)
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert result.deleted == 17
+    assert result.rows_per_second > 0
+    assert len(deletes) == 4
+    assert Reminder.query.count() == 7
+
+def test_purge_archives_rows_before_deleting(app, donor_user, approved_charity, tmp_path):
+    """Test the compressed JSONL archive written by the purge"""
+    _seed_old(donor_user, approved_charity, 'sent', 3, 200)
+    archive = tmp_path / 'reminders.jsonl.gz'
+
+    assert ReminderService.cleanup_old_reminders(archive_path=str(archive)) == 3
+
+    with gzip.open(archive, 'rt') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row['status'] for row in rows] == ['sent'] * 3
+    assert rows[0]['user_id'] == donor_user
+    assert Reminder.query.count() == 0
+
+def test_purge_keeps_rows_processed_after_archiving(app, donor_user, approved_charity, tmp_path):
+    """Test that a reminder processed between the archive SELECT and the DELETE survives"""
+    _seed_old(donor_user, approved_charity, 'sent', 2, 200)
+    _seed_old(donor_user, approved_charity, 'pending', 1, 200)
+    _seed_old(donor_user, approved_charity, 'sent', 1, 200)
+    late = Reminder.query.filter_by(status='pending').one().id
+    archive = tmp_path / 'reminders.jsonl.gz'
+
+    class ProcessedWhileArchiving:
+        @staticmethod
+        def dumps(row, **kwargs):
+            Reminder.query.filter_by(id=late).update({'status': 'sent'})
+            return json.dumps(row, **kwargs)
+
+    with patch('app.services.reminder_service.json', ProcessedWhileArchiving):
+        assert ReminderService.purge_old_reminders(days_old=180, archive_path=str(archive)).deleted == 3
+    with gzip.open(archive, 'rt') as f:
+        assert late not in [json.loads(line)['id'] for line in f]
+    assert [r.id for r in Reminder.query.all()] == [late]
+
+def test_purge_reminders_command(app, runner, donor_user, approved_charity):
+    """Test the purge-reminders CLI command"""
+    _seed_old(donor_user, approved_charity, 'failed', 2, 400)
+    result = runner.invoke(args=['purge-reminders', '--days', '365'])
+    assert 'Purged 2 reminders' in result.output
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from app.services.database import db
+from app.models.reminder import Reminder
+from app.services import tasks
+
+def _seed(user_id, charity_id, count):
+    db.session.bulk_insert_mappings(Reminder, [
+        {'user_id': user_id, 'charity_id': charity_id, 'amount': 100,
+         'scheduled_time': datetime.utcnow() - timedelta(hours=1), 'status': 'pending'}
+        for _ in range(count)
+    ])
+    db.session.commit()
+
+def test_dispatcher_enqueues_one_task_per_batch(app, donor_user, approved_charity, monkeypatch):
+    """Test that due reminders are dispatched in chunks instead of one task each"""
+    _seed(donor_user, approved_charity, 23)
+    results = []
+    # Run batches inline in the test app instead of through the broker
+    monkeypatch.setattr(tasks.process_reminder_batch, 'delay',
+                        lambda *args: results.append(tasks.process_reminder_batch.run(*args)))
+
+    assert tasks.process_pending_reminders.run(batch_size=10) == 3
+    assert [r['sent'] for r in results] == [10, 10, 3]
+    assert all(r['seconds'] >= 0 for r in results)
+    assert Reminder.query.filter_by(status='sent').count() == 23
+
+def test_next_reminder_is_scheduled_by_column(app, donor_user, approved_charity, monkeypatch):
+    """Test that the follow-up reminder is a pending row, not a broker ETA"""
+    _seed(donor_user, approved_charity, 1)
+    monkeypatch.setattr(tasks.process_reminder_batch, 'delay', tasks.process_reminder_batch.run)
+
+    tasks.process_pending_reminders.run()
+
+    follow_up = Reminder.query.filter_by(status='pending').one()
+    assert follow_up.scheduled_time > datetime.utcnow() + timedelta(days=29)
+    # Nothing is due until then
+    assert tasks.process_pending_reminders.run() == 0
+
+def test_dispatch_is_capped_per_run(app, donor_user, approved_charity, monkeypatch):
+    """Test that one run never enqueues more than REMINDER_MAX_BATCHES_PER_RUN batches"""
+    _seed(donor_user, approved_charity, 30)
+    app.config['REMINDER_MAX_BATCHES_PER_RUN'] = 2
+    calls = []
+    monkeypatch.setattr(tasks.process_reminder_batch, 'delay', lambda *args: calls.append(args))
+
+    assert tasks.process_pending_reminders.run(batch_size=5) == 2
+    assert len(calls) == 2
@@ -0,0 +1,104 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app.services.database import db
+from app.models.charity import Charity
+from app.models.story import Story
+from app.services import response_cache
+from app.controllers.story_controller import StoryController
+
+@pytest.fixture
+def admin_headers(app, admin_user):
+    with app.app_context():
+        token = create_access_token(identity=str(admin_user), additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def story(approved_charity):
+    story = Story(charity_id=approved_charity, title='Back to school', content='Pads for 200 girls')
+    db.session.add(story)
+    db.session.commit()
+    return story.id
+
+def test_charity_list_is_cached_with_etag(client, approved_charity):
+    """Test that repeated reads are served from the cache with validators"""
+    first = client.get('/api/v1/charities/')
+    second = client.get('/api/v1/charities/')
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['Cache-Control'] == 'public, max-age=30'
+
+def test_ndjson_requests_bypass_the_cache(client, approved_charity):
+    """Test that a cached JSON page is never served to an NDJSON client"""
+    assert client.get('/api/v1/charities/').headers['Vary'] == 'Accept'
+    stream = client.get('/api/v1/charities/', headers={'Accept': 'application/x-ndjson'})
+    assert stream.mimetype == 'application/x-ndjson' and 'X-Cache' not in stream.headers
+    assert client.get('/api/v1/charities/').headers['X-Cache'] == 'HIT'
+
+def test_if_none_match_returns_304(client, story):
+    """Test conditional GETs against a cached story"""
+    etag = client.get(f'/api/v1/stories/{story}').headers['ETag']
+
+    response = client.get(f'/api/v1/stories/{story}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get(f'/api/v1/stories/{story}', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+
+def test_query_string_is_part_of_the_key(client, charity_user, approved_charity):
+    """Test that different pages are cached separately and keep their headers"""
+    db.session.add(Charity(name='Second', description='Another charity', owner_id=charity_user, status='approved'))
+    db.session.commit()
+
+    cursor = client.get('/api/v1/charities/?limit=1').headers['X-Next-Cursor']
+    assert client.get('/api/v1/charities/?limit=2').headers['X-Cache'] == 'MISS'
+    cached = client.get('/api/v1/charities/?limit=1')
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert cached.headers['X-Next-Cursor'] == cursor
+
+def test_story_update_invalidates_story_and_list(client, story):
+    """Test tag invalidation from StoryController writes"""
+    client.get('/api/v1/stories/')
+    client.get(f'/api/v1/stories/{story}')
+
+    StoryController.update_story(story, title='Updated title')
+
+    listing = client.get('/api/v1/stories/')
+    detail = client.get(f'/api/v1/stories/{story}')
+    assert listing.headers['X-Cache'] == 'MISS'
+    assert detail.headers['X-Cache'] == 'MISS'
+    assert detail.get_json()['story']['title'] == 'Updated title'
+
+def test_story_delete_invalidates_detail(client, story):
+    """Test that a deleted story stops being served from the cache"""
+    assert client.get(f'/api/v1/stories/{story}').status_code == 200
+    StoryController.delete_story(story)
+    assert client.get(f'/api/v1/stories/{story}').status_code == 404
+
+def test_charity_approval_invalidates_list(client, admin_headers, charity_user, approved_charity):
+    """Test that a newly approved charity shows up immediately"""
+    pending = Charity(name='New', description='Pending charity', owner_id=charity_user, status='pending')
+    db.session.add(pending)
+    db.session.commit()
+    assert len(client.get('/api/v1/charities/').get_json()['charities']) == 1
+
+    client.post(f'/api/v1/charities/admin/charities/{pending.id}/approve', headers=admin_headers)
+
+    response = client.get('/api/v1/charities/')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert len(response.get_json()['charities']) == 2
+
+def test_unavailable_backend_serves_uncached(client, app, approved_charity):
+    """Test that a cache outage degrades to direct reads"""
+    class Broken:
+        def __getattr__(self, name):
+            raise ConnectionError('cache down')
+
+    app.extensions['response_cache']['backend'] = Broken()
+    response = client.get('/api/v1/charities/')
+    assert response.status_code == 200
+    assert len(response.get_json()['charities']) == 1
+    response_cache.invalidate('charities')
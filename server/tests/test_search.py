@@ -0,0 +1,74 @@
+from app.services.database import db
+from app.models.charity import Charity
+from app.models.story import Story
+from app.services import response_cache
+
+def _story(charity_id, title, content):
+    story = Story(charity_id=charity_id, title=title, content=content)
+    db.session.add(story)
+    db.session.commit()
+    return story
+
+def _search(client, **params):
+    response = client.get('/api/v1/search/', query_string=params)
+    assert response.status_code == 200
+    return response
+
+def test_title_matches_rank_first(client, approved_charity):
+    """Test that a match in the title outranks one in the body"""
+    body = _story(approved_charity, 'Term report', 'The new water tank serves three schools')
+    title = _story(approved_charity, 'Clean water for Kibera', 'Girls no longer miss class')
+
+    results = _search(client, q='water', type='story').get_json()['results']
+    assert [r['story']['id'] for r in results] == [title.id, body.id]
+    assert results[0]['score'] > results[1]['score']
+    assert results[0]['story']['title'] == 'Clean water for Kibera'
+
+def test_index_follows_updates_and_deletes(client, approved_charity):
+    """Test that the index is kept in sync with story writes"""
+    story = _story(approved_charity, 'Sanitary pads drive', 'Donations delivered')
+    story.title = 'Uniform drive'
+    db.session.commit()
+    assert _search(client, q='sanitary').get_json()['results'] == []
+    assert len(_search(client, q='uniform').get_json()['results']) == 1
+
+    db.session.delete(story)
+    db.session.commit()
+    response_cache.invalidate('stories')
+    assert _search(client, q='uniform').get_json()['results'] == []
+
+def test_only_approved_charities(client, app, charity_user, approved_charity):
+    """Test that pending charities and their stories are not searchable"""
+    pending = Charity(owner_id=charity_user, name='Pending Helpers', description='helping people', status='pending')
+    db.session.add(pending)
+    db.session.commit()
+    _story(pending.id, 'Helping people', 'Not yet public')
+
+    results = _search(client, q='helping').get_json()['results']
+    assert [(r['type'], r['charity']['id']) for r in results] == [('charity', approved_charity)]
+
+def test_prefix_stemming_and_operators(client, approved_charity):
+    """Test prefix matching, stemming and that query syntax is treated as text"""
+    _story(approved_charity, 'Mentorship programme', 'Mentors visited the girls')
+    assert len(_search(client, q='mentor').get_json()['results']) == 1
+    assert len(_search(client, q='girl visit').get_json()['results']) == 1
+    assert _search(client, q='"title: OR NEAR(* -').get_json()['results'] == []
+    assert client.get('/api/v1/search/').status_code == 400
+    assert client.get('/api/v1/search/?q=x&type=user').status_code == 400
+
+def test_pagination(client, approved_charity):
+    """Test that cursors walk the ranked results without gaps or repeats"""
+    ids = {_story(approved_charity, f'Library {i}', 'books for the library').id for i in range(5)}
+
+    seen, after = [], None
+    while True:
+        params = {'q': 'library', 'type': 'story', 'limit': 2}
+        if after:
+            params['after'] = after
+        response = _search(client, **params)
+        seen += [r['story']['id'] for r in response.get_json()['results']]
+        after = response.headers.get('X-Next-Cursor')
+        if not after:
+            break
+    assert sorted(seen) == sorted(ids)
+    assert client.get('/api/v1/search/?q=library&after=garbage').status_code == 400
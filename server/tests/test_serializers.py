@@ -0,0 +1,65 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from app.services.database import db
+from app.services import fast_json
+from app.models.charity import Charity
+from app.models.charity_application import CharityApplication
+from app.models.donation import Donation
+
+def _donation(donor_user, approved_charity):
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=Decimal('12.50'),
+                        status='complete', timestamp=datetime(2025, 3, 1, 9, 30))
+    db.session.add(donation)
+    db.session.commit()
+    return donation
+
+def test_instance_and_row_serialization_match(app, donor_user, approved_charity):
+    """Test that to_dict and the row-tuple path produce the same dict"""
+    donation = _donation(donor_user, approved_charity)
+    expected = {'id': donation.id, 'user_id': donor_user, 'charity_id': approved_charity, 'amount': '12.50',
+                'recurring': False, 'status': 'complete', 'is_anonymous': False, 'timestamp': '2025-03-01T09:30:00'}
+    assert donation.to_dict() == expected
+
+    row = Donation.serializer.select(Donation.query.filter_by(id=donation.id)).one()
+    assert Donation.serializer(row) == expected
+
+def test_nullable_columns(app, donor_user):
+    """Test that unset dates serialize as None"""
+    application = CharityApplication(user_id=donor_user, organization_name='Org', mission='m')
+    db.session.add(application)
+    db.session.commit()
+    assert application.to_dict()['reviewed_at'] is None
+
+def test_extended_serializer_with_join(app, donor_user, approved_charity):
+    """Test extra columns from a joined table"""
+    _donation(donor_user, approved_charity)
+    serializer = Donation.serializer.extend(charity_name=Charity.name)
+    row = serializer.select(Donation.query.join(Donation.charity)).one()
+    assert serializer(row)['charity_name'] == 'Test Charity Organization'
+    assert list(serializer(row))[-1] == 'charity_name'
+
+def test_fast_json_matches_stdlib(monkeypatch):
+    """Test that the orjson and stdlib encoders produce the same document"""
+    document = {'amount': Decimal('1.10'), 'items': [1, 'two', None, True], 'nested': {'a': 1.5}}
+    fast = json.loads(fast_json.dumps(document))
+    monkeypatch.setattr(fast_json, 'orjson', None)
+    assert json.loads(fast_json.dumps(document)) == fast == {
+        'amount': '1.10', 'items': [1, 'two', None, True], 'nested': {'a': 1.5}}
+
+def test_list_and_stream_use_row_serializers(client, donor_user, approved_charity):
+    """Test the donation history page and its ndjson stream"""
+    from flask_jwt_extended import create_access_token
+    _donation(donor_user, approved_charity)
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(donor_user), additional_claims={'role': 'donor'})}"}
+
+    page = client.get('/api/v1/donations/history', headers=headers).get_json()['donations']
+    stream = client.get('/api/v1/donations/history?format=ndjson', headers=headers).get_data(as_text=True)
+    assert [json.loads(line) for line in stream.splitlines()] == page
+    assert page[0]['amount'] == '12.50' and page[0]['charity_name'] == 'Test Charity Organization'
+
+def test_charity_detail_envelope(client, approved_charity):
+    """Test that the detail endpoint returns its envelope instead of re-marshalling it"""
+    data = client.get(f'/api/v1/charities/{approved_charity}').get_json()
+    assert data['success'] is True
+    assert data['charity']['name'] == 'Test Charity Organization'
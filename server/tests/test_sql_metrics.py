@@ -0,0 +1,73 @@
+import logging
+from flask_jwt_extended import create_access_token
+from app.services.database import db
+from app.models.charity import Charity
+
+def _metrics(app, client):
+    app.config['METRICS_TOKEN'] = 'scrape-token'
+    return client.get('/api/v1/health/metrics', headers={'Authorization': 'Bearer scrape-token'})
+
+def _server_timing(response):
+    return dict(
+        (part.split(';')[0], part) for part in response.headers['Server-Timing'].split(', ')
+    )
+
+def test_server_timing_header(client, approved_charity):
+    """Test that responses report statement count and database time"""
+    response = client.get(f'/api/v1/charities/{approved_charity}')
+    assert response.status_code == 200
+
+    timing = _server_timing(response)
+    assert set(timing) == {'db', 'db-slowest', 'app'}
+    assert 'desc="1 queries"' in timing['db']
+
+def test_server_timing_can_be_disabled(app, client):
+    """Test SERVER_TIMING_ENABLED=False"""
+    app.config['SERVER_TIMING_ENABLED'] = False
+    assert 'Server-Timing' not in client.get('/api/v1/health/live').headers
+
+def test_metrics_endpoint(app, client, charity_user):
+    """Test the Prometheus exposition of per-route counters and histograms"""
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(charity_user), additional_claims={'role': 'charity'})}"}
+    for _ in range(3):
+        client.get('/api/v1/charities/my-charity/donations', headers=headers)
+
+    response = _metrics(app, client)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+
+    labels = 'route="/api/v1/charities/my-charity/donations",method="GET"'
+    assert f'http_requests_total{{{labels},status="404"}} 3' in body
+    assert f'db_statements_per_request_count{{{labels}}} 3' in body
+    assert f'db_statements_per_request_bucket{{{labels},le="+Inf"}} 3' in body
+    assert '# TYPE db_time_per_request_seconds histogram' in body
+    assert 'db_slow_queries_total 0' in body
+
+def test_slow_query_log(app, client, caplog):
+    """Test that statements over SLOW_QUERY_MS are logged with their request"""
+    app.config['SLOW_QUERY_MS'] = 0
+    with caplog.at_level(logging.WARNING, logger='app.services.sql_metrics'):
+        client.get('/api/v1/charities/1')
+    assert any('Slow query' in r.message and 'GET /api/v1/charities/1' in r.message
+               and 'FROM charities' in r.message for r in caplog.records)
+    assert 'db_slow_queries_total 1' in _metrics(app, client).get_data(as_text=True)
+
+def test_queries_outside_requests_are_not_attributed(app, client):
+    """Test that statements run outside a request do not reach any route"""
+    db.session.query(Charity.id).all()
+    body = _metrics(app, client).get_data(as_text=True)
+    assert 'db_statements_total{' not in body.split('# TYPE db_statements_total counter')[1].split('#')[0]
+
+def test_metrics_require_token(app, client, admin_user):
+    """Test that metrics need the scrape token and are not exempt from rate limits"""
+    assert client.get('/api/v1/health/metrics').status_code == 401
+    app.config['METRICS_TOKEN'] = 'scrape-token'
+    admin = {'Authorization': f"Bearer {create_access_token(identity=str(admin_user), additional_claims={'role': 'admin'})}"}
+    assert client.get('/api/v1/health/metrics', headers=admin).status_code == 401
+    assert client.get('/api/v1/health/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert _metrics(app, client).status_code == 200
+
+    app.config['RATE_LIMIT_DEFAULT'] = '1/minute'
+    assert [_metrics(app, client).status_code for _ in range(2)] == [200, 429]
+    assert client.get('/api/v1/health/live').status_code == 200
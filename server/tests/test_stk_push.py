@@ -0,0 +1,129 @@
+import threading
+import pytest
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from app.services.database import db
+from app.models.donation import Donation
+from app.models.payment import Payment
+from app.services.stk_push_service import StkPushService
+
+@pytest.fixture
+def donor_headers(app, donor_user):
+    with app.app_context():
+        token = create_access_token(identity=str(donor_user), additional_claims={'role': 'donor'})
+    return {'Authorization': f'Bearer {token}'}
+
+def _pay(client, headers, charity_id):
+    return client.post('/api/v1/payments/mpesa', headers=headers, json={
+        'phone_number': '254712345678',
+        'amount': 100,
+        'charity_id': charity_id
+    })
+
+STK_OK = {
+    'success': True,
+    'message': 'STK push initiated successfully',
+    'checkout_request_id': 'ws_CO_123456789',
+    'merchant_request_id': 'MR_123456789'
+}
+
+def test_payment_is_accepted_then_initiated(client, app, donor_headers, approved_charity):
+    """Test that the STK push runs in the background and marks the donation initiated"""
+    app.config['BACKGROUND_EXECUTOR'] = 'sync'
+    with patch('app.services.mpesa_service.MpesaService.initiate_stk_push', return_value=STK_OK):
+        response = _pay(client, donor_headers, approved_charity)
+
+    assert response.status_code == 202
+    donation_id = response.get_json()['donation_id']
+    assert Donation.query.get(donation_id).status == 'initiated'
+    assert Payment.query.filter_by(donation_id=donation_id).one().transaction_id == 'ws_CO_123456789'
+
+def test_failed_stk_push_fails_donation(client, app, donor_headers, approved_charity):
+    """Test that a rejected STK push moves the donation to failed"""
+    app.config['BACKGROUND_EXECUTOR'] = 'sync'
+    with patch('app.services.mpesa_service.MpesaService.initiate_stk_push',
+               return_value={'success': False, 'message': 'Payment initiation failed'}):
+        response = _pay(client, donor_headers, approved_charity)
+
+    assert response.status_code == 202
+    assert Donation.query.get(response.get_json()['donation_id']).status == 'failed'
+    assert Payment.query.count() == 0
+
+def test_redelivered_job_pushes_once(app, donor_user, approved_charity):
+    """Test that a second run of the same job does not send a second STK push"""
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=50, status='pending')
+    db.session.add(donation)
+    db.session.commit()
+
+    with patch('app.services.mpesa_service.MpesaService.initiate_stk_push', return_value=STK_OK) as push:
+        assert StkPushService.run(donation.id, '254712345678') is True
+        assert StkPushService.run(donation.id, '254712345678') is False
+    assert push.call_count == 1
+    assert Payment.query.filter_by(donation_id=donation.id).count() == 1
+
+def test_unrecorded_push_is_logged(app, donor_user, approved_charity, caplog):
+    """Test that the CheckoutRequestID is logged when the payment row cannot be committed"""
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=50, status='pending')
+    db.session.add(donation)
+    db.session.commit()
+
+    commit = db.session.commit
+    calls = []
+
+    def failing_second_commit():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError('connection lost')
+        commit()
+
+    with patch('app.services.mpesa_service.MpesaService.initiate_stk_push', return_value=STK_OK), \
+         patch.object(db.session, 'commit', side_effect=failing_second_commit), \
+         pytest.raises(RuntimeError):
+        StkPushService.run(donation.id, '254712345678')
+    assert 'ws_CO_123456789' in caplog.text
+    db.session.expire_all()
+    assert Donation.query.get(donation.id).status == 'initiated'
+
+def test_response_does_not_wait_for_daraja(client, app, donor_headers, approved_charity):
+    """Test that a slow Daraja call does not hold the request"""
+    app.config['BACKGROUND_EXECUTOR'] = 'thread'
+    release = threading.Event()
+    pushed = threading.Event()
+
+    def slow_push(*args, **kwargs):
+        pushed.set()
+        release.wait(5)
+        return STK_OK
+
+    futures = []
+    start = StkPushService.start
+    with patch('app.services.mpesa_service.MpesaService.initiate_stk_push', side_effect=slow_push), \
+         patch.object(StkPushService, 'start', side_effect=lambda *args: futures.append(start(*args))):
+        response = _pay(client, donor_headers, approved_charity)
+        assert response.status_code == 202
+        assert pushed.wait(5)
+        release.set()
+        assert futures[0].result(5) is True
+
+def test_callback_completes_initiated_donation(client, app, donor_user, approved_charity):
+    """Test the initiated -> complete transition"""
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=50, status='initiated')
+    db.session.add(donation)
+    db.session.flush()
+    db.session.add(Payment(donation_id=donation.id, method='mpesa', transaction_id='ws_CO_9', status='pending'))
+    db.session.commit()
+
+    client.post('/api/v1/payments/verify', json={'Body': {'stkCallback': {
+        'CheckoutRequestID': 'ws_CO_9', 'ResultCode': 0, 'ResultDesc': 'ok'}}})
+
+    db.session.expire_all()
+    assert Donation.query.get(donation.id).status == 'complete'
+
+def test_transitions_are_one_way(app, donor_user, approved_charity):
+    """Test that a settled donation cannot be moved back"""
+    donation = Donation(user_id=donor_user, charity_id=approved_charity, amount=50, status='complete')
+    db.session.add(donation)
+    db.session.commit()
+
+    assert Donation.transition(donation.id, 'initiated') is False
+    assert Donation.transition(donation.id, 'failed') is False
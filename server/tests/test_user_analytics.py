@@ -0,0 +1,121 @@
+import pytest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app.services.database import db
+from app.models.user import User
+from app.models.charity import Charity
+from app.models.donation import Donation
+from app.models.user_analytics import CohortRetention
+from app.services.user_analytics_service import UserAnalyticsService
+
+@pytest.fixture
+def admin_headers(app, admin_user):
+    with app.app_context():
+        token = create_access_token(identity=str(admin_user), additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def donors(app, approved_charity):
+    users = [User(name=f'Donor {i}', email=f'donor{i}@example.com', role='donor',
+                  created_at=datetime(2025, 1, 10 + i)) for i in range(3)]
+    for user in users:
+        user.set_password('password123')
+    other_charity = Charity(name='Other', description='Another charity', owner_id=1, status='approved')
+    db.session.add_all(users + [other_charity])
+    db.session.commit()
+    return [u.id for u in users], other_charity.id
+
+def _donate(user_id, charity_id, when, status='complete'):
+    db.session.add(Donation(user_id=user_id, charity_id=charity_id, amount=10, status=status, timestamp=when))
+    db.session.commit()
+
+def _analytics(client, headers, **params):
+    response = client.get('/api/v1/users/analytics', headers=headers, query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['analytics']
+
+def _cohorts():
+    return {(c.cohort_month, c.months_since): c.donors for c in CohortRetention.query if c.donors}
+
+def test_signups_conversion_and_top_charities(client, admin_headers, approved_charity, donors):
+    """Test signup series, donor conversion and top charities after a refresh"""
+    (first, second, _), other = donors
+    _donate(first, approved_charity, datetime(2025, 2, 1))
+    _donate(first, other, datetime(2025, 2, 3))
+    _donate(second, approved_charity, datetime(2025, 2, 5))
+    _donate(second, approved_charity, datetime(2025, 2, 6), status='failed')
+
+    result = UserAnalyticsService.refresh()
+    assert result.donations == 3
+    analytics = _analytics(client, admin_headers)
+
+    donor_january = [p for p in analytics['signups'] if p['role'] == 'donor' and p['period'] == '2025-01-01']
+    assert donor_january == [{'period': '2025-01-01', 'role': 'donor', 'signups': 3, 'converted': 2}]
+    conversion = analytics['conversion']
+    assert (conversion['donors'], conversion['repeat_donors']) == (2, 1)
+    assert conversion['converted'] == 2
+    assert [(c['charity_id'], c['donors']) for c in analytics['top_charities']] == [(approved_charity, 2), (other, 1)]
+    assert analytics['refreshed_at'] is not None
+
+def test_retention_cohorts(client, admin_headers, approved_charity, donors):
+    """Test that donors are grouped by first-donation month and tracked in later months"""
+    (first, second, third), _ = donors
+    _donate(first, approved_charity, datetime(2025, 1, 20))
+    _donate(first, approved_charity, datetime(2025, 3, 2))
+    _donate(second, approved_charity, datetime(2025, 1, 25))
+    _donate(third, approved_charity, datetime(2025, 2, 14))
+    UserAnalyticsService.refresh()
+
+    cohorts = _analytics(client, admin_headers)['cohorts']
+    assert [(c['cohort'], c['donors']) for c in cohorts] == [('2025-01', 2), ('2025-02', 1)]
+    assert cohorts[0]['retention'] == [
+        {'months_since': 0, 'donors': 2, 'rate': 1.0},
+        {'months_since': 2, 'donors': 1, 'rate': 0.5},
+    ]
+
+def test_incremental_refresh_matches_rebuild(app, approved_charity, donors):
+    """Test that refreshing chunk by chunk, including a late earlier donation, equals a rebuild"""
+    (first, second, _), other = donors
+    _donate(first, approved_charity, datetime(2025, 3, 1))
+    _donate(second, other, datetime(2025, 3, 9))
+    UserAnalyticsService.refresh(batch_size=1)
+    # Recorded later but dated earlier: moves the donor to the February cohort
+    _donate(first, other, datetime(2025, 2, 11))
+    _donate(second, other, datetime(2025, 4, 2))
+    UserAnalyticsService.refresh(batch_size=1)
+
+    incremental = _cohorts(), UserAnalyticsService.summary()
+    UserAnalyticsService.rebuild()
+    rebuilt = _cohorts(), UserAnalyticsService.summary()
+
+    assert incremental[0] == rebuilt[0] == {('2025-02', 0): 1, ('2025-02', 1): 1,
+                                           ('2025-03', 0): 1, ('2025-03', 1): 1}
+    for key in ('signups', 'conversion', 'cohorts', 'top_charities'):
+        assert incremental[1][key] == rebuilt[1][key]
+
+def test_refresh_waits_for_unsettled_donations(app, approved_charity, donors):
+    """Test that a recent pending donation holds the watermark until it settles"""
+    (first, second, _), _ = donors
+    _donate(first, approved_charity, datetime.utcnow(), status='pending')
+    _donate(second, approved_charity, datetime.utcnow())
+    assert UserAnalyticsService.refresh().donations == 0
+
+    pending = Donation.query.filter_by(status='pending').one()
+    pending.status = 'complete'
+    db.session.commit()
+    assert UserAnalyticsService.refresh().donations == 2
+    assert UserAnalyticsService.refresh().donations == 0
+
+def test_refresh_cli(app, runner, approved_charity, donors):
+    """Test the refresh-user-analytics command"""
+    _donate(donors[0][0], approved_charity, datetime.utcnow() - timedelta(days=2))
+    result = runner.invoke(args=['refresh-user-analytics', '--full'])
+    assert result.exit_code == 0, result.output
+    assert 'and 1 donations' in result.output
+
+def test_invalid_parameters(client, admin_headers):
+    """Test validation of interval and cohorts"""
+    url = '/api/v1/users/analytics'
+    assert client.get(url, headers=admin_headers, query_string={'interval': 'year'}).status_code == 400
+    assert client.get(url, headers=admin_headers, query_string={'cohorts': '0'}).status_code == 400
+    assert client.get(url, headers=admin_headers, query_string={'cohorts': 'many'}).status_code == 400
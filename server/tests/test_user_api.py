@@ -0,0 +1,74 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+def _headers(app, user_id, role=None):
+    with app.app_context():
+        claims = {'role': role} if role else None
+        token = create_access_token(identity=str(user_id), additional_claims=claims)
+    return {'Authorization': f'Bearer {token}'}
+
+def _count_statements(app):
+    from app.services.database import db
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+def test_roles_required_caches_principal(client, app, admin_user):
+    """Test that repeated protected calls don't re-query the user"""
+    headers = _headers(app, admin_user, 'admin')
+    assert client.get('/api/v1/users/', headers=headers).status_code == 200
+
+    statements = _count_statements(app)
+    response = client.get('/api/v1/users/', headers=headers)
+
+    assert response.status_code == 200
+    assert not any('users.role' in s and 'WHERE users.id' in s for s in statements)
+
+def test_roles_required_rejects_stale_role_claim(client, app, donor_user):
+    """Test that a token issued for another role is refused"""
+    headers = _headers(app, donor_user, 'admin')
+    response = client.get('/api/v1/users/', headers=headers)
+    assert response.status_code == 401
+
+def test_user_detail_as_admin(client, app, admin_user, donor_user):
+    """Test that an admin can read another user's details"""
+    response = client.get(f'/api/v1/users/{donor_user}', headers=_headers(app, admin_user, 'admin'))
+    assert response.status_code == 200
+    assert response.get_json()['user']['email'] == 'donor@test.com'
+
+def test_user_detail_other_user_forbidden(client, app, donor_user, charity_user):
+    """Test that a non-admin cannot read another user's details"""
+    response = client.get(f'/api/v1/users/{charity_user}', headers=_headers(app, donor_user, 'donor'))
+    assert response.status_code == 404
+
+def test_deleted_user_is_invalidated(client, app, admin_user, donor_user):
+    """Test that deleting a user revokes its cached principal"""
+    donor_headers = _headers(app, donor_user, 'donor')
+    assert client.get('/api/v1/donations/history', headers=donor_headers).status_code == 200
+    assert client.post('/api/v1/payments/mpesa', headers=donor_headers, json={}).status_code == 400
+
+    response = client.delete(f'/api/v1/users/{donor_user}', headers=_headers(app, admin_user, 'admin'))
+    assert response.status_code == 200
+
+    response = client.post('/api/v1/payments/mpesa', headers=donor_headers, json={})
+    assert response.status_code == 404
+
+def test_approval_invalidates_role(client, app, admin_user, donor_user):
+    """Test that approving a charity application refreshes the applicant's role"""
+    from app.middlewares.auth_middleware import get_user_role
+    from app.models.charity_application import CharityApplication
+    from app.services.database import db
+
+    with app.test_request_context():
+        assert get_user_role(donor_user) == 'donor'
+        application = CharityApplication(user_id=donor_user, organization_name='Girls First', mission='Education')
+        db.session.add(application)
+        db.session.commit()
+        application_id = application.id
+
+    client.post(f'/api/v1/charities/applications/{application_id}/approve',
+                headers=_headers(app, admin_user, 'admin'))
+
+    with app.test_request_context():
+        assert get_user_role(donor_user) == 'charity'
@@ -1,10 +1,11 @@
 """
 WSGI entry point for Gunicorn - Free Plan Optimized
-This file creates the Flask application instance that Gunicorn can import
+This file creates the Flask application instance that Gunicorn can import.
+Importing it makes no database round-trips: migrations and the admin seed
+run once per deploy with `flask release`.
 """
 import os
 from app import create_app
-from app.services.database import db
 
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.user import User
@@ -16,36 +17,10 @@ from app.models.story import Story
 from app.models.beneficiary import Beneficiary
 from app.models.inventory import Inventory
 from app.models.reminder import Reminder
-
-def initialize_database(app):
-    """Initialize database tables and create default admin user"""
-    with app.app_context():
-        try:
-            # Create database tables
-            db.create_all()
-            app.logger.info("Database tables created successfully")
-            
-            # Create default admin user if it doesn't exist
-            admin_email = os.getenv('ADMIN_EMAIL', 'admin@tuinuewasichana.com')
-            admin_password = os.getenv('ADMIN_PASSWORD', 'admin123')
-            
-            admin_user = User.query.filter_by(email=admin_email).first()
-            if not admin_user:
-                app.logger.info(f"Creating default admin user: {admin_email}")
-                admin_user = User(
-                    name='System Administrator',
-                    email=admin_email,
-                    role='admin'
-                )
-                admin_user.set_password(admin_password)
-                db.session.add(admin_user)
-                db.session.commit()
-                app.logger.info("Default admin user created successfully")
-            else:
-                app.logger.info("Admin user already exists")
-                
-        except Exception as e:
-            app.logger.error(f"Error during database initialization: {e}")
+from app.models.donation_stat import DonationStat
+from app.models.user_analytics import (
+    SignupStat, DonorSummary, DonorMonth, CharityDonor, CohortRetention, AnalyticsCounter
+)
 
 # Create the Flask application instance for Gunicorn
 application = create_app()
@@ -68,10 +43,6 @@ with application.app_context():
     def health_check():
         return {'status': 'healthy', 'service': 'tuinue-wasichana-api'}, 200
 
-# Initialize database (only in production)
-if os.getenv('FLASK_ENV') == 'production':
-    initialize_database(application)
-
 # For compatibility, also expose as 'app'
 app = application
 